@@ -138,3 +138,55 @@ def test_multiple_macs_tracked_independently():
     assert len(emit.records) == 2
     macs = {rec["mac"] for rec in emit.records}
     assert macs == {"aa:bb:cc:dd:ee:ff", "11:22:33:44:55:66"}
+
+
+# TC-AGG-006: aligned windows snap to epoch multiples, whatever the first sample's ts
+def test_aligned_windows_share_window_id_across_endpoints():
+    ep2, ep4 = CaptureEmit(), CaptureEmit()
+    a2 = aggregator.MacAggregator(window_s=2.0, emit_cb=ep2, aligned=True)
+    a4 = aggregator.MacAggregator(window_s=2.0, emit_cb=ep4, aligned=True)
+    mac = "aa:bb:cc:dd:ee:ff"
+
+    # Same device heard at slightly different times on two endpoints
+    for ts, rssi in ((100.1, -50), (101.9, -52), (102.3, -54)):
+        a2.add_sample(mac=mac, rssi=rssi, ts=ts)
+    for ts, rssi in ((101.4, -70), (102.8, -72)):
+        a4.add_sample(mac=mac, rssi=rssi, ts=ts)
+
+    # 102.3 / 102.8 opened window 51; window 50 was emitted on both sides
+    assert [r["window_id"] for r in ep2.records] == [50]
+    assert [r["window_id"] for r in ep4.records] == [50]
+    assert ep2.records[0]["sample_count"] == 2
+    assert ep4.records[0]["sample_count"] == 1
+
+
+# TC-AGG-007: aligned flush_expired closes a window only once its end has passed
+def test_aligned_flush_expired_uses_window_end():
+    emit = CaptureEmit()
+    aggr = aggregator.MacAggregator(window_s=2.0, emit_cb=emit, aligned=True)
+    aggr.add_sample(mac="aa:bb:cc:dd:ee:ff", rssi=-60, ts=103.9)
+
+    aggr.flush_expired(current_ts=103.99)
+    assert emit.records == []
+
+    aggr.flush_expired(current_ts=104.0)
+    assert len(emit.records) == 1
+    assert emit.records[0]["window_id"] == 51
+
+
+# TC-AGG-008: a late sample never re-emits an aligned window that was already emitted
+def test_aligned_late_sample_does_not_reopen_window():
+    emit = CaptureEmit()
+    aggr = aggregator.MacAggregator(window_s=2.0, emit_cb=emit, aligned=True)
+    mac = "aa:bb:cc:dd:ee:ff"
+
+    aggr.add_sample(mac=mac, rssi=-50, ts=100.5)  # window 50
+    aggr.add_sample(mac=mac, rssi=-60, ts=102.5)  # window 51 closes 50
+    aggr.add_sample(mac=mac, rssi=-55, ts=101.9)  # late: window 50 already emitted
+    aggr.flush_expired(current_ts=104.0)  # closes 51
+    aggr.add_sample(mac="11:22:33:44:55:66", rssi=-70, ts=103.0)  # late for everyone
+    aggr.flush_all()
+
+    assert [(r["mac"], r["window_id"]) for r in emit.records] == [(mac, 50), (mac, 51)]
+    assert emit.records[1]["sample_count"] == 1
+    assert aggr.late_dropped == 2
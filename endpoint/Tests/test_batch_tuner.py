@@ -0,0 +1,85 @@
+# endpoint/tests/test_batch_tuner.py
+"""
+Automated black-box tests for batch_tuner.py (AimdTuner, parse_retry_after).
+
+Each test references a Test Case ID (TC-TUNE-###) for traceability in the
+test report and traceability matrix.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# --- Ensure endpoint directory (where batch_tuner.py lives) is on sys.path ---
+ENDPOINT_DIR = Path(__file__).resolve().parents[1]
+if str(ENDPOINT_DIR) not in sys.path:
+    sys.path.insert(0, str(ENDPOINT_DIR))
+
+import batch_tuner  # noqa: E402
+
+
+# TC-TUNE-001: healthy POSTs grow the batch additively, flush follows proportionally
+def test_additive_increase_on_fast_success():
+    t = batch_tuner.AimdTuner(batch_size=100, flush_ms=1000, target_latency_ms=500)
+    t.on_success(latency_s=0.1)
+    t.on_success(latency_s=0.1)
+
+    assert t.batch_size == 120  # step defaults to 10% of the starting size
+    assert t.flush_ms == 1200
+    assert t.increases == 2
+
+
+# TC-TUNE-002: congestion halves the batch and never goes below min_batch_size
+def test_multiplicative_decrease_respects_floor():
+    t = batch_tuner.AimdTuner(batch_size=100, flush_ms=1000, min_batch_size=30)
+    t.on_backpressure()
+    assert t.batch_size == 50
+    t.on_backpressure()
+    t.on_backpressure()
+    assert t.batch_size == 30
+
+
+# TC-TUNE-003: slow successes count as congestion
+def test_slow_success_shrinks():
+    t = batch_tuner.AimdTuner(batch_size=100, flush_ms=1000, target_latency_ms=200)
+    t.on_success(latency_s=0.5)
+    assert t.batch_size == 50
+
+
+# TC-TUNE-004: flush interval is capped by max_data_age_ms, batch by max_batch_size
+def test_caps_on_growth():
+    t = batch_tuner.AimdTuner(
+        batch_size=100,
+        flush_ms=1000,
+        max_batch_size=150,
+        max_data_age_ms=1200,
+        target_latency_ms=10_000,
+    )
+    for _ in range(20):
+        t.on_success(latency_s=0.01)
+
+    assert t.batch_size == 150
+    assert t.flush_ms == 1200
+
+
+# TC-TUNE-005: Retry-After parsing (seconds, HTTP-date, garbage) and hold tracking
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("7", 7.0),
+        ("Thu, 01 Jan 1970 00:00:30 GMT", 20.0),
+        ("soon", None),
+        (None, None),
+    ],
+)
+def test_parse_retry_after(value, expected):
+    assert batch_tuner.parse_retry_after(value, now=10.0) == expected
+
+
+def test_hold_remaining():
+    t = batch_tuner.AimdTuner(batch_size=10, flush_ms=100)
+    t.hold(5.0, now=100.0)
+    t.hold(1.0, now=100.0)  # shorter hold must not shorten the existing one
+    assert t.hold_remaining(now=102.0) == pytest.approx(3.0)
+    assert t.hold_remaining(now=200.0) == 0.0
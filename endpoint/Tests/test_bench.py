@@ -0,0 +1,53 @@
+# endpoint/tests/test_bench.py
+"""
+Automated black-box tests for benchmarks/bench.py (baseline comparison).
+
+Each test references a Test Case ID (TC-BENCH-###) for traceability in the
+test report and traceability matrix.
+"""
+
+import sys
+from pathlib import Path
+
+# --- Ensure benchmarks directory (where bench.py lives) is on sys.path ---
+BENCH_DIR = Path(__file__).resolve().parents[1] / "benchmarks"
+if str(BENCH_DIR) not in sys.path:
+    sys.path.insert(0, str(BENCH_DIR))
+
+import bench  # noqa: E402
+
+
+# TC-BENCH-001: slowdowns beyond the threshold are regressions; new results are not
+def test_compare_flags_regressions():
+    baseline = {
+        "a": {"value": 100.0, "unit": "lines/s"},
+        "b": {"value": 100.0, "unit": "lines/s", "threshold": 0.5},
+    }
+    results = {
+        "a": {"value": 70.0, "unit": "lines/s", "higher_is_better": True},
+        "b": {"value": 70.0, "unit": "lines/s", "higher_is_better": True},
+        "c": {"value": 1.0, "unit": "lines/s", "higher_is_better": True},
+    }
+    rows = {r["name"]: r for r in bench.compare(results, baseline, threshold=0.2)}
+
+    assert rows["a"]["regression"] is True and rows["a"]["change"] == -0.3
+    assert rows["b"]["regression"] is False  # per-entry threshold wins
+    assert rows["c"]["status"] == "new"
+
+
+# TC-BENCH-002: lower-is-better metrics regress when they grow
+def test_compare_lower_is_better():
+    baseline = {"lat": {"value": 10.0, "unit": "ms"}}
+    results = {"lat": {"value": 13.0, "unit": "ms", "higher_is_better": False}}
+    (row,) = bench.compare(results, baseline, threshold=0.2)
+    assert row["regression"] is True
+
+
+# TC-BENCH-003: runs that lose records are reported as incomplete (main exits 1)
+def test_incomplete_results():
+    results = {
+        "stream_e2e": {"value": 1.0, "complete": False},
+        "ok": {"value": 1.0, "complete": True},
+        "parse": {"value": 1.0},
+    }
+    assert bench.incomplete(results) == ["stream_e2e"]
@@ -0,0 +1,130 @@
+# endpoint/tests/test_capture.py
+"""
+Automated black-box tests for capture.py (BPF filter builder, TcpdumpCapture).
+
+Each test references a Test Case ID (TC-CAP-###) for traceability in the
+test report and traceability matrix.
+
+A small Python script stands in for tcpdump, so no capture privileges are needed.
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# --- Ensure endpoint directory (where capture.py lives) is on sys.path ---
+ENDPOINT_DIR = Path(__file__).resolve().parents[1]
+if str(ENDPOINT_DIR) not in sys.path:
+    sys.path.insert(0, str(ENDPOINT_DIR))
+
+import capture  # noqa: E402
+from capture import TcpdumpCapture, build_bpf_filter  # noqa: E402
+
+# Fake tcpdump: argv = state file, lines per run, exit code, "hold" (wait for SIGTERM)
+FAKE_TCPDUMP = r"""
+import signal, sys, time
+state, lines, code, hold = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), sys.argv[4]
+try:
+    run = int(open(state).read()) + 1
+except FileNotFoundError:
+    run = 1
+open(state, "w").write(str(run))
+
+def summary(*_):
+    sys.stderr.write(
+        "%d packets captured\n%d packets received by filter\n"
+        "1 packet dropped by kernel\n" % (lines, lines + 2)
+    )
+    sys.stderr.flush()
+    sys.exit(code)
+
+signal.signal(signal.SIGTERM, summary)
+print("tcpdump: listening on wlan1", file=sys.stderr, flush=True)
+for i in range(lines):
+    print("run%d line%d" % (run, i), flush=True)
+if hold == "hold":
+    while True:
+        time.sleep(0.05)
+summary()
+"""
+
+
+def _fake(tmp_path, lines, code, hold="exit"):
+    script = tmp_path / "fake_tcpdump.py"
+    script.write_text(FAKE_TCPDUMP, encoding="utf-8")
+    state = tmp_path / "runs"
+    return [sys.executable, str(script), str(state), str(lines), str(code), hold]
+
+
+# TC-CAP-001: frame-type policy and MAC deny list become one pcap-filter expression
+def test_build_bpf_filter():
+    assert build_bpf_filter() == ""
+    assert build_bpf_filter(include={"data"}) == "type data"
+    assert build_bpf_filter(
+        include={"probe_request", "data"},
+        exclude={"beacon", "rts"},
+        exclude_macs=["AA-BB-CC-DD-EE-FF"],
+    ) == (
+        "(type data or type mgt subtype probe-req)"
+        " and not (type mgt subtype beacon or type ctl subtype rts)"
+        " and not wlan addr2 aa:bb:cc:dd:ee:ff"
+    )
+    # "other" cannot be expressed in BPF: the include clause is dropped
+    assert build_bpf_filter(include={"rts", "other"}, exclude={"other"}) == ""
+    assert build_bpf_filter(exclude={"ba"}) == "not wlan[0] & 0xfc = 0x94"
+
+    with pytest.raises(ValueError):
+        build_bpf_filter(include={"beacons"})
+    with pytest.raises(ValueError):
+        build_bpf_filter(exclude_macs=["aa:bb"])
+
+
+# TC-CAP-002: tcpdump counters are read from both the exit and the SIGUSR1 format
+def test_parse_tcpdump_stats():
+    at_exit = b"12 packets captured\n15 packets received by filter\n"
+    assert capture.parse_tcpdump_stats(at_exit) == {"captured": 12, "received": 15}
+    on_usr1 = (
+        b"tcpdump: 1 packet captured, 3 packets received by filter, "
+        b"2 packets dropped by kernel, 0 packets dropped by interface"
+    )
+    assert capture.parse_tcpdump_stats(on_usr1) == {
+        "captured": 1,
+        "received": 3,
+        "dropped_kernel": 2,
+        "dropped_iface": 0,
+    }
+
+
+# TC-CAP-003: a crashed tcpdump is restarted and counters add up across runs
+def test_restart_after_crash(tmp_path):
+    cap = TcpdumpCapture(
+        "wlan1", command=_fake(tmp_path, 2, 1), restart_delay_s=0, max_restarts=1
+    )
+    assert list(cap) == [
+        b"run1 line0\n",
+        b"run1 line1\n",
+        b"run2 line0\n",
+        b"run2 line1\n",
+    ]
+    s = cap.stats()
+    assert s["restarts"] == 1 and s["last_exit"] == 1 and not s["running"]
+    assert s["captured"] == 4 and s["received"] == 8 and s["dropped_kernel"] == 2
+    assert "dropped_kernel=2" in cap.summary()
+
+
+# TC-CAP-004: stop() terminates tcpdump, ends the iteration and keeps exit counters
+def test_stop_ends_iteration(tmp_path):
+    cap = TcpdumpCapture("wlan1", command=_fake(tmp_path, 3, 0, "hold"))
+    got = []
+    for line in cap:
+        got.append(line)
+        if len(got) == 3:
+            threading.Timer(0.05, cap.stop).start()
+    assert len(got) == 3
+    s = cap.stats()
+    assert s["restarts"] == 0 and s["captured"] == 3 and s["dropped_kernel"] == 1
+
+    cmd = TcpdumpCapture("wlan1", bpf="type data", sudo=True).command
+    assert cmd[:4] == ["sudo", "-n", "tcpdump", "-i"] and cmd[-1] == "type data"
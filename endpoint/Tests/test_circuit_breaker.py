@@ -0,0 +1,81 @@
+# endpoint/tests/test_circuit_breaker.py
+"""
+Automated black-box tests for circuit_breaker.py (CircuitBreaker).
+
+Each test references a Test Case ID (TC-CB-###) for traceability in the
+test report and traceability matrix.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# --- Ensure endpoint directory (where circuit_breaker.py lives) is on sys.path ---
+ENDPOINT_DIR = Path(__file__).resolve().parents[1]
+if str(ENDPOINT_DIR) not in sys.path:
+    sys.path.insert(0, str(ENDPOINT_DIR))
+
+import circuit_breaker  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# TC-CB-001: opens after N consecutive failures and refuses requests during cooldown
+def test_opens_after_threshold():
+    clock = FakeClock()
+    cb = circuit_breaker.CircuitBreaker(failure_threshold=3, cooldown_s=10, clock=clock)
+
+    cb.record_failure()
+    cb.record_failure()
+    assert cb.state == circuit_breaker.CLOSED
+    cb.record_failure()
+    assert cb.state == circuit_breaker.OPEN
+    assert cb.allow_request() is False
+
+
+# TC-CB-002: after cooldown exactly one probe is allowed; success closes
+def test_half_open_single_probe_then_close():
+    clock = FakeClock()
+    cb = circuit_breaker.CircuitBreaker(failure_threshold=1, cooldown_s=10, clock=clock)
+    cb.record_failure()
+
+    clock.now = 10.0
+    assert cb.allow_request() is True
+    assert cb.state == circuit_breaker.HALF_OPEN
+    assert cb.allow_request() is False  # probe already in flight
+
+    cb.record_success()
+    assert cb.state == circuit_breaker.CLOSED
+    assert cb.allow_request() is True
+
+
+# TC-CB-003: failed probe re-opens for a fresh cooldown; transitions are counted
+def test_failed_probe_reopens_and_transitions_counted():
+    clock = FakeClock()
+    seen = []
+    cb = circuit_breaker.CircuitBreaker(
+        failure_threshold=1,
+        cooldown_s=5,
+        clock=clock,
+        on_transition=lambda old, new, n: seen.append((old, new)),
+    )
+    cb.record_failure()
+    clock.now = 5.0
+    assert cb.allow_request() is True
+    cb.record_failure()
+
+    assert cb.state == circuit_breaker.OPEN
+    assert cb.cooldown_remaining() == pytest.approx(5.0)
+    assert seen == [("closed", "open"), ("open", "half_open"), ("half_open", "open")]
+    assert cb.transitions == {
+        "closed->open": 1,
+        "open->half_open": 1,
+        "half_open->open": 1,
+    }
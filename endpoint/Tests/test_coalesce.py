@@ -0,0 +1,69 @@
+# endpoint/tests/test_coalesce.py
+"""
+Automated black-box tests for coalesce.py (coalesce_records).
+
+Each test references a Test Case ID (TC-COAL-###) for traceability in the
+test report and traceability matrix.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# --- Ensure endpoint directory (where coalesce.py lives) is on sys.path ---
+ENDPOINT_DIR = Path(__file__).resolve().parents[1]
+if str(ENDPOINT_DIR) not in sys.path:
+    sys.path.insert(0, str(ENDPOINT_DIR))
+
+import coalesce  # noqa: E402
+
+MAC_A = "aa:bb:cc:dd:ee:ff"
+MAC_B = "11:22:33:44:55:66"
+
+
+def _rec(mac, rssi, ts):
+    return {"mac": mac, "rssi": rssi, "timestamp": ts}
+
+
+# TC-COAL-001: dedupe mode only removes exact duplicates
+def test_dedupe_mode_drops_exact_duplicates_only():
+    records = [
+        _rec(MAC_A, -50, 100.1),
+        _rec(MAC_A, -50, 100.1),
+        _rec(MAC_A, -51, 100.2),
+    ]
+    out = coalesce.coalesce_records(records, mode="dedupe")
+    assert out == [_rec(MAC_A, -50, 100.1), _rec(MAC_A, -51, 100.2)]
+
+
+# TC-COAL-002: max mode collapses each (mac, bucket) to the strongest RSSI
+def test_max_mode_collapses_per_mac_and_bucket():
+    records = [
+        _rec(MAC_A, -60, 100.1),
+        _rec(MAC_B, -70, 100.2),
+        _rec(MAC_A, -40, 100.5),
+        _rec(MAC_A, -55, 101.2),  # next bucket
+    ]
+    out = coalesce.coalesce_records(records, mode="max", bucket_s=1.0)
+
+    assert out == [
+        _rec(MAC_A, -40, 100.5),
+        _rec(MAC_B, -70, 100.2),
+        _rec(MAC_A, -55, 101.2),
+    ]
+
+
+# TC-COAL-003: median mode keeps the latest record's fields with median RSSI
+def test_median_mode_uses_latest_timestamp():
+    records = [_rec(MAC_A, -60, 10.0), _rec(MAC_A, -50, 10.3), _rec(MAC_A, -40, 10.9)]
+    out = coalesce.coalesce_records(records, mode="median", bucket_s=1.0)
+    assert out == [_rec(MAC_A, -50, 10.9)]
+
+
+# TC-COAL-004: records missing mac/timestamp pass through; bad mode rejected
+def test_passthrough_and_invalid_mode():
+    odd = {"note": "no mac"}
+    assert coalesce.coalesce_records([odd], mode="max") == [odd]
+    with pytest.raises(ValueError):
+        coalesce.coalesce_records([], mode="mean")
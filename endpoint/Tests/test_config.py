@@ -167,3 +167,130 @@ def test_as_int_valid_and_invalid():
 )
 def test_is_truthy_values(value, expected):
     assert config._is_truthy(value) is expected
+
+
+# TC-CFG-009: adaptive batching settings are parsed and bounds are validated
+def test_load_config_adaptive_batching(monkeypatch):
+    _set_min_env(monkeypatch)
+    monkeypatch.setenv("BATCH_ADAPTIVE", "yes")
+    monkeypatch.setenv("BATCH_MIN", "20")
+    monkeypatch.setenv("BATCH_CEILING", "800")
+    monkeypatch.setenv("BATCH_MAX_AGE_SEC", "15")
+
+    cfg = config.load_config()
+    assert cfg.batch_adaptive is True
+    assert cfg.batch_min == 20
+    assert cfg.batch_ceiling == 800
+    assert cfg.batch_max_age == 15
+
+    monkeypatch.setenv("BATCH_MIN", "900")
+    with pytest.raises(ValueError):
+        config.load_config()
+
+
+# TC-CFG-010: frame-type include/exclude lists are read and normalised
+def test_load_config_frame_filter(monkeypatch):
+    _set_min_env(monkeypatch)
+    cfg = config.load_config()
+    assert cfg.frame_include == "" and cfg.frame_exclude == ""
+
+    monkeypatch.setenv("FRAME_EXCLUDE", " Beacon,RTS ")
+    cfg = config.load_config()
+    assert cfg.frame_exclude == "beacon,rts"
+
+
+# TC-CFG-011: BPF transmitter deny list is normalised and validated
+def test_load_config_capture_exclude_macs(monkeypatch):
+    _set_min_env(monkeypatch)
+    monkeypatch.setenv("CAPTURE_EXCLUDE_MACS", "AA-BB-CC-DD-EE-FF, 00:11:22:33:44:55")
+    cfg = config.load_config()
+    assert cfg.capture_exclude_macs == "aa:bb:cc:dd:ee:ff,00:11:22:33:44:55"
+
+    monkeypatch.setenv("CAPTURE_EXCLUDE_MACS", "aa:bb:cc")
+    with pytest.raises(ValueError):
+        config.load_config()
+
+
+# TC-CFG-012: SANITIZE defaults to off and only accepts off / drop / clamp
+def test_load_config_sanitize(monkeypatch):
+    _set_min_env(monkeypatch)
+    assert config.load_config().sanitize == "off"
+    monkeypatch.setenv("SANITIZE", "Clamp")
+    assert config.load_config().sanitize == "clamp"
+    monkeypatch.setenv("SANITIZE", "fix")
+    with pytest.raises(ValueError):
+        config.load_config()
+
+
+# TC-CFG-013: infrastructure registry settings and MAC override lists
+def test_load_config_infra(monkeypatch):
+    _set_min_env(monkeypatch)
+    cfg = config.load_config()
+    assert cfg.infra_mode == "off" and cfg.infra_keep_sec == 60
+
+    monkeypatch.setenv("INFRA_MODE", "downsample")
+    monkeypatch.setenv("INFRA_DENY", "AA-BB-CC-DD-EE-FF,")
+    cfg = config.load_config()
+    assert cfg.infra_mode == "downsample" and cfg.infra_deny == "aa:bb:cc:dd:ee:ff"
+
+    monkeypatch.setenv("INFRA_ALLOW", "zz:bb:cc:dd:ee:ff")
+    with pytest.raises(ValueError):
+        config.load_config()
+    monkeypatch.setenv("INFRA_ALLOW", "")
+    monkeypatch.setenv("INFRA_MODE", "hide")
+    with pytest.raises(ValueError):
+        config.load_config()
+
+
+# TC-CFG-014: randomized-MAC mode and window are read and validated
+def test_load_config_random_mac(monkeypatch):
+    _set_min_env(monkeypatch)
+    cfg = config.load_config()
+    assert cfg.random_mac_mode == "off" and cfg.random_mac_window_sec == 10
+    monkeypatch.setenv("RANDOM_MAC_MODE", "Summary")
+    assert config.load_config().random_mac_mode == "summary"
+    monkeypatch.setenv("RANDOM_MAC_WINDOW_SEC", "0")
+    with pytest.raises(ValueError):
+        config.load_config()
+
+
+# TC-CFG-015: retransmission dedupe toggle and gap
+def test_load_config_dedupe(monkeypatch):
+    _set_min_env(monkeypatch)
+    cfg = config.load_config()
+    assert cfg.dedupe is False and cfg.dedupe_gap_ms == 50
+    monkeypatch.setenv("DEDUPE", "yes")
+    monkeypatch.setenv("DEDUPE_GAP_MS", "20")
+    cfg = config.load_config()
+    assert cfg.dedupe is True and cfg.dedupe_gap_ms == 20
+    monkeypatch.setenv("DEDUPE_GAP_MS", "-1")
+    with pytest.raises(ValueError):
+        config.load_config()
+
+
+# TC-CFG-016: load-shedding toggle and thresholds
+def test_load_config_load_shed(monkeypatch):
+    _set_min_env(monkeypatch)
+    cfg = config.load_config()
+    assert cfg.load_shed is False and cfg.load_shed_lag_ms == 2000
+    monkeypatch.setenv("LOAD_SHED", "true")
+    monkeypatch.setenv("LOAD_SHED_BACKLOG_KB", "32")
+    cfg = config.load_config()
+    assert cfg.load_shed is True and cfg.load_shed_backlog_kb == 32
+    monkeypatch.setenv("LOAD_SHED_LAG_MS", "0")
+    with pytest.raises(ValueError):
+        config.load_config()
+
+
+# TC-CFG-017: snapshot mode, interval and refresh are read and validated
+def test_load_config_snapshot(monkeypatch):
+    _set_min_env(monkeypatch)
+    cfg = config.load_config()
+    assert cfg.snapshot_mode == "off" and cfg.snapshot_interval_sec == 5
+    monkeypatch.setenv("SNAPSHOT_MODE", "Median")
+    monkeypatch.setenv("SNAPSHOT_REFRESH_SEC", "120")
+    cfg = config.load_config()
+    assert cfg.snapshot_mode == "median" and cfg.snapshot_refresh_sec == 120
+    monkeypatch.setenv("SNAPSHOT_INTERVAL_SEC", "200")
+    with pytest.raises(ValueError):
+        config.load_config()
@@ -0,0 +1,74 @@
+# endpoint/tests/test_dedupe.py
+"""
+Automated black-box tests for dedupe.py (frame_seq, RetryDedupe).
+
+Each test references a Test Case ID (TC-DUP-###) for traceability in the
+test report and traceability matrix.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# --- Ensure endpoint directory (where dedupe.py lives) is on sys.path ---
+ENDPOINT_DIR = Path(__file__).resolve().parents[1]
+if str(ENDPOINT_DIR) not in sys.path:
+    sys.path.insert(0, str(ENDPOINT_DIR))
+
+from dedupe import RetryDedupe, frame_seq  # noqa: E402
+from parser_scan import parse_line  # noqa: E402
+
+HEAD = "tsft 2412 MHz 11n -22dBm signal -22dBm signal antenna 0 "
+QOS = "48us CF +QoS BSSID:4a:d9:e7:b3:73:16 SA:b8:27:eb:61:1c:a3 DA:a4:97:33:80:f2:07 "
+
+
+def _data(ts, iv, retry=False, key=0):
+    flags = "Retry Protected " if retry else "Protected "
+    return f"{ts:.6f} {HEAD}{flags}{QOS}Data IV:{iv} Pad 20 KeyID {key}\n"
+
+
+def _rts(ts, retry=False):
+    flags = "Retry " if retry else ""
+    return (
+        f"{ts:.6f} {HEAD}{flags}3284us RA:34:7e:5c:7b:b8:d2 TA:54:07:7d:7b:ec:9c "
+        "Request-To-Send\n"
+    )
+
+
+def _check(dedupe, line):
+    return dedupe.is_duplicate(parse_line(line), line)
+
+
+# TC-DUP-001: Retry flag and (KeyID, IV) are read from the tcpdump text
+def test_frame_seq():
+    assert frame_seq(_data(1.0, "29bb", retry=True, key=2)) == (True, (2, 0x29BB))
+    assert frame_seq(_data(1.0, "29bb")) == (False, (0, 0x29BB))
+    assert frame_seq(_rts(1.0)) == (False, None)
+
+
+# TC-DUP-002: a repeated IV from the same MAC is dropped only inside the window
+def test_iv_duplicates():
+    d = RetryDedupe(window_s=1.0)
+    assert not _check(d, _data(1758170288.748592, "29bb", retry=True))
+    assert _check(d, _data(1758170288.748876, "29bb", retry=True))
+    assert not _check(d, _data(1758170288.749, "29bb", key=1))  # other key space
+    assert not _check(d, _data(1758170289.660413, "29bc", retry=True))
+    assert not _check(d, _data(1758170295.0, "29bb"))  # outside the window
+    assert d.dropped == {"iv": 1}
+    assert d.summary() == "dropped=1 of 5 (iv=1)"
+
+
+# TC-DUP-003: Retry frames without IV use the gap; the MAC table is an LRU
+def test_retry_gap_and_lru():
+    d = RetryDedupe(retry_gap_s=0.05, max_macs=1)
+    assert not _check(d, _rts(100.00))
+    assert _check(d, _rts(100.02, retry=True))
+    assert not _check(d, _rts(100.03))  # no Retry flag: a new frame
+    assert not _check(d, _rts(100.20, retry=True))  # outside the gap
+    _check(d, _data(100.21, "0001"))  # another MAC evicts the RTS sender
+    assert not _check(d, _rts(100.22, retry=True))
+    assert d.dropped == {"retry": 1}
+
+    with pytest.raises(ValueError):
+        RetryDedupe(lru_size=0)
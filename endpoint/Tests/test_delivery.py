@@ -0,0 +1,104 @@
+# endpoint/tests/test_delivery.py
+"""
+Automated black-box tests for delivery.py (DeliveryLanes).
+
+Each test references a Test Case ID (TC-DLV-###) for traceability in the
+test report and traceability matrix.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# --- Ensure endpoint directory (where delivery.py lives) is on sys.path ---
+ENDPOINT_DIR = Path(__file__).resolve().parents[1]
+if str(ENDPOINT_DIR) not in sys.path:
+    sys.path.insert(0, str(ENDPOINT_DIR))
+
+import delivery  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _recs(*timestamps):
+    return [
+        {"mac": "aa:bb:cc:dd:ee:ff", "rssi": -50, "timestamp": t} for t in timestamps
+    ]
+
+
+# TC-DLV-001: without freshness, parked batches drain oldest-first, no rate cap
+def test_fifo_when_freshness_disabled():
+    lanes = delivery.DeliveryLanes()
+    lanes.add(_recs(1.0))
+    lanes.add(_recs(2.0))
+
+    assert lanes.pop() == (("backlog", _recs(1.0)), 0)
+    assert lanes.pop() == (("backlog", _recs(2.0)), 0)
+    assert lanes.pop() == (None, 0)
+
+
+# TC-DLV-002: live lane is LIFO and served before the backlog
+def test_live_newest_first_before_backlog():
+    clock = FakeClock(1000.0)
+    lanes = delivery.DeliveryLanes(fresh_s=300, clock=clock)
+    lanes.add(_recs(500.0))  # 500s old -> backlog
+    lanes.add(_recs(900.0))  # live
+    lanes.add(_recs(950.0))  # live, newer
+
+    assert lanes.pop() == (("live", _recs(950.0)), 0)
+    assert lanes.pop() == (("live", _recs(900.0)), 0)
+    assert lanes.pop() == (("backlog", _recs(500.0)), 0)
+
+
+# TC-DLV-003: backlog trickles at backlog_rate records/second
+def test_backlog_rate_cap():
+    clock = FakeClock(1000.0)
+    lanes = delivery.DeliveryLanes(fresh_s=10, backlog_rate=2, clock=clock)
+    lanes.add(_recs(1.0, 2.0, 3.0, 4.0, 5.0))
+
+    (lane, first), _ = lanes.pop()
+    assert lane == "backlog"
+    assert [r["timestamp"] for r in first] == [4.0, 5.0]  # newest first
+    assert lanes.pop() == (None, 0)  # bucket empty
+
+    clock.now += 1.0
+    (_, second), _ = lanes.pop()
+    assert [r["timestamp"] for r in second] == [2.0, 3.0]
+
+
+# TC-DLV-004: TTL drops or demotes expired records; live records age into backlog
+@pytest.mark.parametrize("action, lane_records", [("drop", 0), ("backfill", 1)])
+def test_ttl_actions(action, lane_records):
+    clock = FakeClock(1000.0)
+    lanes = delivery.DeliveryLanes(
+        fresh_s=60, ttl_s=600, ttl_action=action, clock=clock
+    )
+    lanes.add(_recs(100.0, 990.0))
+
+    snap = lanes.snapshot()
+    assert snap["backfill_records"] == lane_records
+    assert snap["expired_dropped"] == 1 - lane_records
+    assert snap["live_records"] == 1
+
+    clock.now = 1100.0  # the live record is now 110s old
+    assert lanes.pop() == (("backlog", _recs(990.0)), 0)
+
+
+# TC-DLV-005: records that expire while held are reported by pop()
+def test_pop_reports_records_expired_while_held():
+    clock = FakeClock(1000.0)
+    lanes = delivery.DeliveryLanes(fresh_s=60, ttl_s=600, clock=clock)
+    lanes.add(_recs(990.0))  # live
+    lanes.add(_recs(500.0, 550.0))  # backlog
+
+    clock.now = 1200.0  # live record now 210s old; backlog records past the TTL
+    assert lanes.pop() == (("backlog", _recs(990.0)), 2)
+    assert lanes.pop() == (None, 0)
+    assert lanes.snapshot()["expired_dropped"] == 2
@@ -0,0 +1,63 @@
+# endpoint/tests/test_fleet_load.py
+"""
+Automated black-box tests for fleet_load.py (Fleet, hist_quantile).
+
+Each test references a Test Case ID (TC-FLEET-###) for traceability in the
+test report and traceability matrix.
+"""
+
+import sys
+from pathlib import Path
+
+# --- Ensure endpoint directory (where fleet_load.py lives) is on sys.path ---
+ENDPOINT_DIR = Path(__file__).resolve().parents[1]
+if str(ENDPOINT_DIR) not in sys.path:
+    sys.path.insert(0, str(ENDPOINT_DIR))
+
+import fleet_load  # noqa: E402
+from ingest_server import IngestServer  # noqa: E402
+
+
+# TC-FLEET-001: quantiles interpolate inside cumulative buckets
+def test_hist_quantile_interpolates():
+    buckets = {"0.01": 0, "0.05": 50, "0.1": 100, "+Inf": 100}
+    assert fleet_load.hist_quantile(buckets, 0.5) == 0.05
+    assert abs(fleet_load.hist_quantile(buckets, 0.25) - 0.03) < 1e-9
+    assert abs(fleet_load.hist_quantile(buckets, 0.75) - 0.075) < 1e-9
+    assert fleet_load.hist_quantile({"0.1": 0, "+Inf": 0}, 0.5) is None
+
+
+# TC-FLEET-002: every endpoint ships under its own id; rows and summary add up
+def test_fleet_against_stand_in():
+    srv = IngestServer(api_key="k").start()
+    try:
+        fleet = fleet_load.Fleet(
+            srv.url,
+            "k",
+            endpoints=3,
+            rate=200,
+            devices=20,
+            heartbeat_s=60,
+            shipper_options={"flush_ms": 200},
+            server_stats=srv.stats,
+        )
+        fleet.start()
+        rows = fleet.run(duration_s=1.0, report_s=0.5)
+        fleet.close(drain_s=10)
+        summary = fleet.summary()
+    finally:
+        srv.stop()
+
+    assert len(rows) == 2
+    assert {"records_per_s", "post_error_rate", "latency_ms"} <= set(rows[0])
+    assert summary["records_parsed"] > 0
+    assert summary["records_sent"] == summary["records_parsed"]
+    assert summary["posts_failed"] == 0
+    assert summary["heartbeats_ok"] == 3
+    assert summary["latency_ms"]["p50"] is not None
+
+    stats = srv.stats()
+    assert stats["records_accepted"] == summary["records_sent"]
+    assert stats["endpoints"] == 3
+    ids = {row["endpoint_id"] for row in srv.rows}
+    assert ids == {"loadgen-0000", "loadgen-0001", "loadgen-0002"}
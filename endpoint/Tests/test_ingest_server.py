@@ -0,0 +1,150 @@
+# endpoint/tests/test_ingest_server.py
+"""
+Automated black-box tests for ingest_server.py (IngestServer stand-in).
+
+Each test references a Test Case ID (TC-ING-###) for traceability in the
+test report and traceability matrix.
+"""
+
+import json
+import sys
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+# --- Ensure endpoint directory (where ingest_server.py lives) is on sys.path ---
+ENDPOINT_DIR = Path(__file__).resolve().parents[1]
+if str(ENDPOINT_DIR) not in sys.path:
+    sys.path.insert(0, str(ENDPOINT_DIR))
+
+import ingest_server  # noqa: E402
+from ingest_server import IngestServer  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    srv = IngestServer(api_key="k").start()
+    yield srv
+    srv.stop()
+
+
+def _post(url, payload, headers=None):
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers=dict({"Content-Type": "application/json"}, **(headers or {})),
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return resp.status, dict(resp.headers), json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), json.loads(e.read())
+
+
+def _scan(**over):
+    rec = {
+        "endpoint_id": "ep1",
+        "mac": "AA-BB-CC-DD-EE-FF",
+        "rssi": -40,
+        "timestamp": "2025-09-18T04:37:43Z",
+    }
+    rec.update(over)
+    return rec
+
+
+# TC-ING-001: per-scan validation uses the server's rules and wording
+def test_validate_scan_mirrors_route():
+    errors, row = ingest_server.validate_scan(_scan(), 0)
+    assert errors == [] and row == {
+        "endpoint_id": "ep1",
+        "mac": "aa:bb:cc:dd:ee:ff",
+        "rssi": -40,
+    }
+
+    # Number.isInteger accepts -40.0; epoch numbers are valid Date inputs
+    assert (
+        ingest_server.validate_scan(_scan(rssi=-40.0, timestamp=1758170263.4), 0)[0]
+        == []
+    )
+
+    errors, row = ingest_server.validate_scan(
+        _scan(endpoint_id="", mac="aa:bb", rssi=-40.5, timestamp="yesterday"), 3
+    )
+    assert row is None
+    assert errors == [
+        "Scan 3: endpoint_id is required and must be a string",
+        "Scan 3: invalid MAC address format (expected xx:xx:xx:xx:xx:xx)",
+        "Scan 3: rssi must be an integer between -100 and 0",
+        "Scan 3: invalid timestamp format",
+    ]
+    errors, _ = ingest_server.validate_scan(None, 0)
+    assert "Scan 0: rssi is required" in errors
+    assert "Scan 0: timestamp is required" in errors
+
+
+# TC-ING-002: auth, 201 / 207 / 400 responses and throughput counters
+def test_scan_data_status_codes(server):
+    url = server.url + ingest_server.SCAN_PATH
+    status, _, body = _post(url, {"records": [_scan()]})
+    assert status == 401 and body == {"success": False, "error": "Unauthorized"}
+
+    status, _, body = _post(url, {"records": [_scan()]}, {"x-api-key": "k"})
+    assert status == 201 and body["message"] == "Successfully stored 1 scan(s)"
+
+    status, _, body = _post(
+        url, [_scan(), _scan(rssi=5)], {"Authorization": "ApiKey k"}
+    )
+    assert status == 207 and body["rejected"] == 1
+    assert body["rejected_details"][0]["index"] == 1
+
+    status, _, body = _post(url, _scan(mac=None), {"x-api-key": "k"})
+    assert status == 400 and body["error"] == "Validation failed"
+
+    stats = server.stats()
+    assert stats["requests"] == 4
+    assert stats["records_accepted"] == 2 and stats["records_rejected"] == 2
+    assert stats["by_status"] == {"201": 1, "207": 1, "400": 1, "401": 1}
+
+
+# TC-ING-003: status heartbeats are validated and listed
+def test_status_route(server):
+    url = server.url + ingest_server.STATUS_PATH
+    hdr = {"x-api-key": "k"}
+    assert _post(url, {"status": "online"}, hdr)[0] == 400
+    status, _, body = _post(url, {"endpoint_id": "ep1", "status": "busy"}, hdr)
+    assert status == 400
+    assert body["error"] == "status must be one of: online, offline, error"
+    status, _, body = _post(url, {"endpoint_id": "ep1"}, hdr)
+    assert status == 200 and body["endpoint_status"]["status"] == "online"
+
+    with urllib.request.urlopen(url + "?endpoint_id=ep1", timeout=5) as resp:
+        got = json.loads(resp.read())
+    assert got["endpoint_status"]["computed_status"] == "online"
+    assert server.stats()["heartbeats"] == 1
+
+
+# TC-ING-004: injected 429 carries Retry-After; oversized bodies get 413
+def test_fault_injection():
+    srv = IngestServer(api_key="k", rate_429=1.0, retry_after_s=7).start()
+    try:
+        status, headers, _ = _post(
+            srv.url + ingest_server.SCAN_PATH, [_scan()], {"x-api-key": "k"}
+        )
+        assert status == 429 and headers["Retry-After"] == "7"
+    finally:
+        srv.stop()
+
+    srv = IngestServer(api_key="k", max_body_bytes=300).start()
+    try:
+        url = srv.url + ingest_server.SCAN_PATH
+        assert _post(url, [_scan()], {"x-api-key": "k"})[0] == 201
+        assert _post(url, [_scan()] * 5, {"x-api-key": "k"})[0] == 413
+        assert srv.stats()["injected"] == {"413": 1}
+    finally:
+        srv.stop()
+
+    with pytest.raises(ValueError):
+        IngestServer(api_key="k", error_rate=1.5)
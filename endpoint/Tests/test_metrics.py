@@ -0,0 +1,84 @@
+# endpoint/tests/test_metrics.py
+"""
+Automated black-box tests for metrics.py.
+
+Each test references a Test Case ID (TC-MET-###) for traceability in the
+test report and traceability matrix.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# --- Ensure endpoint directory (where metrics.py lives) is on sys.path ---
+ENDPOINT_DIR = Path(__file__).resolve().parents[1]
+if str(ENDPOINT_DIR) not in sys.path:
+    sys.path.insert(0, str(ENDPOINT_DIR))
+
+import metrics  # noqa: E402
+
+
+# TC-MET-001: Histogram buckets are cumulative and include +Inf
+def test_histogram_cumulative_buckets():
+    h = metrics.Histogram([10, 100])
+    for v in (5, 10, 50, 500):
+        h.observe(v)
+
+    snap = h.snapshot()
+    assert snap["count"] == 4
+    assert snap["sum"] == 565
+    assert snap["buckets"] == {"10": 2, "100": 3, "+Inf": 4}
+
+
+# TC-MET-002: Histogram rejects unsorted or empty bounds
+@pytest.mark.parametrize("bounds", [[], [10, 5]])
+def test_histogram_invalid_bounds(bounds):
+    with pytest.raises(ValueError):
+        metrics.Histogram(bounds)
+
+
+# TC-MET-003: registry renders counters, collectors and histograms as Prometheus text
+def test_registry_prometheus_rendering():
+    reg = metrics.MetricsRegistry(prefix="ep")
+    c = reg.counter("lines_total", "Lines read")
+    c.inc(3)
+    h = reg.histogram("latency_seconds", "POST latency", [0.1, 1.0])
+    h.observe(0.05)
+    reg.register_collector(
+        lambda: [
+            ('frames_total{type="beacon"}', "counter", "Frames by type", 7),
+            ('frames_total{type="data"}', "counter", "Frames by type", 2),
+        ]
+    )
+
+    text = reg.render_prometheus()
+    assert "# TYPE ep_lines_total counter\nep_lines_total 3" in text
+    assert 'ep_latency_seconds_bucket{le="0.1"} 1' in text
+    assert "ep_latency_seconds_count 1" in text
+    assert text.count("# TYPE ep_frames_total counter") == 1
+    assert 'ep_frames_total{type="data"} 2' in text
+
+
+# TC-MET-004: HTTP server and JSON snapshot writer expose the same registry
+def test_http_server_and_json_writer(tmp_path):
+    import json
+    from urllib.request import urlopen
+
+    reg = metrics.MetricsRegistry()
+    reg.gauge("queue_depth", "Pending").set(5)
+
+    server = metrics.start_http_server(reg, port=0)
+    try:
+        port = server.server_address[1]
+        body = urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read()
+        assert b"wifi_endpoint_queue_depth 5" in body
+        snap = json.loads(urlopen(f"http://127.0.0.1:{port}/metrics.json").read())
+        assert snap["wifi_endpoint_queue_depth"] == 5
+    finally:
+        server.shutdown()
+
+    path = tmp_path / "metrics.json"
+    writer = metrics.JsonSnapshotWriter(reg, str(path), interval_s=60)
+    writer.close()
+    assert json.loads(path.read_text())["wifi_endpoint_queue_depth"] == 5
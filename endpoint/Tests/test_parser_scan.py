@@ -86,7 +86,7 @@ class DummyAggregator:
     parser_scan main() flow.
     """
 
-    def __init__(self, window_s: float, emit_cb):
+    def __init__(self, window_s: float, emit_cb, aligned: bool = False):
         self.window_s = window_s
         self.emit_cb = emit_cb
         self._samples: List[Dict[str, object]] = []
@@ -184,3 +184,55 @@ def test_main_emit_raw_outputs_raw_and_aggregated(monkeypatch, capsys):
     assert agg_obj["mac"] == "11:22:33:44:55:66"
     assert agg_obj["rssi"] == -65
     assert agg_obj["timestamp"] == pytest.approx(1700000002.5)
+
+
+RTS_LINE = (
+    "1758170263.458731 3768807us tsft 1.0 Mb/s 2412 MHz 11b -48dBm signal -48dBm "
+    "signal antenna 0 0dBm signal antenna 1 3284us RA:34:7e:5c:7b:b8:d2 "
+    "TA:54:07:7d:7b:ec:9c Request-To-Send\n"
+)
+BEACON_LINE = (
+    "1758170263.440596 3750674us tsft 1.0 Mb/s 2412 MHz 11b -46dBm signal -46dBm "
+    "signal antenna 0 0dBm signal antenna 1 0us BSSID:4a:d9:e7:b3:73:16 "
+    "DA:ff:ff:ff:ff:ff:ff SA:4a:d9:e7:b3:73:16 Beacon (Data Probe Request) "
+    "[1.0* 2.0* 5.5* 11.0* Mbit] ESS CH: 1, PRIVACY\n"
+)
+ACK_LINE = (
+    "1758170263.459000 3769000us tsft 1.0 Mb/s 2412 MHz 11b -52dBm signal -52dBm "
+    "signal antenna 0 0dBm signal antenna 1 Acknowledgment RA:34:7e:5c:7b:b8:d2 \n"
+)
+
+
+# TC-PS-007: classify_frame uses the first frame-type token (not SSID text)
+def test_classify_frame_types():
+    assert parser_scan.classify_frame(RTS_LINE) == "rts"
+    assert parser_scan.classify_frame(BEACON_LINE) == "beacon"
+    assert parser_scan.classify_frame(ACK_LINE) == "ack"
+    assert parser_scan.classify_frame("tcpdump: listening on wlan1\n") == "other"
+
+    rec = parser_scan.parse_line(BEACON_LINE)
+    assert rec["frame_type"] == "beacon"
+    assert rec["mac"] == "4a:d9:e7:b3:73:16"
+
+
+# TC-PS-008: FrameFilter drops excluded types before parsing and counts per type
+def test_frame_filter_include_exclude():
+    frames = parser_scan.FrameFilter(exclude={"beacon"})
+    assert frames.parse(BEACON_LINE) is None
+    assert frames.parse(RTS_LINE)["frame_type"] == "rts"
+    assert frames.parse(ACK_LINE) is None  # allowed, but has no TA/SA
+    assert frames.snapshot() == {
+        "seen": {"beacon": 1, "rts": 1, "ack": 1},
+        "dropped": {"beacon": 1},
+    }
+
+    only_beacons = parser_scan.FrameFilter(include={"beacon"})
+    assert only_beacons.parse(RTS_LINE) is None
+    assert only_beacons.parse(BEACON_LINE) is not None
+
+    assert parser_scan.parse_frame_types(" Beacon, rts ") == {"beacon", "rts"}
+    assert parser_scan.parse_frame_types("") is None
+    with pytest.raises(ValueError):
+        parser_scan.parse_frame_types("beacons")
+    with pytest.raises(ValueError):
+        parser_scan.FrameFilter(include={"nope"})
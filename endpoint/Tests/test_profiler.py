@@ -0,0 +1,57 @@
+# endpoint/tests/test_profiler.py
+"""
+Automated black-box tests for profiler.py (StageProfiler).
+
+Each test references a Test Case ID (TC-PROF-###) for traceability in the
+test report and traceability matrix.
+"""
+
+import sys
+from pathlib import Path
+
+# --- Ensure endpoint directory (where profiler.py lives) is on sys.path ---
+ENDPOINT_DIR = Path(__file__).resolve().parents[1]
+if str(ENDPOINT_DIR) not in sys.path:
+    sys.path.insert(0, str(ENDPOINT_DIR))
+
+import profiler  # noqa: E402
+
+
+# TC-PROF-001: only one call in sample_every gets a timing token
+def test_start_is_sampled():
+    prof = profiler.StageProfiler(sample_every=10)
+    tokens = [prof.start() for _ in range(100)]
+    assert sum(t is not None for t in tokens) == 10
+    assert prof.begin() is not None
+
+
+# TC-PROF-002: iterate() yields every item and times the read stage on samples
+def test_iterate_and_laps():
+    prof = profiler.StageProfiler(sample_every=4)
+    seen = []
+    for item in prof.iterate("read", range(40)):
+        t = prof.start()
+        seen.append(item)
+        if t:
+            t = prof.lap("parse", t)
+            prof.lap("ship_add", t)
+
+    assert seen == list(range(40))
+    snap = prof.snapshot()
+    assert list(snap) == ["read", "parse", "ship_add"]
+    assert snap["read"]["wall"]["count"] == 10
+    assert snap["parse"]["cpu"]["count"] == 10
+    assert snap["parse"]["scale"] == 4
+
+
+# TC-PROF-003: report lists stages, scales totals and includes the cProfile window
+def test_report_with_cprofile():
+    prof = profiler.StageProfiler(sample_every=1, cprofile_s=60)
+    t = prof.begin()
+    sum(range(1000))
+    prof.lap("send", t)
+    prof.stop_cprofile()
+
+    text = prof.report()
+    assert "send" in text and "est_total" in text
+    assert "cProfile (main thread, cumulative)" in text
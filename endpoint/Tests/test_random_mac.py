@@ -0,0 +1,77 @@
+# endpoint/tests/test_random_mac.py
+"""
+Automated black-box tests for random_mac.py (is_randomized, RandomMacCollapser).
+
+Each test references a Test Case ID (TC-RND-###) for traceability in the
+test report and traceability matrix.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# --- Ensure endpoint directory (where random_mac.py lives) is on sys.path ---
+ENDPOINT_DIR = Path(__file__).resolve().parents[1]
+if str(ENDPOINT_DIR) not in sys.path:
+    sys.path.insert(0, str(ENDPOINT_DIR))
+
+from random_mac import RandomMacCollapser, is_randomized  # noqa: E402
+
+GLOBAL = "54:07:7d:7b:ec:9c"
+
+
+def _rec(mac, ts, rssi=-50):
+    return {"mac": mac, "rssi": rssi, "timestamp": ts}
+
+
+# TC-RND-001: the locally administered bit decides; unique MACs pass untouched
+def test_is_randomized_and_passthrough():
+    assert is_randomized("da:a1:19:00:00:01")
+    assert is_randomized("02:00:00:00:00:00")
+    assert not is_randomized(GLOBAL)
+    assert not is_randomized("f8:1a:67:00:00:00")
+
+    drop = RandomMacCollapser("drop")
+    rec = _rec(GLOBAL, 1.0)
+    assert drop.route(rec) is rec
+    assert drop.route(_rec("da:a1:19:00:00:01", 1.0)) is None
+    assert drop.stats() == {
+        "mode": "drop",
+        "passed": 1,
+        "collapsed": 1,
+        "summaries": 0,
+        "last_window": None,
+    }
+
+
+# TC-RND-002: summary mode emits one epoch-aligned window summary, never a device record
+def test_summary_windows():
+    out = []
+    rand = RandomMacCollapser("summary", window_s=10, emit=out.append)
+    for i, rssi in enumerate([-95, -81, -72, -70, -40]):
+        assert rand.route(_rec(f"da:00:00:00:00:0{i % 3}", 100.0 + i, rssi)) is None
+    assert out == []
+    rand.route(_rec("da:00:00:00:00:09", 111.0, -60))  # next window closes the first
+    assert len(out) == 1
+    s = out[0]
+    assert "mac" not in s and "rssi" not in s
+    assert (s["count"], s["unique_macs"], s["rssi_median"]) == (5, 3, -72)
+    assert s["rssi_hist"] == {"-100": 1, "-90": 1, "-80": 1, "-70": 1, "-40": 1}
+    assert s["window_start"] == 100.0 and s["last_seen"] == 104.0
+    assert rand.last_window is s
+    samples = {name: v for name, _, _, v in rand.samples()}
+    assert samples["random_mac_window_unique_macs"] == 3
+    assert samples['random_mac_window_rssi{quantile="0.5"}'] == -72
+    assert samples['random_mac_window_rssi_bucket{dbm="-100"}'] == 1
+
+    rand.route(_rec("da:00:00:00:00:09", 105.0, -65))  # late: joins the open window
+    assert rand.flush()["count"] == 2
+    assert rand.flush() is None
+
+    # Without a callback the windows are still summarized (metrics only)
+    quiet = RandomMacCollapser("summary", window_s=10)
+    quiet.route(_rec("da:00:00:00:00:01", 100.0))
+    assert quiet.flush()["count"] == 1 and quiet.last_window["count"] == 1
+    with pytest.raises(ValueError):
+        RandomMacCollapser("summary", window_s=0)
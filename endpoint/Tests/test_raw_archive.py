@@ -0,0 +1,82 @@
+# endpoint/tests/test_raw_archive.py
+"""
+Automated black-box tests for raw_archive.py (RawArchiver).
+
+Each test references a Test Case ID (TC-RAW-###) for traceability in the
+test report and traceability matrix.
+"""
+
+import gzip
+import sys
+from pathlib import Path
+
+# --- Ensure endpoint directory (where raw_archive.py lives) is on sys.path ---
+ENDPOINT_DIR = Path(__file__).resolve().parents[1]
+if str(ENDPOINT_DIR) not in sys.path:
+    sys.path.insert(0, str(ENDPOINT_DIR))
+
+import raw_archive  # noqa: E402
+
+LINES = [f"1700000000.{i:06d} line {i} \xb5s\n".encode("latin-1") for i in range(20)]
+
+
+# TC-RAW-001: raw bytes round-trip through the gzip stream unchanged
+def test_gzip_roundtrip_raw_bytes(tmp_path):
+    path = tmp_path / "capture.log.gz"
+    arch = raw_archive.RawArchiver(str(path))
+    for line in LINES:
+        arch.write(line)
+    arch.close()
+
+    assert gzip.decompress(path.read_bytes()) == b"".join(LINES)
+    assert arch.lines_kept == 20
+
+
+# TC-RAW-002: sampling keeps 1 in N lines; failed_only keeps unparsed lines only
+def test_sampling_policies(tmp_path):
+    every = raw_archive.RawArchiver(
+        str(tmp_path / "a.log"), sample_every=5, compress=False
+    )
+    for line in LINES:
+        every.write(line)
+    every.close()
+    assert (tmp_path / "a.log").read_bytes() == b"".join(LINES[::5])
+
+    failed = raw_archive.RawArchiver(
+        str(tmp_path / "b.log"), failed_only=True, compress=False
+    )
+    for i, line in enumerate(LINES):
+        failed.write(line, parsed=i % 2 == 0)
+    failed.close()
+    assert (tmp_path / "b.log").read_bytes() == b"".join(LINES[1::2])
+    assert failed.stats()["lines_in"] == 20
+
+
+# TC-RAW-003: size rotation produces valid .gz segments and honours the retention cap
+def test_rotation_and_retention(tmp_path):
+    path = tmp_path / "capture.log.gz"
+    arch = raw_archive.RawArchiver(
+        str(path), flush_bytes=1, rotate_bytes=60, compress=True
+    )
+    for line in LINES:
+        arch.write(line)
+    arch.close()
+
+    segments = sorted(p for p in tmp_path.glob("capture.log.*.gz"))
+    assert arch.rotations >= 2 and len(segments) == arch.rotations
+    data = b"".join(gzip.decompress(p.read_bytes()) for p in segments)
+    data += gzip.decompress(path.read_bytes()) if path.stat().st_size else b""
+    assert sorted(data.splitlines(keepends=True)) == sorted(LINES)
+
+    capped_dir = tmp_path / "capped"
+    capped = raw_archive.RawArchiver(
+        str(capped_dir / "c.log"),
+        compress=False,
+        flush_bytes=1,
+        rotate_bytes=100,
+        max_total_bytes=300,
+    )
+    for line in LINES * 3:
+        capped.write(line)
+    capped.close()
+    assert sum(p.stat().st_size for p in capped_dir.iterdir()) <= 300 + 100
@@ -0,0 +1,93 @@
+# endpoint/tests/test_replay.py
+"""
+Automated black-box tests for replay.py (ReplaySource).
+
+Each test references a Test Case ID (TC-RPL-###) for traceability in the
+test report and traceability matrix.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# --- Ensure endpoint directory (where replay.py lives) is on sys.path ---
+ENDPOINT_DIR = Path(__file__).resolve().parents[1]
+if str(ENDPOINT_DIR) not in sys.path:
+    sys.path.insert(0, str(ENDPOINT_DIR))
+
+import replay  # noqa: E402
+
+CAPTURE = (
+    b"tcpdump: listening on wlan1\n"
+    b"1000.000000 -40dBm signal TA:aa:bb:cc:dd:ee:01\n"
+    b"1001.000000 -41dBm signal TA:aa:bb:cc:dd:ee:02\n"
+    b"1003.000000 -42dBm signal TA:aa:bb:cc:dd:ee:03\n"
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, s):
+        self.sleeps.append(s)
+        self.now += s
+
+
+# TC-RPL-001: lines are paced by capture time divided by the speed factor
+def test_paces_by_speed(tmp_path):
+    p = tmp_path / "cap.txt"
+    p.write_bytes(CAPTURE)
+    fake = FakeClock()
+    src = replay.ReplaySource(str(p), speed=2.0, clock=fake.clock, sleep=fake.sleep)
+
+    emitted = []
+    for line in src:
+        emitted.append((fake.now, line))
+
+    assert [round(t, 3) for t, _ in emitted] == [0.0, 0.0, 0.5, 1.5]
+    assert emitted[1][1] == CAPTURE.splitlines(True)[1]  # unchanged without loops
+    stats = src.stats()
+    assert stats["target_rate"] == round(4 / (3.0 / 2.0), 1)
+    assert stats["lag_s"] == 0.0
+
+
+# TC-RPL-002: looping shifts timestamps forward by span + mean gap, digits preserved
+def test_loop_shifts_timestamps(tmp_path):
+    p = tmp_path / "cap.txt"
+    p.write_bytes(CAPTURE)
+    src = replay.ReplaySource(str(p), speed=None, loops=3)
+
+    lines = list(src)
+    stamps = [ln.split()[0] for ln in lines if ln[:1].isdigit()]
+    assert stamps[:3] == [b"1000.000000", b"1001.000000", b"1003.000000"]
+    assert stamps[3:6] == [b"1004.500000", b"1005.500000", b"1007.500000"]
+    assert stamps[6] == b"1009.000000"
+    assert src.stats()["loops_done"] == 3 and len(lines) == 12
+
+
+# TC-RPL-003: rebase moves the first timestamp to now; clock stamps wrap past midnight
+def test_rebase_and_clock_format(tmp_path):
+    p = tmp_path / "cap.txt"
+    p.write_bytes(CAPTURE)
+    before = time.time()
+    first = next(
+        ln
+        for ln in replay.ReplaySource(str(p), speed=None, rebase=True)
+        if ln[:1].isdigit()
+    )
+    assert abs(float(first.split()[0]) - before) < 5
+
+    q = tmp_path / "clock.txt"
+    q.write_bytes(b"23:59:59.500000 a\n00:00:00.500000 b\n")
+    out = list(replay.ReplaySource(str(q), speed=None, loops=2))
+    assert [ln.split()[0] for ln in out] == [
+        b"23:59:59.500000",
+        b"00:00:00.500000",
+        b"00:00:01.500000",
+        b"00:00:02.500000",
+    ]
@@ -0,0 +1,92 @@
+# endpoint/tests/test_sanitize.py
+"""
+Automated black-box tests for sanitize.py (RecordSanitizer, check_record).
+
+Each test references a Test Case ID (TC-SAN-###) for traceability in the
+test report and traceability matrix.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# --- Ensure endpoint directory (where sanitize.py lives) is on sys.path ---
+ENDPOINT_DIR = Path(__file__).resolve().parents[1]
+if str(ENDPOINT_DIR) not in sys.path:
+    sys.path.insert(0, str(ENDPOINT_DIR))
+
+from ingest_server import validate_scan  # noqa: E402
+from sanitize import RecordSanitizer, check_record  # noqa: E402
+
+
+def _rec(**over):
+    rec = {"mac": "aa:bb:cc:dd:ee:ff", "rssi": -40, "timestamp": 1758170263.44}
+    rec.update(over)
+    return rec
+
+
+# TC-SAN-001: each server rule maps to one reject reason, in the server's order
+def test_check_record_reasons():
+    assert check_record(_rec()) is None
+    assert check_record(_rec(rssi=-40.0, timestamp="2025-09-18T04:37:43Z")) is None
+    assert check_record(_rec(mac="aa:bb:cc:dd:ee")) == "mac"
+    assert check_record(_rec(mac="AA:BB:CC:DD:EE:FF")) == "mac"
+    assert check_record(_rec(rssi=True)) == "rssi_type"
+    assert check_record(_rec(rssi=-40.5)) == "rssi_type"
+    assert check_record(_rec(rssi=-111)) == "rssi_range"
+    assert check_record(_rec(rssi=3)) == "rssi_range"
+    assert check_record(_rec(timestamp=0)) == "timestamp"
+    assert check_record(_rec(timestamp="yesterday")) == "timestamp"
+    assert check_record(_rec(timestamp=float("nan"))) == "timestamp"
+
+
+# TC-SAN-002: records that pass are exactly those the stand-in server accepts
+@pytest.mark.parametrize(
+    "over",
+    [
+        {},
+        {"rssi": -100},
+        {"rssi": 0},
+        {"rssi": -101},
+        {"rssi": 1},
+        {"rssi": -40.5},
+        {"rssi": "-40"},
+        {"mac": "aa:bb:cc:dd:ee:fg"},
+        {"timestamp": "not a date"},
+        {"timestamp": 0},
+    ],
+)
+def test_matches_server_validation(over):
+    rec = dict(_rec(**over), endpoint_id="ep1")
+    server_ok = validate_scan(rec, 0)[0] == []
+    assert (check_record(rec) is None) == server_ok
+
+
+# TC-SAN-003: drop counts reasons; clamp pins RSSI into range and rounds fractions
+def test_sanitizer_modes():
+    drop = RecordSanitizer("drop")
+    assert drop.apply(_rec()) == _rec()
+    assert drop.apply(_rec(rssi=-111)) is None
+    assert drop.apply(_rec(mac="nope")) is None
+    assert drop.apply(None) is None
+    assert drop.snapshot() == {
+        "checked": 3,
+        "rejected": {"rssi_range": 1, "mac": 1},
+        "clamped": {},
+    }
+    assert drop.summary() == "mac=1 rssi_range=1"
+
+    clamp = RecordSanitizer("clamp")
+    assert clamp.apply(_rec(rssi=-112))["rssi"] == -100
+    assert clamp.apply(_rec(rssi=4))["rssi"] == 0
+    assert clamp.apply(_rec(rssi=-40.6))["rssi"] == -41
+    assert clamp.apply(_rec(rssi=-120, timestamp=0)) is None
+    assert clamp.apply(_rec(rssi="x")) is None
+    assert clamp.rejected == {"timestamp": 1, "rssi_type": 1}
+    assert clamp.clamped == {"rssi_range": 2, "rssi_type": 1}
+    names = [s[0] for s in clamp.samples()]
+    assert 'records_clamped_total{reason="rssi_range"}' in names
+
+    with pytest.raises(ValueError):
+        RecordSanitizer("off")
@@ -256,3 +256,330 @@ def test_post_records_no_retry_on_400(monkeypatch):
 
     # Should only have tried once
     assert calls["count"] == 1
+
+
+# TC-SHIP-008: adaptive mode grows on success and shrinks on 429; stats expose values
+def test_adaptive_batching_reacts_to_success_and_429(monkeypatch):
+    class DummyHTTPError(shipper.error.HTTPError):
+        def __init__(self, code):
+            super().__init__(
+                url="http://example.com/api/wifi",
+                code=code,
+                msg="Too many requests",
+                hdrs={"Retry-After": "2"},
+                fp=None,
+            )
+
+    responses = ["ok", "ok", 429, "ok"]
+    sleeps: List[float] = []
+
+    def fake_urlopen(req, timeout):
+        r = responses.pop(0)
+        if r == "ok":
+            return DummyResponse(status=201)
+        raise DummyHTTPError(r)
+
+    monkeypatch.setattr(shipper.request, "urlopen", fake_urlopen)
+    monkeypatch.setattr(shipper.time, "sleep", lambda s: sleeps.append(s))
+
+    s = shipper.Shipper(
+        server_url="http://example.com/api/wifi",
+        api_key="abc",
+        batch_size=100,
+        flush_ms=1000,
+        adaptive=True,
+        max_data_age_ms=60_000,
+    )
+    records = [{"mac": "aa:bb:cc:dd:ee:ff", "rssi": -42, "timestamp": 100.0}]
+
+    s._post_records(records)
+    s._post_records(records)
+    assert s.batch_size == 120
+    assert s.flush_ms == 1200
+
+    s._post_records(records)  # 429 (Retry-After: 2), then ok
+    s.close()
+
+    stats = s.stats()
+    assert stats["adaptive"] is True
+    assert stats["posts_ok"] == 3
+    assert stats["retries"] == 1
+    # 120 halved to 60 on the 429, then +10 on the successful retry
+    assert stats["batch_size"] == 70
+    # Retry-After (2s) wins over the initial 0.5s backoff
+    assert sleeps == [2.0]
+
+
+# TC-SHIP-009: non-adaptive stats count dropped batches
+def test_stats_count_dropped_batches(monkeypatch):
+    def fake_urlopen(req, timeout):
+        raise shipper.error.URLError("connection refused")
+
+    monkeypatch.setattr(shipper.request, "urlopen", fake_urlopen)
+    monkeypatch.setattr(shipper.time, "sleep", lambda *_: None)
+
+    s = shipper.Shipper(
+        server_url="http://example.com/api/wifi",
+        api_key="abc",
+        max_retries=2,
+        flush_ms=10,
+    )
+    s._post_records([{"mac": "aa:bb:cc:dd:ee:ff", "rssi": -42, "timestamp": 1.0}])
+    s.close()
+
+    stats = s.stats()
+    assert stats["adaptive"] is False
+    assert stats["batches_dropped"] == 1
+    assert stats["records_dropped"] == 1
+    assert stats["posts_failed"] == 2
+
+
+# TC-SHIP-010: coalescing runs before upload and reports the reduction ratio
+def test_coalescing_before_upload(monkeypatch):
+    sent: List[Dict[str, Any]] = []
+
+    def fake_urlopen(req, timeout):
+        sent.append(json.loads(req.data.decode("utf-8")))
+        return DummyResponse(status=201)
+
+    monkeypatch.setattr(shipper.request, "urlopen", fake_urlopen)
+
+    s = shipper.Shipper(
+        server_url="http://example.com/api/wifi",
+        api_key="abc",
+        flush_ms=60_000,
+        coalesce="max",
+    )
+    for rssi in (-70, -50, -60, -50):
+        s.add({"mac": "aa:bb:cc:dd:ee:ff", "rssi": rssi, "timestamp": 100.25})
+    s.close()
+
+    assert len(sent) == 1
+    assert [r["rssi"] for r in sent[0]["records"]] == [-50]
+    stats = s.stats()
+    assert stats["coalesce_in"] == 4
+    assert stats["coalesce_out"] == 1
+    assert stats["coalesce_ratio"] == pytest.approx(0.75)
+
+
+# TC-SHIP-011: open breaker parks batches instead of retrying; probe drains them
+def test_circuit_breaker_parks_then_drains(monkeypatch):
+    state = {"up": False, "calls": 0, "sent": 0}
+
+    def fake_urlopen(req, timeout):
+        state["calls"] += 1
+        if not state["up"]:
+            raise shipper.error.URLError("connection refused")
+        state["sent"] += len(json.loads(req.data.decode("utf-8"))["records"])
+        return DummyResponse(status=201)
+
+    monkeypatch.setattr(shipper.request, "urlopen", fake_urlopen)
+    monkeypatch.setattr(shipper.time, "sleep", lambda *_: None)
+
+    s = shipper.Shipper(
+        server_url="http://example.com/api/wifi",
+        api_key="abc",
+        max_retries=5,
+        flush_ms=60_000,
+        breaker_threshold=2,
+        breaker_cooldown_s=0.0,
+    )
+    s._running = False  # drive delivery manually
+    s._thread.join(timeout=1.0)
+
+    rec = {"mac": "aa:bb:cc:dd:ee:ff", "rssi": -42, "timestamp": 1.0}
+    s._deliver([rec])  # 2 attempts, then the breaker opens and the batch is parked
+    assert state["calls"] == 2
+    assert s.stats()["breaker_state"] == "open"
+
+    s._breaker.cooldown_s = 3600.0
+    s._deliver([rec, rec])  # refused without a POST
+    assert state["calls"] == 2
+    assert s.stats()["parked_records"] == 3
+
+    s._breaker.cooldown_s = 0.0
+    state["up"] = True
+    s._retry_parked()  # one probe, then drain the remainder
+
+    stats = s.stats()
+    assert stats["breaker_state"] == "closed"
+    assert stats["parked_records"] == 0
+    assert state["sent"] == 3
+    assert stats["breaker_transitions"]["half_open->closed"] == 1
+
+
+# TC-SHIP-012: after an outage fresh records go first and expired ones are dropped
+def test_freshness_order_after_outage(monkeypatch):
+    state = {"up": False}
+    sent: List[float] = []
+
+    def fake_urlopen(req, timeout):
+        if not state["up"]:
+            raise shipper.error.URLError("connection refused")
+        body = json.loads(req.data.decode("utf-8"))
+        sent.extend(r["timestamp"] for r in body["records"])
+        return DummyResponse(status=201)
+
+    monkeypatch.setattr(shipper.request, "urlopen", fake_urlopen)
+    monkeypatch.setattr(shipper.time, "sleep", lambda *_: None)
+
+    s = shipper.Shipper(
+        server_url="http://example.com/api/wifi",
+        api_key="abc",
+        flush_ms=60_000,
+        breaker_threshold=1,
+        breaker_cooldown_s=0.0,
+        fresh_s=300,
+        ttl_s=3600,
+    )
+    s._running = False  # drive delivery manually
+    s._thread.join(timeout=1.0)
+
+    now = shipper.time.time()
+
+    def rec(age):
+        return {"mac": "aa:bb:cc:dd:ee:ff", "rssi": -50, "timestamp": now - age}
+
+    s._deliver([rec(100)])  # fails -> breaker opens, parked as live
+    s._park([rec(1000)])  # backlog
+    s._park([rec(10)])  # newest live
+    s._park([rec(7200)])  # past TTL -> dropped
+
+    state["up"] = True
+    s._retry_parked()
+
+    ages = [round(now - ts) for ts in sent]
+    assert ages == [10, 100, 1000]
+    assert s.stats()["lanes"]["expired_dropped"] == 1
+    assert s.stats()["records_dropped"] == 1
+
+    # Held records that expire before they are served count as dropped too
+    state["up"] = False
+    s._deliver([rec(100)])  # parked as live
+    s._lanes._clock = lambda: now + 7200
+    state["up"] = True
+    s._retry_parked()
+    assert len(sent) == 3
+    assert s.stats()["records_dropped"] == 2
+
+
+# TC-SHIP-013: batches are cut by max_batch_bytes; histograms record the sizes
+def test_max_batch_bytes_cuts_batches(monkeypatch):
+    bodies: List[bytes] = []
+
+    def fake_urlopen(req, timeout):
+        bodies.append(req.data)
+        return DummyResponse(status=201)
+
+    monkeypatch.setattr(shipper.request, "urlopen", fake_urlopen)
+
+    s = shipper.Shipper(
+        server_url="http://example.com/api/wifi",
+        api_key="abc",
+        endpoint_id="ep-1",
+        flush_ms=60_000,
+        max_batch_bytes=600,
+    )
+    for i in range(20):
+        s.add({"mac": "aa:bb:cc:dd:ee:ff", "rssi": -50, "timestamp": 100.0 + i})
+    s.close()
+
+    assert len(bodies) > 1
+    assert all(len(b) <= 600 for b in bodies)
+    assert sum(len(json.loads(b)["records"]) for b in bodies) == 20
+    stats = s.stats()
+    assert stats["batch_records_hist"]["count"] == len(bodies)
+    assert stats["batch_bytes_hist"]["sum"] == sum(len(b) for b in bodies)
+
+
+# TC-SHIP-014: a 413 splits the batch in half and retries each half
+def test_413_binary_split(monkeypatch):
+    class DummyHTTPError(shipper.error.HTTPError):
+        def __init__(self, code):
+            super().__init__(
+                url="http://example.com/api/wifi",
+                code=code,
+                msg="Payload Too Large",
+                hdrs=None,
+                fp=None,
+            )
+
+    accepted: List[int] = []
+
+    def fake_urlopen(req, timeout):
+        n = len(json.loads(req.data.decode("utf-8"))["records"])
+        if n > 2:
+            raise DummyHTTPError(413)
+        accepted.append(n)
+        return DummyResponse(status=201)
+
+    monkeypatch.setattr(shipper.request, "urlopen", fake_urlopen)
+
+    s = shipper.Shipper(server_url="http://example.com/api/wifi", api_key="abc")
+    records = [
+        {"mac": "aa:bb:cc:dd:ee:ff", "rssi": -50, "timestamp": float(i)}
+        for i in range(7)
+    ]
+    assert s._post_records(records) is True
+    s.close()
+
+    assert sum(accepted) == 7
+    assert max(accepted) <= 2
+    stats = s.stats()
+    assert stats["splits_413"] == 3  # 7 -> 3+4, 3 -> 1+2, 4 -> 2+2
+    assert stats["records_dropped"] == 0
+
+
+# TC-SHIP-015: a connection reset while reading the response is retried, not fatal
+def test_connection_reset_is_retried(monkeypatch):
+    calls = []
+
+    def fake_urlopen(req, timeout):
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionResetError(104, "Connection reset by peer")
+        return DummyResponse(status=201)
+
+    monkeypatch.setattr(shipper.request, "urlopen", fake_urlopen)
+    monkeypatch.setattr(shipper.time, "sleep", lambda *_: None)
+
+    s = shipper.Shipper(server_url="http://example.com/api/wifi", api_key="abc")
+    assert s._post_records([{"mac": "aa:bb:cc:dd:ee:ff", "rssi": -50}]) is True
+    s.close()
+
+    stats = s.stats()
+    assert stats["retries"] == 1
+    assert stats["records_sent"] == 1
+
+
+# TC-SHIP-016: byte batching does not serialize every record a second time
+def test_max_batch_bytes_estimate_is_cheap(monkeypatch):
+    bodies: List[bytes] = []
+
+    def fake_urlopen(req, timeout):
+        bodies.append(req.data)
+        return DummyResponse(status=201)
+
+    monkeypatch.setattr(shipper.request, "urlopen", fake_urlopen)
+    measured: List[int] = []
+    real = shipper.Shipper._estimate_bytes
+
+    def counting(self, record):
+        measured.append(1)
+        return real(self, record)
+
+    monkeypatch.setattr(shipper.Shipper, "_estimate_bytes", counting)
+
+    s = shipper.Shipper(
+        server_url="http://example.com/api/wifi",
+        api_key="abc",
+        flush_ms=60_000,
+        batch_size=1000,
+        max_batch_bytes=512 * 1024,
+    )
+    for i in range(300):
+        s.add({"mac": "aa:bb:cc:dd:ee:ff", "rssi": -50, "timestamp": 100.0 + i})
+    s.close()
+
+    assert sum(len(json.loads(b)["records"]) for b in bodies) == 300
+    assert len(measured) == 1  # only the seed record
@@ -0,0 +1,70 @@
+# endpoint/tests/test_snapshot.py
+"""
+Automated black-box tests for snapshot.py (RssiSnapshot).
+
+Each test references a Test Case ID (TC-SNAP-###) for traceability in the
+test report and traceability matrix.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# --- Ensure endpoint directory (where snapshot.py lives) is on sys.path ---
+ENDPOINT_DIR = Path(__file__).resolve().parents[1]
+if str(ENDPOINT_DIR) not in sys.path:
+    sys.path.insert(0, str(ENDPOINT_DIR))
+
+from snapshot import RssiSnapshot  # noqa: E402
+
+MAC = "aa:bb:cc:dd:ee:ff"
+
+
+def _rec(rssi, ts, mac=MAC):
+    return {"mac": mac, "rssi": rssi, "timestamp": ts}
+
+
+# TC-SNAP-001: latest mode pushes one entry per MAC with its newest reading
+def test_latest_mode_pushes_newest_reading():
+    out = []
+    snap = RssiSnapshot(emit=out.append, mode="latest")
+    for i, rssi in enumerate((-60, -62, -55)):
+        snap.add(_rec(rssi, 100.0 + i))
+    snap.add(_rec(-80, 99.0))  # late record does not replace the newest reading
+    snap.add(_rec(-70, 101.5, mac="11:22:33:44:55:66"))
+
+    assert snap.push() == 2
+    by_mac = {r["mac"]: r for r in out}
+    assert by_mac[MAC]["rssi"] == -55
+    assert by_mac[MAC]["timestamp"] == 102.0
+    assert by_mac[MAC]["samples"] == 4
+    assert snap.push() == 0  # nothing new since the last push
+
+
+# TC-SNAP-002: unchanged entries are held back until they move or need a refresh
+def test_min_delta_and_refresh():
+    out = []
+    snap = RssiSnapshot(emit=out.append, mode="median", min_delta_db=3, refresh_s=60)
+    snap.add(_rec(-60, 100.0))
+    snap.push()
+    for ts, rssi in ((105.0, -61), (106.0, -62), (107.0, -61)):
+        snap.add(_rec(rssi, ts))
+    assert snap.push() == 0  # median -61: within 3 dB of -60
+
+    snap.add(_rec(-66, 110.0))
+    assert snap.push() == 1 and out[-1]["rssi"] == -66
+
+    snap.add(_rec(-66, 171.0))  # same value, but the pushed one is 61 s old
+    assert snap.push() == 1 and out[-1]["timestamp"] == 171.0
+
+
+# TC-SNAP-003: MACs not heard for stale_s are forgotten; invalid settings rejected
+def test_stale_entries_are_pruned():
+    snap = RssiSnapshot(emit=lambda r: None, stale_s=300)
+    snap.add(_rec(-60, 100.0))
+    snap.add(_rec(-60, 450.0, mac="11:22:33:44:55:66"))
+    snap.push()
+    assert snap.stats()["tracked"] == 1
+    with pytest.raises(ValueError):
+        RssiSnapshot(emit=print, mode="mean")
@@ -18,17 +18,19 @@ if str(ENDPOINT_DIR) not in sys.path:
     sys.path.insert(0, str(ENDPOINT_DIR))
 
 import stream  # change to `import steam` if your file is actually named steam.py  # noqa: E402
+import capture as stream_capture  # noqa: E402
 
 
-# TC-STR-001: _iter_lines reads all lines from a file path
-def test_iter_lines_reads_file(tmp_path):
+# TC-STR-001: _iter_raw_lines reads all lines from a file path, with or without a loop
+def test_iter_raw_lines_reads_file(tmp_path):
     # Create a temporary input file
     p = tmp_path / "input.log"
-    lines = ["line1\n", "line2\n", "line3\n"]
-    p.write_text("".join(lines), encoding="utf-8")
+    lines = [b"line1\n", b"line2\n", b"line3\n"]
+    p.write_bytes(b"".join(lines))
 
-    out = list(stream._iter_lines(str(p)))
-    assert out == lines
+    assert list(stream._iter_raw_lines(str(p))) == lines
+    stream._RUNNING = True
+    assert list(stream._iter_raw_lines(str(p), stream.TimerLoop())) == lines
 
 
 # TC-STR-002: _signal_handler sets _RUNNING to False
@@ -52,6 +54,43 @@ class DummyCfg:
         self.api_key = "TEST_API_KEY"
         self.batch_max = 100
         self.batch_interval = 5  # seconds
+        self.batch_adaptive = False
+        self.batch_min = 10
+        self.batch_ceiling = 2000
+        self.batch_target_latency_ms = 2000
+        self.batch_max_age = 30
+        self.coalesce = "off"
+        self.coalesce_bucket_ms = 1000
+        self.breaker_threshold = 0
+        self.breaker_cooldown = 30
+        self.park_max_records = 50000
+        self.fresh_window = 0
+        self.record_ttl = 0
+        self.ttl_action = "drop"
+        self.backlog_rate = 200
+        self.batch_max_bytes = 524288
+        self.frame_include = ""
+        self.frame_exclude = ""
+        self.capture_exclude_macs = ""
+        self.sanitize = "off"
+        self.load_shed = False
+        self.load_shed_lag_ms = 2000
+        self.load_shed_backlog_kb = 48
+        self.dedupe = False
+        self.dedupe_gap_ms = 50
+        self.random_mac_mode = "off"
+        self.random_mac_window_sec = 10
+        self.infra_mode = "off"
+        self.infra_registry_path = ""
+        self.infra_keep_sec = 60
+        self.infra_stable_sec = 600
+        self.infra_stable_db = 2
+        self.infra_allow = ""
+        self.infra_deny = ""
+        self.snapshot_mode = "off"
+        self.snapshot_interval_sec = 5
+        self.snapshot_min_delta_db = 2
+        self.snapshot_refresh_sec = 60
 
 
 class DummyShipper:
@@ -67,6 +106,7 @@ class DummyShipper:
         use_gzip: bool,
         auth_style: str,
         endpoint_id: Optional[str] = None,
+        **kwargs: Any,
     ):
         self.server_url = server_url
         self.api_key = api_key
@@ -76,6 +116,7 @@ class DummyShipper:
         self.use_gzip = use_gzip
         self.auth_style = auth_style
         self.endpoint_id = endpoint_id
+        self.extra_kwargs = kwargs
         self.add_calls: List[Dict[str, Any]] = []
         self.flush_called = False
 
@@ -85,6 +126,13 @@ class DummyShipper:
     def flush(self) -> None:
         self.flush_called = True
 
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batch_size": self.batch_size,
+            "flush_ms": self.flush_ms,
+            "adaptive": False,
+        }
+
 
 # TC-STR-003: main() wires parse_line → Shipper.add and builds correct ingest URL
 def test_main_processes_lines_and_calls_shipper_add(tmp_path, monkeypatch):
@@ -198,3 +246,442 @@ def test_main_writes_tee_jsonl(tmp_path, monkeypatch):
     assert rec0["mac"] == "11:22:33:44:55:66"
     assert rec0["rssi"] == -60
     assert rec0["timestamp"] == 123.456
+
+
+# TC-STR-005: --metrics-json writes a pipeline snapshot on shutdown
+def test_main_writes_metrics_json(tmp_path, monkeypatch):
+    input_file = tmp_path / "tcpdump.log"
+    input_file.write_text("valid1\ninvalid\nvalid1\n", encoding="utf-8")
+    metrics_file = tmp_path / "metrics.json"
+
+    monkeypatch.setattr(stream, "load_config", lambda: DummyCfg())
+    monkeypatch.setattr(
+        stream,
+        "parse_line",
+        lambda line: (
+            {"mac": "aa:bb:cc:dd:ee:ff", "rssi": -50, "timestamp": 1.0}
+            if "valid1" in line
+            else None
+        ),
+    )
+    monkeypatch.setattr(stream, "Shipper", lambda *a, **k: DummyShipper(*a, **k))
+    monkeypatch.setattr(stream.signal, "signal", lambda *a, **k: None)
+    monkeypatch.setattr(stream.logging, "basicConfig", lambda *a, **k: None)
+    monkeypatch.setattr(
+        stream.sys,
+        "argv",
+        ["stream.py", "--from", str(input_file), "--metrics-json", str(metrics_file)],
+    )
+
+    stream._RUNNING = True
+    stream.main()
+
+    snap = json.loads(metrics_file.read_text(encoding="utf-8"))
+    assert snap["wifi_endpoint_stream_lines_seen_total"] == 3
+    assert snap["wifi_endpoint_stream_lines_parsed_total"] == 2
+    assert snap["wifi_endpoint_stream_lines_skipped_total"] == 1
+
+
+# TC-STR-006: --raw-archive writes the raw input bytes (gzip) without a shell tee
+def test_main_writes_raw_archive(tmp_path, monkeypatch):
+    import gzip
+
+    input_file = tmp_path / "tcpdump.log"
+    input_file.write_bytes(b"valid1\ninvalid\nvalid1\n")
+    raw_path = tmp_path / "capture.log.gz"
+
+    monkeypatch.setattr(stream, "load_config", lambda: DummyCfg())
+    monkeypatch.setattr(
+        stream,
+        "parse_line",
+        lambda line: (
+            {"mac": "aa:bb:cc:dd:ee:ff", "rssi": -50, "timestamp": 1.0}
+            if "valid1" in line
+            else None
+        ),
+    )
+    monkeypatch.setattr(stream, "Shipper", DummyShipper)
+    monkeypatch.setattr(stream.signal, "signal", lambda *a, **k: None)
+    monkeypatch.setattr(stream.logging, "basicConfig", lambda *a, **k: None)
+    monkeypatch.setattr(
+        stream.sys,
+        "argv",
+        [
+            "stream.py",
+            "--from",
+            str(input_file),
+            "--raw-archive",
+            str(raw_path),
+            "--raw-failed-only",
+        ],
+    )
+
+    stream._RUNNING = True
+    stream.main()
+
+    assert gzip.decompress(raw_path.read_bytes()) == b"invalid\n"
+
+
+# TC-STR-007: --profile writes a per-stage report on shutdown
+def test_main_profile_report(tmp_path, monkeypatch):
+    input_file = tmp_path / "tcpdump.log"
+    input_file.write_text("valid1\n" * 50, encoding="utf-8")
+    report = tmp_path / "profile.txt"
+
+    monkeypatch.setattr(stream, "load_config", lambda: DummyCfg())
+    monkeypatch.setattr(
+        stream,
+        "parse_line",
+        lambda line: {"mac": "aa:bb:cc:dd:ee:ff", "rssi": -50, "timestamp": 1.0},
+    )
+    monkeypatch.setattr(stream, "Shipper", DummyShipper)
+    monkeypatch.setattr(stream.signal, "signal", lambda *a, **k: None)
+    monkeypatch.setattr(stream.logging, "basicConfig", lambda *a, **k: None)
+    monkeypatch.setattr(
+        stream.sys,
+        "argv",
+        [
+            "stream.py",
+            "--from",
+            str(input_file),
+            "--profile",
+            "--profile-sample",
+            "5",
+            "--profile-out",
+            str(report),
+        ],
+    )
+
+    stream._RUNNING = True
+    stream.main()
+
+    text = report.read_text(encoding="utf-8")
+    for stage in ("read", "parse", "ship_add"):
+        assert stage in text
+
+
+# TC-STR-008: --workers runs the multi-process pipeline with the same records, in order
+def test_main_workers_pipeline(tmp_path, monkeypatch):
+    input_file = tmp_path / "tcpdump.log"
+    input_file.write_text(
+        "".join(f"valid1 {i}\n" if i % 3 else "invalid\n" for i in range(300)),
+        encoding="utf-8",
+    )
+
+    def fake_parse_line(line: str):
+        if "valid1" in line:
+            return {
+                "mac": "aa:bb:cc:dd:ee:ff",
+                "rssi": -50,
+                "timestamp": 100.0,
+                "seq": int(line.split()[1]),
+            }
+        return None
+
+    created: List[DummyShipper] = []
+
+    def fake_shipper_ctor(*args, **kwargs):
+        s = DummyShipper(*args, **kwargs)
+        created.append(s)
+        return s
+
+    monkeypatch.setattr(stream, "load_config", lambda: DummyCfg())
+    monkeypatch.setattr(stream, "parse_line", fake_parse_line)
+    monkeypatch.setattr(stream, "Shipper", fake_shipper_ctor)
+    monkeypatch.setattr(stream.signal, "signal", lambda *a, **k: None)
+    monkeypatch.setattr(stream.logging, "basicConfig", lambda *a, **k: None)
+    monkeypatch.setattr(
+        stream.sys,
+        "argv",
+        ["stream.py", "--from", str(input_file), "--workers", "2"],
+    )
+
+    stream._RUNNING = True
+    stream.main()
+
+    seqs = [r["seq"] for r in created[0].add_calls]
+    assert seqs == [i for i in range(300) if i % 3]
+    assert created[0].flush_called is True
+
+
+# TC-STR-009: --replay-speed max --replay-loop 2 plays the file twice
+def test_main_replay_loop(tmp_path, monkeypatch):
+    input_file = tmp_path / "tcpdump.log"
+    input_file.write_text(
+        "100.000000 valid1\n101.000000 invalid\n102.000000 valid1\n",
+        encoding="utf-8",
+    )
+    created: List[DummyShipper] = []
+
+    def fake_shipper_ctor(*args, **kwargs):
+        s = DummyShipper(*args, **kwargs)
+        created.append(s)
+        return s
+
+    monkeypatch.setattr(stream, "load_config", lambda: DummyCfg())
+    monkeypatch.setattr(
+        stream,
+        "parse_line",
+        lambda line: (
+            {
+                "mac": "aa:bb:cc:dd:ee:ff",
+                "rssi": -50,
+                "timestamp": float(line.split()[0]),
+            }
+            if "valid1" in line
+            else None
+        ),
+    )
+    monkeypatch.setattr(stream, "Shipper", fake_shipper_ctor)
+    monkeypatch.setattr(stream.signal, "signal", lambda *a, **k: None)
+    monkeypatch.setattr(stream.logging, "basicConfig", lambda *a, **k: None)
+    monkeypatch.setattr(
+        stream.sys,
+        "argv",
+        [
+            "stream.py",
+            "--from",
+            str(input_file),
+            "--replay-speed",
+            "max",
+            "--replay-loop",
+            "2",
+        ],
+    )
+
+    stream._RUNNING = True
+    stream.main()
+
+    assert [r["timestamp"] for r in created[0].add_calls] == [
+        100.0,
+        102.0,
+        103.0,
+        105.0,
+    ]
+
+
+# TC-STR-010: FRAME_EXCLUDE drops frame types before parsing; records carry frame_type
+def test_main_frame_exclude(tmp_path, monkeypatch):
+    beacon = (
+        "1758170263.440596 tsft 2412 MHz 11b -46dBm signal -46dBm signal antenna 0 "
+        "0us BSSID:4a:d9:e7:b3:73:16 DA:ff:ff:ff:ff:ff:ff SA:4a:d9:e7:b3:73:16 "
+        "Beacon (RAG XT)\n"
+    )
+    rts = (
+        "1758170263.458731 tsft 2412 MHz 11b -48dBm signal -48dBm signal antenna 0 "
+        "3284us RA:34:7e:5c:7b:b8:d2 TA:54:07:7d:7b:ec:9c Request-To-Send\n"
+    )
+    input_file = tmp_path / "tcpdump.log"
+    input_file.write_text(beacon + rts + beacon, encoding="utf-8")
+
+    cfg = DummyCfg()
+    cfg.frame_exclude = "beacon"
+    created: List[DummyShipper] = []
+
+    def fake_shipper_ctor(*args, **kwargs):
+        s = DummyShipper(*args, **kwargs)
+        created.append(s)
+        return s
+
+    monkeypatch.setattr(stream, "load_config", lambda: cfg)
+    monkeypatch.setattr(stream, "Shipper", fake_shipper_ctor)
+    monkeypatch.setattr(stream.signal, "signal", lambda *a, **k: None)
+    monkeypatch.setattr(stream.logging, "basicConfig", lambda *a, **k: None)
+    monkeypatch.setattr(stream.sys, "argv", ["stream.py", "--from", str(input_file)])
+
+    stream._RUNNING = True
+    stream.main()
+
+    adds = created[0].add_calls
+    assert [(r["mac"], r["frame_type"]) for r in adds] == [("54:07:7d:7b:ec:9c", "rts")]
+
+
+# TC-STR-011: --capture reads a supervised tcpdump started with the derived BPF filter
+def test_main_capture(tmp_path, monkeypatch):
+    rts = (
+        "1758170263.458731 tsft 2412 MHz 11b -48dBm signal -48dBm signal antenna 0 "
+        "3284us RA:34:7e:5c:7b:b8:d2 TA:54:07:7d:7b:ec:9c Request-To-Send"
+    )
+    fake = tmp_path / "fake_tcpdump.py"
+    fake.write_text(
+        f"import sys\nprint({rts!r})\nsys.stderr.write('1 packet captured\\n')\n",
+        encoding="utf-8",
+    )
+    started = []
+
+    def fake_capture(iface, bpf, sudo, loop):
+        started.append((iface, bpf, sudo))
+        return stream_capture.TcpdumpCapture(
+            iface, command=[sys.executable, str(fake)], max_restarts=0, loop=loop
+        )
+
+    cfg = DummyCfg()
+    cfg.frame_exclude = "beacon"
+    cfg.capture_exclude_macs = "4a:d9:e7:b3:73:16"
+    created: List[DummyShipper] = []
+
+    def fake_shipper_ctor(*args, **kwargs):
+        s = DummyShipper(*args, **kwargs)
+        created.append(s)
+        return s
+
+    monkeypatch.setattr(stream, "load_config", lambda: cfg)
+    monkeypatch.setattr(stream, "Shipper", fake_shipper_ctor)
+    monkeypatch.setattr(stream, "TcpdumpCapture", fake_capture)
+    monkeypatch.setattr(stream.signal, "signal", lambda *a, **k: None)
+    monkeypatch.setattr(stream.logging, "basicConfig", lambda *a, **k: None)
+    monkeypatch.setattr(stream.sys, "argv", ["stream.py", "--capture"])
+
+    stream._RUNNING = True
+    stream.main()
+
+    assert started == [
+        (
+            "wlan1",
+            "not type mgt subtype beacon and not wlan addr2 4a:d9:e7:b3:73:16",
+            False,
+        )
+    ]
+    assert [r["mac"] for r in created[0].add_calls] == ["54:07:7d:7b:ec:9c"]
+
+
+# TC-STR-012: SANITIZE=drop keeps out-of-range RSSI readings away from the shipper
+def test_main_sanitize_drops_out_of_range(tmp_path, monkeypatch):
+    input_file = tmp_path / "tcpdump.log"
+    input_file.write_text("ok\nweak\n", encoding="utf-8")
+
+    def fake_parse_line(line: str):
+        rssi = -111 if "weak" in line else -50
+        return {"mac": "aa:bb:cc:dd:ee:ff", "rssi": rssi, "timestamp": 100.0}
+
+    created: List[DummyShipper] = []
+
+    def fake_shipper_ctor(*args, **kwargs):
+        s = DummyShipper(*args, **kwargs)
+        created.append(s)
+        return s
+
+    cfg = DummyCfg()
+    cfg.sanitize = "drop"
+    monkeypatch.setattr(stream, "load_config", lambda: cfg)
+    monkeypatch.setattr(stream, "parse_line", fake_parse_line)
+    monkeypatch.setattr(stream, "Shipper", fake_shipper_ctor)
+    monkeypatch.setattr(stream.signal, "signal", lambda *a, **k: None)
+    monkeypatch.setattr(stream.logging, "basicConfig", lambda *a, **k: None)
+    monkeypatch.setattr(stream.sys, "argv", ["stream.py", "--from", str(input_file)])
+
+    stream._RUNNING = True
+    stream.main()
+
+    assert [r["rssi"] for r in created[0].add_calls] == [-50]
+
+
+# TC-STR-013: INFRA_MODE=suppress drops beacon sources and persists the registry
+def test_main_infra_suppress(tmp_path, monkeypatch):
+    beacon = (
+        "1758170263.440596 tsft 2412 MHz 11b -46dBm signal -46dBm signal antenna 0 "
+        "0us BSSID:4a:d9:e7:b3:73:16 DA:ff:ff:ff:ff:ff:ff SA:4a:d9:e7:b3:73:16 "
+        "Beacon (RAG XT)\n"
+    )
+    rts = (
+        "1758170263.458731 tsft 2412 MHz 11b -48dBm signal -48dBm signal antenna 0 "
+        "3284us RA:34:7e:5c:7b:b8:d2 TA:54:07:7d:7b:ec:9c Request-To-Send\n"
+    )
+    input_file = tmp_path / "tcpdump.log"
+    input_file.write_text(beacon + rts + beacon, encoding="utf-8")
+
+    cfg = DummyCfg()
+    cfg.infra_mode = "suppress"
+    cfg.infra_registry_path = str(tmp_path / "infra.bin")
+    created: List[DummyShipper] = []
+
+    def fake_shipper_ctor(*args, **kwargs):
+        s = DummyShipper(*args, **kwargs)
+        created.append(s)
+        return s
+
+    monkeypatch.setattr(stream, "load_config", lambda: cfg)
+    monkeypatch.setattr(stream, "Shipper", fake_shipper_ctor)
+    monkeypatch.setattr(stream.signal, "signal", lambda *a, **k: None)
+    monkeypatch.setattr(stream.logging, "basicConfig", lambda *a, **k: None)
+    monkeypatch.setattr(stream.sys, "argv", ["stream.py", "--from", str(input_file)])
+
+    stream._RUNNING = True
+    stream.main()
+
+    assert [r["frame_type"] for r in created[0].add_calls] == ["rts"]
+    assert (tmp_path / "infra.bin").stat().st_size == 5 + 11
+
+
+# TC-STR-014: SNAPSHOT_MODE ships one entry per MAC instead of every record
+def test_main_snapshot_mode(tmp_path, monkeypatch):
+    def rts(ts, rssi, ta):
+        return (
+            f"{ts:.6f} tsft 2412 MHz 11b {rssi}dBm signal antenna 0 "
+            f"3284us RA:34:7e:5c:7b:b8:d2 TA:{ta} Request-To-Send\n"
+        )
+
+    lines = [rts(100.0 + i * 0.1, -50 - i % 3, "54:07:7d:7b:ec:9c") for i in range(9)]
+    lines.append(rts(101.0, -70, "00:11:22:33:44:55"))
+    input_file = tmp_path / "tcpdump.log"
+    input_file.write_text("".join(lines), encoding="utf-8")
+
+    cfg = DummyCfg()
+    cfg.snapshot_mode = "median"
+    created: List[DummyShipper] = []
+
+    def fake_shipper_ctor(*args, **kwargs):
+        s = DummyShipper(*args, **kwargs)
+        created.append(s)
+        return s
+
+    monkeypatch.setattr(stream, "load_config", lambda: cfg)
+    monkeypatch.setattr(stream, "Shipper", fake_shipper_ctor)
+    monkeypatch.setattr(stream.signal, "signal", lambda *a, **k: None)
+    monkeypatch.setattr(stream.logging, "basicConfig", lambda *a, **k: None)
+    monkeypatch.setattr(stream.sys, "argv", ["stream.py", "--from", str(input_file)])
+
+    stream._RUNNING = True
+    stream.main()
+
+    shipped = {r["mac"]: r for r in created[0].add_calls}
+    assert len(created[0].add_calls) == 2
+    assert shipped["54:07:7d:7b:ec:9c"]["rssi"] == -51
+    assert shipped["54:07:7d:7b:ec:9c"]["samples"] == 9
+    assert shipped["00:11:22:33:44:55"]["snapshot"] is True
+
+
+# TC-STR-015: freshness lanes and the TTL are off for --from (old capture timestamps)
+def test_main_freshness_live_input_only(tmp_path, monkeypatch):
+    input_file = tmp_path / "tcpdump.log"
+    input_file.write_text("valid1\n", encoding="utf-8")
+
+    cfg = DummyCfg()
+    cfg.fresh_window = 300
+    cfg.record_ttl = 3600
+    created: List[DummyShipper] = []
+
+    def fake_shipper_ctor(*args, **kwargs):
+        s = DummyShipper(*args, **kwargs)
+        created.append(s)
+        return s
+
+    monkeypatch.setattr(stream, "load_config", lambda: cfg)
+    monkeypatch.setattr(stream, "Shipper", fake_shipper_ctor)
+    monkeypatch.setattr(stream.signal, "signal", lambda *a, **k: None)
+    monkeypatch.setattr(stream.logging, "basicConfig", lambda *a, **k: None)
+    monkeypatch.setattr(stream.sys, "argv", ["stream.py", "--from", str(input_file)])
+    stream._RUNNING = True
+    stream.main()
+
+    assert created[0].extra_kwargs["fresh_s"] is None
+    assert created[0].extra_kwargs["ttl_s"] is None
+
+    # A rebased replay is live input
+    argv = ["--from", str(input_file), "--replay-speed", "max", "--replay-rebase"]
+    monkeypatch.setattr(stream.sys, "argv", ["stream.py", *argv])
+    stream._RUNNING = True
+    stream.main()
+
+    assert created[1].extra_kwargs["fresh_s"] == 300
+    assert created[1].extra_kwargs["ttl_s"] == 3600
@@ -0,0 +1,70 @@
+# endpoint/tests/test_tee_writer.py
+"""
+Automated black-box tests for tee_writer.py (TeeWriter).
+
+Each test references a Test Case ID (TC-TEE-###) for traceability in the
+test report and traceability matrix.
+"""
+
+import gzip
+import json
+import sys
+from pathlib import Path
+
+# --- Ensure endpoint directory (where tee_writer.py lives) is on sys.path ---
+ENDPOINT_DIR = Path(__file__).resolve().parents[1]
+if str(ENDPOINT_DIR) not in sys.path:
+    sys.path.insert(0, str(ENDPOINT_DIR))
+
+import tee_writer  # noqa: E402
+
+REC = {"mac": "aa:bb:cc:dd:ee:ff", "rssi": -50, "timestamp": 100.0}
+
+
+# TC-TEE-001: records are buffered and written in one go on flush
+def test_buffers_until_flush(tmp_path):
+    path = tmp_path / "parsed.jsonl"
+    tee = tee_writer.TeeWriter(str(path), flush_bytes=1 << 20, flush_interval_s=3600)
+    for _ in range(10):
+        tee.write_record(REC)
+
+    assert path.read_text() == ""
+    tee.close()
+    lines = path.read_text().splitlines()
+    assert len(lines) == 10
+    assert json.loads(lines[0]) == REC
+    assert tee.flushes == 1
+
+
+# TC-TEE-002: size-based rotation with background gzip of closed segments
+def test_rotation_and_gzip(tmp_path):
+    path = tmp_path / "parsed.jsonl"
+    tee = tee_writer.TeeWriter(
+        str(path), flush_bytes=1, rotate_bytes=200, compress=True
+    )
+    for _ in range(10):
+        tee.write_record(REC)
+    tee.close()
+
+    segments = sorted(tmp_path.glob("parsed.jsonl.*.gz"))
+    assert tee.rotations >= 2
+    assert len(segments) == tee.rotations
+    total = sum(
+        len(gzip.decompress(p.read_bytes()).splitlines()) for p in segments
+    ) + len(path.read_text().splitlines())
+    assert total == 10
+
+
+# TC-TEE-003: max_total_bytes deletes the oldest closed segments
+def test_disk_cap(tmp_path):
+    path = tmp_path / "parsed.jsonl"
+    tee = tee_writer.TeeWriter(
+        str(path), flush_bytes=1, rotate_bytes=100, max_total_bytes=250
+    )
+    for _ in range(30):
+        tee.write_record(REC)
+    tee.close()
+
+    on_disk = sum(p.stat().st_size for p in tmp_path.iterdir())
+    assert on_disk <= 250 + 100  # cap plus at most one active segment
+    assert tee.rotations > 3
@@ -14,6 +14,10 @@ Usage pattern:
     aggr.flush_expired(current_ts)  # call periodically
     aggr.flush_all()                # on shutdown
 
+    # Epoch-aligned windows: [k*window_s, (k+1)*window_s) on the capture clock, so every
+    # endpoint using the same window_s puts a device's readings in the same window_id
+    aggr = MacAggregator(window_s=2.0, emit_cb=handle_aggregated, aligned=True)
+
 Emitted record shape (aggregated):
 {
   "mac": "<mac>",
@@ -25,8 +29,16 @@ Emitted record shape (aggregated):
   "rssi_stddev": <float>,
   "last_channel": <int>,
   "window_ms": <int>,
-  "aggregated": true
+  "aggregated": true,
+  "window_id": <int>           # aligned mode only: floor(ts / window_s)
 }
+
+Aligned mode: a window closes when a sample from a later window arrives or when
+flush_expired() is given a time past its end; late samples (from an earlier window) are
+counted in the open one. A window is emitted at most once per MAC: samples that fall
+into an already-emitted window are dropped and counted in late_dropped. Readings from
+different endpoints join on (mac, window_id) when they share window_s and a synchronized
+clock.
 """
 
 from __future__ import annotations
@@ -46,23 +58,46 @@ class MacAggregator:
     - flush_all(): emit whatever remains (e.g., on shutdown)
 
     The aggregator resets the per-MAC window after emit, so subsequent samples start a new window.
+    With aligned=True windows snap to multiples of window_s instead (see module docstring).
     """
 
-    def __init__(self, window_s: float, emit_cb: Callable[[dict], None]):
+    def __init__(
+        self, window_s: float, emit_cb: Callable[[dict], None], aligned: bool = False
+    ):
         self.window_s = float(window_s)
         self.emit_cb = emit_cb
-        # mac -> {"samples": List[Tuple[ts, rssi, channel]], "first_ts": float, "last_ts": float}
+        self.aligned = bool(aligned)
+        # mac -> {"samples": List[Tuple[ts, rssi, channel]], "first_ts": float, "last_ts": float,
+        #         "window": int (aligned mode)}
         self._state: Dict[str, Dict[str, object]] = defaultdict(
-            lambda: {"samples": [], "first_ts": None, "last_ts": None}
+            lambda: {"samples": [], "first_ts": None, "last_ts": None, "window": None}
         )
+        # Aligned mode: windows before _closed are closed for every MAC (flush_expired);
+        # _emitted keeps the last emitted window per MAC at or above it
+        self._closed: Optional[int] = None
+        self._emitted: Dict[str, int] = {}
+        self.late_dropped = 0
 
     def add_sample(self, mac: str, rssi: float, ts: float, channel: int = -1) -> None:
+        if self.aligned:
+            window = int(ts // self.window_s)
+            if self._was_emitted(mac, window):
+                self.late_dropped += 1
+                return
         st = self._state[mac]
+        if self.aligned:
+            if st["window"] is not None and window > st["window"]:  # type: ignore
+                self._emit(mac)
+                st = self._state[mac]
+            if st["window"] is None:
+                st["window"] = window
         if st["first_ts"] is None:
             st["first_ts"] = ts
         st["last_ts"] = ts
         samples: List[Tuple[float, float, int]] = st["samples"]  # type: ignore
         samples.append((ts, float(rssi), int(channel)))
+        if self.aligned:
+            return
 
         # If the window has expired relative to this sample's timestamp, emit now.
         if (ts - float(st["first_ts"])) >= self.window_s:
@@ -74,6 +109,21 @@ class MacAggregator:
         For stdin live streams, using wall clock is fine; for file replays, pass the latest capture ts.
         """
         now = time.time() if current_ts is None else float(current_ts)
+        if self.aligned:
+            # A window k ends at (k + 1) * window_s
+            current = int(now // self.window_s)
+            to_emit = [
+                mac
+                for mac, st in self._state.items()
+                if st["window"] is not None and st["window"] < current  # type: ignore
+            ]
+            for mac in to_emit:
+                self._emit(mac)
+            if self._closed is None or current > self._closed:
+                # Every window before `current` is closed now; forget older markers
+                self._closed = current
+                self._emitted = {m: w for m, w in self._emitted.items() if w >= current}
+            return
         to_emit = [
             mac
             for mac, st in self._state.items()
@@ -83,6 +133,12 @@ class MacAggregator:
         for mac in to_emit:
             self._emit(mac)
 
+    def _was_emitted(self, mac: str, window: int) -> bool:
+        if self._closed is not None and window < self._closed:
+            return True
+        last = self._emitted.get(mac)
+        return last is not None and window <= last
+
     def flush_all(self) -> None:
         """Emit any remaining windows."""
         for mac in list(self._state.keys()):
@@ -110,6 +166,9 @@ class MacAggregator:
             "window_ms": int(self.window_s * 1000),
             "aggregated": True,
         }
+        if self.aligned:
+            aggregated["window_id"] = st["window"]
+            self._emitted[mac] = st["window"]  # type: ignore
 
         self.emit_cb(aggregated)
         # Reset state for fresh window
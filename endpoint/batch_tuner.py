@@ -0,0 +1,138 @@
+"""
+batch_tuner.py
+Additive-increase / multiplicative-decrease (AIMD) tuning of the Shipper batch size
+and flush interval.
+
+Usage pattern:
+    from batch_tuner import AimdTuner
+
+    tuner = AimdTuner(batch_size=200, flush_ms=5000, max_data_age_ms=30000)
+    tuner.on_success(latency_s=0.25)   # healthy POST -> grow
+    tuner.on_backpressure()            # timeout / 413 / 429 / slow POST -> shrink
+    tuner.hold(retry_after_s=10)       # server asked us to back off
+    tuner.batch_size, tuner.flush_ms   # current effective values
+
+The flush interval follows the batch size proportionally (so the implied send rate stays
+the same while batches grow), but it is never allowed to exceed max_data_age_ms: a record
+must not sit in the batch longer than the configured max data age.
+"""
+
+from __future__ import annotations
+
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+
+def parse_retry_after(
+    value: Optional[str], now: Optional[float] = None
+) -> Optional[float]:
+    """
+    Parse a Retry-After header value into a delay in seconds.
+    Accepts both forms allowed by RFC 9110 (delta-seconds or an HTTP-date).
+    Returns None if the value is missing or unparseable.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, when - now)
+
+
+class AimdTuner:
+    """
+    Grows the batch size additively while POSTs are fast and successful, halves it on
+    congestion signals (timeouts, 413, 429, or latency above target).
+
+    - on_success(latency_s): record a 2xx POST and its latency
+    - on_backpressure(): record a timeout / 413 / 429
+    - hold(retry_after_s): honour a server Retry-After (see hold_remaining())
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_ms: int,
+        min_batch_size: int = 10,
+        max_batch_size: int = 2000,
+        target_latency_ms: int = 2000,
+        max_data_age_ms: Optional[int] = None,
+        increase_step: Optional[int] = None,
+        decrease_factor: float = 0.5,
+    ):
+        if min_batch_size < 1 or max_batch_size < min_batch_size:
+            raise ValueError("require 1 <= min_batch_size <= max_batch_size")
+        if not 0.0 < decrease_factor < 1.0:
+            raise ValueError("decrease_factor must be in (0, 1)")
+
+        self.min_batch_size = int(min_batch_size)
+        self.max_batch_size = int(max_batch_size)
+        self.target_latency_ms = int(target_latency_ms)
+        self.max_data_age_ms = int(max_data_age_ms) if max_data_age_ms else None
+        self.decrease_factor = float(decrease_factor)
+
+        self._base_batch = min(
+            max(int(batch_size), self.min_batch_size), self.max_batch_size
+        )
+        self._base_flush_ms = max(1, int(flush_ms))
+        # Default additive step: ~10% of the starting batch size
+        self.increase_step = int(increase_step or max(1, self._base_batch // 10))
+
+        self.batch_size = self._base_batch
+        self.flush_ms = self._flush_for(self.batch_size)
+        self._hold_until = 0.0
+
+        self.increases = 0
+        self.decreases = 0
+
+    def _flush_for(self, batch_size: int) -> int:
+        flush = int(self._base_flush_ms * batch_size / self._base_batch)
+        if self.max_data_age_ms is not None:
+            flush = min(flush, self.max_data_age_ms)
+        return max(1, flush)
+
+    def _set_batch(self, batch_size: int) -> None:
+        self.batch_size = min(max(batch_size, self.min_batch_size), self.max_batch_size)
+        self.flush_ms = self._flush_for(self.batch_size)
+
+    def on_success(self, latency_s: float) -> None:
+        """Additive increase on a healthy POST, multiplicative decrease if it was slow."""
+        if latency_s * 1000.0 > self.target_latency_ms:
+            self.on_backpressure()
+            return
+        if self.batch_size < self.max_batch_size:
+            self._set_batch(self.batch_size + self.increase_step)
+            self.increases += 1
+
+    def on_backpressure(self) -> None:
+        """Multiplicative decrease on a congestion signal."""
+        if self.batch_size > self.min_batch_size:
+            self._set_batch(int(self.batch_size * self.decrease_factor))
+            self.decreases += 1
+
+    def hold(self, retry_after_s: float, now: Optional[float] = None) -> None:
+        """Do not POST again until retry_after_s from now (keeps the longest hold)."""
+        now = time.time() if now is None else now
+        self._hold_until = max(self._hold_until, now + max(0.0, retry_after_s))
+
+    def hold_remaining(self, now: Optional[float] = None) -> float:
+        """Seconds left on the current Retry-After hold (0.0 if none)."""
+        now = time.time() if now is None else now
+        return max(0.0, self._hold_until - now)
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "batch_size": self.batch_size,
+            "flush_ms": self.flush_ms,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "hold_remaining_s": round(self.hold_remaining(), 3),
+        }
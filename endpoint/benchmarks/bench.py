@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+bench.py
+Benchmark suite for the endpoint hot paths, with JSON output and baseline comparison.
+
+Usage pattern:
+    cd endpoint
+    python benchmarks/bench.py                                  # run all, print JSON
+    python benchmarks/bench.py --out /tmp/bench.json --quick
+    python benchmarks/bench.py --baseline benchmarks/baseline.json   # exit 1 on regression
+    python benchmarks/bench.py --only parse,payload --update-baseline benchmarks/baseline.json
+
+Benchmarks (each result is {"value", "unit", "higher_is_better", ...details}):
+    parse_line.<capture>       lines/s of parser_scan.parse_line over each sample capture
+    aggregator.macs_<N>        samples/s through MacAggregator with N distinct MACs
+    payload_bytes.batch_<N>    records/s through Shipper._payload_bytes at batch size N
+    stream_e2e                 lines/s of `stream.py --from` (subprocess) posting to
+                               ingest_server.IngestServer; also checks every parsed
+                               record arrived and reports how many the server's
+                               validation rejected
+
+Regression check: a result is a regression when it is worse than the baseline by more than
+--threshold (default 0.20, i.e. 20%). A baseline entry may carry its own "threshold".
+Baselines are machine-specific: refresh them with --update-baseline on the target device.
+A result with "complete": false (records lost on the way) fails the run (exit 1) and is
+never written to a baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ENDPOINT_DIR = Path(__file__).resolve().parents[1]
+if str(ENDPOINT_DIR) not in sys.path:
+    sys.path.insert(0, str(ENDPOINT_DIR))
+
+from aggregator import MacAggregator  # noqa: E402
+from ingest_server import IngestServer  # noqa: E402
+from parser_scan import parse_line  # noqa: E402
+from shipper import Shipper  # noqa: E402
+
+CAPTURES_DIR = ENDPOINT_DIR / "sample_captures"
+DEFAULT_THRESHOLD = 0.20
+
+Result = Dict[str, Any]
+
+
+def _best_of(fn: Callable[[], None], repeat: int) -> List[float]:
+    """Run fn `repeat` times; return the wall durations."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def _rate(units: int, times: List[float], unit: str, **details) -> Result:
+    best = min(times)
+    return {
+        "value": round(units / best, 1),
+        "unit": unit,
+        "higher_is_better": True,
+        "best_s": round(best, 6),
+        "median_s": round(statistics.median(times), 6),
+        "repeat": len(times),
+        **details,
+    }
+
+
+# ---------------- parse_line ----------------
+
+
+def bench_parse(repeat: int) -> Dict[str, Result]:
+    out: Dict[str, Result] = {}
+    for path in sorted(CAPTURES_DIR.glob("*.txt")):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.readlines()
+        hits = sum(1 for line in lines if parse_line(line) is not None)
+
+        def run():
+            for line in lines:
+                parse_line(line)
+
+        out[f"parse_line.{path.stem}"] = _rate(
+            len(lines),
+            _best_of(run, repeat),
+            "lines/s",
+            lines=len(lines),
+            parsed=hits,
+        )
+    return out
+
+
+# ---------------- MacAggregator ----------------
+
+
+def _synthetic_samples(n: int, macs: int, seed: int = 7) -> List[tuple]:
+    rnd = random.Random(seed)
+    pool = [
+        ":".join(f"{rnd.randrange(256):02x}" for _ in range(6)) for _ in range(macs)
+    ]
+    ts = 1_700_000_000.0
+    samples = []
+    for _ in range(n):
+        ts += 0.001
+        samples.append((rnd.choice(pool), -rnd.randrange(30, 95), ts))
+    return samples
+
+
+def bench_aggregator(repeat: int, n: int) -> Dict[str, Result]:
+    out: Dict[str, Result] = {}
+    for macs in (10, 100, 1000, 10000):
+        samples = _synthetic_samples(n, macs)
+        emitted = [0]
+
+        def run():
+            emitted[0] = 0
+
+            def _cb(_rec):
+                emitted[0] += 1
+
+            aggr = MacAggregator(window_s=2.0, emit_cb=_cb)
+            for mac, rssi, ts in samples:
+                aggr.add_sample(mac=mac, rssi=rssi, ts=ts, channel=-1)
+                aggr.flush_expired(ts)
+            aggr.flush_all()
+
+        out[f"aggregator.macs_{macs}"] = _rate(
+            n, _best_of(run, repeat), "samples/s", samples=n, emitted=emitted[0]
+        )
+    return out
+
+
+# ---------------- Shipper._payload_bytes ----------------
+
+
+def bench_payload(repeat: int, n: int) -> Dict[str, Result]:
+    out: Dict[str, Result] = {}
+    ship = Shipper(
+        server_url="http://127.0.0.1:9/api/endpoint/scan-data",
+        api_key="bench",
+        endpoint_id="bench-endpoint",
+    )
+    try:
+        rnd = random.Random(3)
+        for size in (10, 100, 500, 2000):
+            batch = [
+                {
+                    "mac": f"aa:bb:cc:{i % 256:02x}:{i // 256 % 256:02x}:01",
+                    "rssi": -rnd.randrange(30, 95),
+                    "timestamp": 1_700_000_000.0 + i * 0.01,
+                }
+                for i in range(size)
+            ]
+            rounds = max(1, n // size)
+            body_len = [0]
+
+            def run():
+                for _ in range(rounds):
+                    body_len[0] = len(ship._payload_bytes(batch))
+
+            out[f"payload_bytes.batch_{size}"] = _rate(
+                rounds * size,
+                _best_of(run, repeat),
+                "records/s",
+                batch=size,
+                bytes_per_record=round(body_len[0] / size, 1),
+            )
+    finally:
+        ship.close()
+    return out
+
+
+# ---------------- End-to-end stream.py ----------------
+
+
+def bench_stream(repeat: int, copies: int) -> Dict[str, Result]:
+    src = sorted(CAPTURES_DIR.glob("*.txt"))
+    work = Path(tempfile.mkdtemp(prefix="bench_")) / "stream_input.txt"
+    data = b"".join(p.read_bytes() for p in src) * copies
+    work.write_bytes(data)
+    lines = data.count(b"\n")
+    expected = sum(
+        1
+        for line in data.decode("utf-8", errors="replace").splitlines(True)
+        if parse_line(line) is not None
+    )
+
+    server = IngestServer(api_key="bench").start()
+    env = dict(
+        os.environ,
+        SERVER_URL=server.url,
+        ALLOW_INSECURE_HTTP="true",
+        API_KEY="bench",
+        ENDPOINT_ID="bench-endpoint",
+        WLAN_IFACE="wlan1",
+        LOG_LEVEL="WARNING",
+        BATCH_MAX="500",
+        # Every parsed record must reach the server; it counts the ones it rejects
+        SANITIZE="off",
+    )
+    try:
+        times = []
+        for _ in range(repeat):
+            server.reset()
+            t0 = time.perf_counter()
+            subprocess.run(
+                [sys.executable, str(ENDPOINT_DIR / "stream.py"), "--from", str(work)],
+                cwd=str(ENDPOINT_DIR),
+                env=env,
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            times.append(time.perf_counter() - t0)
+        stats = server.stats()
+        # Records the server rejects (e.g. RSSI below -100 dBm) still arrived
+        received = stats["records_accepted"] + stats["records_rejected"]
+        result = _rate(
+            lines,
+            times,
+            "lines/s",
+            lines=lines,
+            records_expected=expected,
+            records_received=received,
+            records_rejected=stats["records_rejected"],
+            posts=stats["requests"],
+        )
+        result["complete"] = received == expected
+        return {"stream_e2e": result}
+    finally:
+        server.stop()
+        work.unlink(missing_ok=True)
+        work.parent.rmdir()
+
+
+# ---------------- Baseline comparison ----------------
+
+
+def compare(
+    results: Dict[str, Result],
+    baseline: Dict[str, Result],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """Per-benchmark change vs baseline; entries with "regression": True failed."""
+    rows = []
+    for name, res in sorted(results.items()):
+        base = baseline.get(name)
+        if not base or not base.get("value"):
+            rows.append({"name": name, "status": "new", "regression": False})
+            continue
+        limit = float(base.get("threshold", threshold))
+        change = (res["value"] - base["value"]) / base["value"]
+        if not res.get("higher_is_better", True):
+            change = -change
+        rows.append(
+            {
+                "name": name,
+                "baseline": base["value"],
+                "current": res["value"],
+                "unit": res.get("unit"),
+                "change": round(change, 4),
+                "threshold": limit,
+                "regression": change < -limit,
+                "status": "regression" if change < -limit else "ok",
+            }
+        )
+    return rows
+
+
+def incomplete(results: Dict[str, Result]) -> List[str]:
+    """Benchmarks that lost work (e.g. records that never reached the server)."""
+    return sorted(name for name, res in results.items() if res.get("complete") is False)
+
+
+SUITES = ("parse", "aggregator", "payload", "stream")
+
+
+def run(only: Optional[List[str]], quick: bool) -> Dict[str, Result]:
+    repeat = 3 if quick else 5
+    n = 20_000 if quick else 50_000
+    selected = only or list(SUITES)
+    results: Dict[str, Result] = {}
+    if "parse" in selected:
+        results.update(bench_parse(repeat))
+    if "aggregator" in selected:
+        # Large cardinalities are slow per pass; three passes are enough
+        results.update(bench_aggregator(min(repeat, 3), n))
+    if "payload" in selected:
+        results.update(bench_payload(repeat, n))
+    if "stream" in selected:
+        results.update(bench_stream(2 if quick else 3, 2 if quick else 10))
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Endpoint hot-path benchmarks.")
+    parser.add_argument(
+        "--only", default=None, help=f"Comma-separated subset of {','.join(SUITES)}"
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="Smaller inputs / fewer repeats"
+    )
+    parser.add_argument("--out", default=None, help="Write the JSON report here")
+    parser.add_argument(
+        "--baseline", default=None, help="Compare against this baseline JSON"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Allowed slowdown vs baseline (default: 0.20)",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        default=None,
+        help="Write (merge) the results into this baseline JSON",
+    )
+    args = parser.parse_args()
+
+    only = [s.strip() for s in args.only.split(",")] if args.only else None
+    for s in only or []:
+        if s not in SUITES:
+            parser.error(f"unknown suite {s!r} (choose from {', '.join(SUITES)})")
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "results": run(only, args.quick),
+    }
+
+    lost = incomplete(report["results"])
+    failed = bool(lost)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+        report["comparison"] = compare(report["results"], baseline, args.threshold)
+        failed = failed or any(row["regression"] for row in report["comparison"])
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+    if args.update_baseline and not lost:
+        merged: Dict[str, Any] = {"results": {}}
+        if os.path.exists(args.update_baseline):
+            with open(args.update_baseline, "r", encoding="utf-8") as f:
+                merged = json.load(f)
+        merged["meta"] = report["meta"]
+        merged.setdefault("results", {})
+        for name, res in report["results"].items():
+            keep = merged["results"].get(name, {}).get("threshold")
+            entry = {"value": res["value"], "unit": res["unit"]}
+            entry["higher_is_better"] = res["higher_is_better"]
+            if keep is not None:
+                entry["threshold"] = keep
+            merged["results"][name] = entry
+        with open(args.update_baseline, "w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if failed:
+        for name in lost:
+            res = report["results"][name]
+            print(
+                f"INCOMPLETE {name}: {res.get('records_received')} of "
+                f"{res.get('records_expected')} records arrived; "
+                "incomplete runs fail and never update a baseline",
+                file=sys.stderr,
+            )
+        for row in report.get("comparison", []):
+            if row["regression"]:
+                print(
+                    f"REGRESSION {row['name']}: {row['current']} vs {row['baseline']} "
+                    f"{row['unit']} ({row['change']:+.1%}, limit -{row['threshold']:.0%})",
+                    file=sys.stderr,
+                )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
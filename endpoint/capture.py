@@ -0,0 +1,343 @@
+"""
+capture.py
+Runs and supervises tcpdump from the endpoint process, with a BPF filter built from the
+frame-type policy, so frames the endpoint would discard are dropped in the kernel
+instead of being copied to userspace, formatted with -vvv and thrown away in Python.
+
+Usage pattern:
+    from capture import TcpdumpCapture, build_bpf_filter
+
+    bpf = build_bpf_filter(exclude={"beacon", "rts"}, exclude_macs=["aa:bb:cc:dd:ee:ff"])
+    cap = TcpdumpCapture("wlan1", bpf=bpf, sudo=True)
+    for raw in cap:            # raw byte lines, same format as `tcpdump ... | stream.py`
+        ...
+    cap.request_stats()        # SIGUSR1: tcpdump reports its counters on stderr
+    cap.stats()                # captured / received / dropped_kernel / restarts
+    cap.stop()                 # (e.g. from a signal handler) ends the iteration
+
+    cap = TcpdumpCapture("wlan1", loop=loop)   # event_loop.TimerLoop: its timers keep
+                                               # running while tcpdump prints nothing
+
+Behaviour:
+    - frame types map to pcap-filter 802.11 primitives ("type mgt subtype beacon",
+      "type data", ...); BA / BAR are matched on the frame-control byte. "other" has no
+      kernel-side equivalent: including it disables the include clause, excluding it is
+      left to the Python FrameFilter
+    - excluded MACs drop every frame whose transmitter address (addr2) matches, e.g.
+      known access points; ACK / CTS frames carry no addr2 and are kept
+    - when tcpdump exits without stop() it is restarted after an exponential backoff
+      (reset once a run has lasted a minute); a missing binary raises immediately
+    - "N packets captured / received by filter / dropped by kernel / dropped by
+      interface" lines on stderr (at exit and on SIGUSR1) are summed across restarts
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sanitize import parse_mac_list
+
+log = logging.getLogger("capture")
+
+# Same output format stream.py / parser_scan.py have always been fed
+TCPDUMP_ARGS = ("-s", "0", "-l", "-e", "-tt", "-n", "-vvv")
+
+# frame_type name (parser_scan.FRAME_TYPES) -> pcap-filter expression
+BPF_FRAME_TYPES: Dict[str, str] = {
+    "beacon": "type mgt subtype beacon",
+    "probe_request": "type mgt subtype probe-req",
+    "probe_response": "type mgt subtype probe-resp",
+    "assoc_request": "type mgt subtype assoc-req",
+    "assoc_response": "type mgt subtype assoc-resp",
+    "reassoc_request": "type mgt subtype reassoc-req",
+    "reassoc_response": "type mgt subtype reassoc-resp",
+    "disassociation": "type mgt subtype disassoc",
+    "authentication": "type mgt subtype auth",
+    "deauthentication": "type mgt subtype deauth",
+    "action": "type mgt subtype action",
+    "atim": "type mgt subtype atim",
+    "rts": "type ctl subtype rts",
+    "cts": "type ctl subtype cts",
+    "ack": "type ctl subtype ack",
+    "ps_poll": "type ctl subtype ps-poll",
+    "cf_end": "type ctl subtype cf-end",
+    # No subtype keyword in older libpcap: frame control byte = subtype << 4 | type << 2
+    "ba": "wlan[0] & 0xfc = 0x94",
+    "bar": "wlan[0] & 0xfc = 0x84",
+    "data": "type data",
+}
+
+STATS_RE = re.compile(
+    rb"(\d+) packets? (captured|received by filter|dropped by kernel|dropped by interface)"
+)
+_STAT_KEYS = {
+    b"captured": "captured",
+    b"received by filter": "received",
+    b"dropped by kernel": "dropped_kernel",
+    b"dropped by interface": "dropped_iface",
+}
+_STABLE_RUN_S = 60.0
+
+
+def _any_of(exprs: Iterable[str]) -> str:
+    exprs = list(exprs)
+    return exprs[0] if len(exprs) == 1 else "(" + " or ".join(exprs) + ")"
+
+
+def build_bpf_filter(
+    include: Optional[Iterable[str]] = None,
+    exclude: Optional[Iterable[str]] = None,
+    exclude_macs: Iterable[str] = (),
+) -> str:
+    """
+    pcap-filter expression for a frame-type policy and a transmitter deny list.
+    Returns "" when nothing can be filtered in the kernel.
+    """
+    clauses = []
+    include = set(include or ())
+    unknown = (include | set(exclude or ())) - set(BPF_FRAME_TYPES) - {"other"}
+    if unknown:
+        raise ValueError(f"Unknown frame type(s) {sorted(unknown)}")
+    if include and "other" not in include:
+        clauses.append(_any_of(BPF_FRAME_TYPES[t] for t in sorted(include)))
+    dropped = sorted(set(exclude or ()) - {"other"})
+    if dropped:
+        clauses.append("not " + _any_of(BPF_FRAME_TYPES[t] for t in dropped))
+    macs = parse_mac_list(",".join(exclude_macs))
+    if macs:
+        clauses.append("not " + _any_of(f"wlan addr2 {m}" for m in macs))
+    return " and ".join(clauses)
+
+
+def parse_tcpdump_stats(text: bytes) -> Dict[str, int]:
+    """Counters from tcpdump's stderr summary (exit or SIGUSR1 format)."""
+    return {_STAT_KEYS[k]: int(n) for n, k in STATS_RE.findall(text)}
+
+
+class TcpdumpCapture:
+    """
+    Iterator of raw tcpdump output lines from a supervised tcpdump subprocess.
+
+    - iface / bpf: capture interface and filter expression ("" = no filter)
+    - sudo: prefix the command with `sudo -n` (the service runs as an unprivileged user)
+    - command: full argv override (tests use a fake tcpdump)
+    - restart_delay_s / max_restart_delay_s: backoff between restarts
+    - max_restarts: give up after this many restarts (None = never)
+    - loop: event_loop.TimerLoop that reads tcpdump's stdout (None = plain iteration)
+    """
+
+    def __init__(
+        self,
+        iface: str,
+        bpf: str = "",
+        sudo: bool = False,
+        tcpdump: str = "tcpdump",
+        command: Optional[List[str]] = None,
+        restart_delay_s: float = 1.0,
+        max_restart_delay_s: float = 30.0,
+        max_restarts: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+        loop: Optional[Any] = None,
+    ):
+        if restart_delay_s < 0 or max_restart_delay_s < restart_delay_s:
+            raise ValueError("need 0 <= restart_delay_s <= max_restart_delay_s")
+        self.iface = iface
+        self.bpf = bpf
+        if command is None:
+            command = [tcpdump, "-i", iface, *TCPDUMP_ARGS]
+            if bpf:
+                command.append(bpf)
+            if sudo:
+                command = ["sudo", "-n", *command]
+        self.command = list(command)
+        self.restart_delay_s = float(restart_delay_s)
+        self.max_restart_delay_s = float(max_restart_delay_s)
+        self.max_restarts = max_restarts
+        self._clock = clock
+        self.loop = loop
+
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+        self._totals: Dict[str, int] = dict.fromkeys(_STAT_KEYS.values(), 0)
+        self._run: Dict[str, int] = {}
+        self.restarts = 0
+        self.lines = 0
+        self.last_exit: Optional[int] = None
+        self.stderr_tail: Deque[str] = deque(maxlen=20)
+
+    # --- Iteration ---------------------------------------------------------------
+
+    def __iter__(self) -> Iterator[bytes]:
+        delay = self.restart_delay_s
+        while not self._stopping.is_set():
+            started = self._clock()
+            proc = self._spawn()
+            reader = threading.Thread(
+                target=self._read_stderr, args=(proc,), name="tcpdump-stderr"
+            )
+            reader.daemon = True
+            reader.start()
+            try:
+                lines = self.loop.lines(proc.stdout) if self.loop else proc.stdout
+                for line in lines:
+                    self.lines += 1
+                    yield line
+            finally:
+                if proc.poll() is None:
+                    self._terminate(proc)
+                self.last_exit = proc.wait()
+                reader.join(timeout=5)
+                self._end_run()
+
+            if self._stopping.is_set():
+                break
+            if self._clock() - started >= _STABLE_RUN_S:
+                delay = self.restart_delay_s
+            log.warning(
+                "tcpdump exited with status %s: %s",
+                self.last_exit,
+                " | ".join(self.stderr_tail) or "(no output)",
+            )
+            if self.max_restarts is not None and self.restarts >= self.max_restarts:
+                log.error("tcpdump restart limit (%d) reached", self.max_restarts)
+                break
+            self.restarts += 1
+            log.info("Restarting tcpdump in %.1fs (restart #%d)", delay, self.restarts)
+            if self._stopping.wait(delay):
+                break
+            delay = min(delay * 2 or self.restart_delay_s, self.max_restart_delay_s)
+
+    def _spawn(self) -> subprocess.Popen:
+        log.info("Starting capture: %s", " ".join(self.command))
+        proc = subprocess.Popen(
+            self.command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        with self._lock:
+            self._proc = proc
+            self._run = {}
+        self.stderr_tail.clear()
+        if self._stopping.is_set():  # stop() raced with the restart
+            self._terminate(proc)
+        return proc
+
+    def _read_stderr(self, proc: subprocess.Popen) -> None:
+        for raw in proc.stderr:
+            counters = parse_tcpdump_stats(raw)
+            if counters:
+                with self._lock:
+                    self._run.update(counters)
+                continue
+            text = raw.decode("utf-8", errors="replace").strip()
+            if text:
+                self.stderr_tail.append(text)
+                log.debug("tcpdump: %s", text)
+
+    def _end_run(self) -> None:
+        """Fold the finished run's counters into the totals."""
+        with self._lock:
+            for k, v in self._run.items():
+                self._totals[k] += v
+            self._run = {}
+            self._proc = None
+
+    @staticmethod
+    def _terminate(proc: subprocess.Popen) -> None:
+        proc.terminate()  # tcpdump prints its counters on SIGTERM too
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    # --- Control -----------------------------------------------------------------
+
+    def stop(self) -> None:
+        """Stop capturing; safe to call from a signal handler or another thread."""
+        self._stopping.set()
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            try:
+                proc.terminate()
+            except OSError:
+                pass
+
+    def fileno(self) -> Optional[int]:
+        """fd of the running tcpdump's stdout pipe (e.g. for a FIONREAD backlog check)."""
+        proc = self._proc
+        return proc.stdout.fileno() if proc is not None else None
+
+    def request_stats(self) -> bool:
+        """Ask the running tcpdump to report its counters (picked up from stderr)."""
+        proc = self._proc
+        if proc is None or proc.poll() is not None:
+            return False
+        try:
+            proc.send_signal(signal.SIGUSR1)
+        except OSError:
+            return False
+        return True
+
+    # --- Reporting ---------------------------------------------------------------
+
+    def stats(self) -> Dict[str, object]:
+        """Counters summed over all tcpdump runs (the current one as last reported)."""
+        with self._lock:
+            out: Dict[str, object] = {
+                k: v + self._run.get(k, 0) for k, v in self._totals.items()
+            }
+            out["running"] = self._proc is not None
+        out["restarts"] = self.restarts
+        out["lines"] = self.lines
+        out["last_exit"] = self.last_exit
+        return out
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (
+            f"captured={s['captured']} received={s['received']} "
+            f"dropped_kernel={s['dropped_kernel']} dropped_iface={s['dropped_iface']} "
+            f"restarts={s['restarts']}"
+        )
+
+    def samples(self) -> List[Tuple[str, str, str, float]]:
+        """Metrics collector: tcpdump's packet counters and restart count."""
+        s = self.stats()
+        return [
+            (
+                "capture_packets_captured_total",
+                "counter",
+                "Packets tcpdump handed to the endpoint",
+                s["captured"],
+            ),
+            (
+                "capture_packets_received_total",
+                "counter",
+                "Packets that passed the BPF filter",
+                s["received"],
+            ),
+            (
+                'capture_packets_dropped_total{where="kernel"}',
+                "counter",
+                "Packets dropped for lack of buffer space",
+                s["dropped_kernel"],
+            ),
+            (
+                'capture_packets_dropped_total{where="interface"}',
+                "counter",
+                "Packets dropped by the network interface",
+                s["dropped_iface"],
+            ),
+            (
+                "capture_restarts_total",
+                "counter",
+                "tcpdump restarts after an unexpected exit",
+                self.restarts,
+            ),
+        ]
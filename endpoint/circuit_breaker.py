@@ -0,0 +1,110 @@
+"""
+circuit_breaker.py
+A small closed / open / half-open circuit breaker used by the Shipper to stop hammering
+an unreachable server.
+
+Usage pattern:
+    from circuit_breaker import CircuitBreaker
+
+    breaker = CircuitBreaker(failure_threshold=5, cooldown_s=30.0)
+    if breaker.allow_request():
+        ok = do_post()
+        breaker.record_success() if ok else breaker.record_failure()
+    else:
+        park_for_later()
+
+States:
+    closed     normal operation; consecutive failures are counted
+    open       entered after failure_threshold consecutive failures; requests are refused
+               until cooldown_s has elapsed
+    half_open  after the cooldown exactly one probe request is allowed; success closes the
+               breaker, failure re-opens it for another cooldown
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with a single half-open probe.
+
+    on_transition(old_state, new_state, consecutive_failures) is called on every state
+    change (e.g. to log it); transitions are also counted in self.transitions.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        cooldown_s: float = 30.0,
+        on_transition: Optional[Callable[[str, str, int], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be >= 1")
+        self.failure_threshold = int(failure_threshold)
+        self.cooldown_s = float(cooldown_s)
+        self.on_transition = on_transition
+        self._clock = clock
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.transitions: Dict[str, int] = {}
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def _set_state(self, new_state: str) -> None:
+        old = self.state
+        if old == new_state:
+            return
+        self.state = new_state
+        key = f"{old}->{new_state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        if self.on_transition is not None:
+            self.on_transition(old, new_state, self.consecutive_failures)
+
+    def cooldown_remaining(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.cooldown_s - self._clock())
+
+    def allow_request(self) -> bool:
+        """
+        True if a request may be sent now. When the cooldown of an open breaker has
+        elapsed this moves to half_open and grants exactly one probe.
+        """
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if self.cooldown_remaining() > 0:
+                return False
+            self._set_state(HALF_OPEN)
+        # half_open: only one probe at a time
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def cancel_probe(self) -> None:
+        """Give back a probe slot granted by allow_request() that was not used."""
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or (
+            self.state == CLOSED and self.consecutive_failures >= self.failure_threshold
+        ):
+            self._probe_in_flight = False
+            self._opened_at = self._clock()
+            self._set_state(OPEN)
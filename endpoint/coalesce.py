@@ -0,0 +1,85 @@
+"""
+coalesce.py
+In-batch coalescing for raw per-packet records, applied by the Shipper before upload.
+
+Usage pattern:
+    from coalesce import coalesce_records
+
+    out = coalesce_records(batch, mode="max", bucket_s=1.0)
+
+Modes:
+    "dedupe"  drop exact duplicate records only (same mac, rssi, timestamp, ...)
+    "max"     dedupe, then collapse each (mac, timestamp bucket) to its strongest RSSI
+    "median"  dedupe, then collapse each (mac, timestamp bucket) to its median RSSI
+
+A collapsed record keeps the fields of the latest record in its bucket, with "rssi"
+replaced by the reduced value, so the output shape stays {mac, rssi, timestamp, ...}.
+Records lacking a mac or numeric timestamp are passed through untouched.
+"""
+
+from __future__ import annotations
+
+import math
+from statistics import median
+from typing import Any, Dict, List, Tuple
+
+COALESCE_MODES = ("dedupe", "max", "median")
+
+
+def _dedupe_key(rec: Dict[str, Any]) -> Tuple:
+    return tuple(sorted((k, repr(v)) for k, v in rec.items()))
+
+
+def coalesce_records(
+    records: List[Dict[str, Any]], mode: str = "max", bucket_s: float = 1.0
+) -> List[Dict[str, Any]]:
+    """Return a new list with duplicates removed and (optionally) buckets collapsed."""
+    if mode not in COALESCE_MODES:
+        raise ValueError(f"coalesce mode must be one of {COALESCE_MODES}, got {mode!r}")
+    if bucket_s <= 0:
+        raise ValueError("bucket_s must be > 0")
+
+    # 1) Exact duplicate elimination (order preserving)
+    seen = set()
+    unique: List[Dict[str, Any]] = []
+    for rec in records:
+        key = _dedupe_key(rec)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(rec)
+
+    if mode == "dedupe":
+        return unique
+
+    # 2) Collapse by (mac, timestamp bucket); output ordered by first appearance
+    groups: Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+    out: List[Any] = []
+    for rec in unique:
+        mac = rec.get("mac")
+        ts = rec.get("timestamp", rec.get("ts"))
+        if not mac or not isinstance(ts, (int, float)) or rec.get("rssi") is None:
+            out.append(rec)
+            continue
+        key = (str(mac), math.floor(float(ts) / bucket_s))
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = []
+            out.append(key)
+        group.append(rec)
+
+    result: List[Dict[str, Any]] = []
+    for item in out:
+        if isinstance(item, dict):
+            result.append(item)
+            continue
+        group = groups[item]
+        if len(group) == 1:
+            result.append(group[0])
+            continue
+        rssis = [int(r["rssi"]) for r in group]
+        latest = max(group, key=lambda r: float(r.get("timestamp", r.get("ts"))))
+        merged = dict(latest)
+        merged["rssi"] = max(rssis) if mode == "max" else int(round(median(rssis)))
+        result.append(merged)
+    return result
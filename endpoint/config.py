@@ -3,6 +3,8 @@ import os
 from urllib.parse import urlparse
 from dotenv import load_dotenv
 
+from sanitize import parse_mac_list
+
 load_dotenv()  # take environment variables from .env file
 
 
@@ -20,6 +22,67 @@ class Config:
         heartbeat_sec (int): Interval between heartbeat messages (seconds). Defaults to 30.
         batch_max (int): Max number of log records per batch. Defaults to 200.
         batch_interval (int): Max seconds to wait before sending a batch. Defaults to 5.
+        batch_adaptive (bool): AIMD-tune batch size/interval at runtime. Defaults to False.
+        batch_min (int): Adaptive lower bound for the batch size. Defaults to 10.
+        batch_ceiling (int): Adaptive upper bound for the batch size. Defaults to 2000.
+        batch_target_latency_ms (int): POST latency above which batches shrink. Defaults to 2000.
+        batch_max_age (int): Max seconds a record may wait in a batch (adaptive). Defaults to 30.
+        coalesce (str): In-batch coalescing: off, dedupe, max or median. Defaults to 'off'.
+        coalesce_bucket_ms (int): Coalescing time bucket (milliseconds). Defaults to 1000.
+        breaker_threshold (int): Consecutive POST failures that open the circuit breaker
+            (0 disables it; parked records are lost if the process exits). Defaults to 0.
+        breaker_cooldown (int): Seconds the breaker stays open before a probe. Defaults to 30.
+        park_max_records (int): Records held in memory while the breaker is open. Defaults to 50000.
+        fresh_window (int): Records younger than this (seconds) are delivered newest-first
+            after an outage; 0 disables freshness ordering. Defaults to 0.
+        record_ttl (int): Records older than this (seconds) are dropped or demoted;
+            0 disables the TTL. Defaults to 0. Both judge age by the wall clock, so
+            stream.py ignores them for --from input that is not a rebased replay.
+        ttl_action (str): What to do with expired records: drop or backfill. Defaults to 'drop'.
+        backlog_rate (int): Max records/second sent from the backlog lanes. Defaults to 200.
+        batch_max_bytes (int): Max JSON body size per POST (0 = no byte limit). Defaults to 524288.
+        frame_include (str): Comma-separated frame types to parse (e.g. 'probe_request,data');
+            empty parses all types. Defaults to ''.
+        frame_exclude (str): Comma-separated frame types dropped before parsing
+            (e.g. 'beacon,rts'). Defaults to ''.
+        capture_exclude_macs (str): Comma-separated transmitter MACs (e.g. known APs) the
+            kernel BPF filter drops when stream.py runs tcpdump itself. Defaults to ''.
+        infra_mode (str): Learned infrastructure (AP) records: off, suppress or downsample.
+            Defaults to 'off'.
+        infra_registry_path (str): File the learned registry is persisted to
+            (empty = memory only). Defaults to ''.
+        infra_keep_sec (int): With downsample, keep one record per AP per this many
+            seconds. Defaults to 60.
+        infra_stable_sec (int): A transmitter whose RSSI stays within infra_stable_db
+            over this many seconds is learned as infrastructure. Defaults to 600.
+        infra_stable_db (int): RSSI standard deviation (dB) for the stability rule.
+            Defaults to 2.
+        infra_allow (str): Comma-separated MACs never treated as infrastructure. Defaults to ''.
+        infra_deny (str): Comma-separated MACs always treated as infrastructure. Defaults to ''.
+        load_shed (bool): Degrade (per-MAC sampling, data frames only, aggregate only)
+            while the stream lags behind the capture; recover when it catches up.
+            Defaults to False.
+        load_shed_lag_ms (int): Capture-to-wall-clock lag that counts as falling behind
+            (recovery below a quarter of it). Defaults to 2000.
+        load_shed_backlog_kb (int): Unread bytes in the input pipe that count as falling
+            behind (recovery below a quarter of it). Defaults to 48.
+        dedupe (bool): Drop 802.11 retransmissions (same IV, or Retry flag within
+            dedupe_gap_ms) before aggregation and shipping. Defaults to False.
+        dedupe_gap_ms (int): Retry frames without an IV this close to the previous frame
+            of the same MAC and type are copies. Defaults to 50.
+        random_mac_mode (str): Randomized (locally administered) MACs: off, summary (kept
+            off the uplink; per-window counts and RSSI distribution exported as metrics)
+            or drop. Defaults to 'off'.
+        random_mac_window_sec (int): Summary window for randomized MACs. Defaults to 10.
+        snapshot_mode (str): Ship a per-MAC RSSI table instead of every record: off,
+            latest or median (of the samples since the last push). Defaults to 'off'.
+        snapshot_interval_sec (int): Seconds between snapshot pushes. Defaults to 5.
+        snapshot_min_delta_db (int): RSSI change (dB) that makes an entry worth pushing
+            again. Defaults to 2.
+        snapshot_refresh_sec (int): Re-push an unchanged entry after this many seconds
+            (keep it below the heatmap's 5-minute window). Defaults to 60.
+        sanitize (str): Records the server would reject (bad MAC, RSSI outside -100..0,
+            bad timestamp): off, drop or clamp (pin RSSI into range). Defaults to 'off'.
     """
 
     endpoint_id: str
@@ -31,6 +94,43 @@ class Config:
     heartbeat_sec: int = 30
     batch_max: int = 200
     batch_interval: int = 5
+    batch_adaptive: bool = False
+    batch_min: int = 10
+    batch_ceiling: int = 2000
+    batch_target_latency_ms: int = 2000
+    batch_max_age: int = 30
+    coalesce: str = "off"
+    coalesce_bucket_ms: int = 1000
+    breaker_threshold: int = 0
+    breaker_cooldown: int = 30
+    park_max_records: int = 50000
+    fresh_window: int = 0
+    record_ttl: int = 0
+    ttl_action: str = "drop"
+    backlog_rate: int = 200
+    batch_max_bytes: int = 524288
+    frame_include: str = ""
+    frame_exclude: str = ""
+    capture_exclude_macs: str = ""
+    sanitize: str = "off"
+    load_shed: bool = False
+    load_shed_lag_ms: int = 2000
+    load_shed_backlog_kb: int = 48
+    dedupe: bool = False
+    dedupe_gap_ms: int = 50
+    random_mac_mode: str = "off"
+    random_mac_window_sec: int = 10
+    infra_mode: str = "off"
+    infra_registry_path: str = ""
+    infra_keep_sec: int = 60
+    infra_stable_sec: int = 600
+    infra_stable_db: int = 2
+    infra_allow: str = ""
+    infra_deny: str = ""
+    snapshot_mode: str = "off"
+    snapshot_interval_sec: int = 5
+    snapshot_min_delta_db: int = 2
+    snapshot_refresh_sec: int = 60
 
 
 def _require(env_name: str) -> str:
@@ -55,6 +155,14 @@ def _is_truthy(s: str | None) -> bool:
     return str(s or "").strip().lower() in {"1", "true", "yes", "on"}
 
 
+def _mac_list(name: str) -> str:
+    """Comma-separated MACs from env, normalized to 'aa:bb:cc:dd:ee:ff,...'."""
+    try:
+        return ",".join(parse_mac_list(os.getenv(name, "")))
+    except ValueError as e:
+        raise ValueError(f"{name}: {e}") from None
+
+
 def _validate_url(url: str, allow_insecure_http: bool):
     """Validate that the URL has a scheme+host and (unless allowed) uses HTTPS."""
     p = urlparse(url)
@@ -82,12 +190,124 @@ def load_config() -> Config:
     heartbeat_sec = _as_int("HEARTBEAT_SEC", os.getenv("HEARTBEAT_SEC"), 30)
     batch_max = _as_int("BATCH_MAX", os.getenv("BATCH_MAX"), 200)
     batch_interval = _as_int("BATCH_INTERVAL_SEC", os.getenv("BATCH_INTERVAL_SEC"), 5)
+    batch_adaptive = _is_truthy(os.getenv("BATCH_ADAPTIVE"))
+    batch_min = _as_int("BATCH_MIN", os.getenv("BATCH_MIN"), 10)
+    batch_ceiling = _as_int("BATCH_CEILING", os.getenv("BATCH_CEILING"), 2000)
+    batch_target_latency_ms = _as_int(
+        "BATCH_TARGET_LATENCY_MS", os.getenv("BATCH_TARGET_LATENCY_MS"), 2000
+    )
+    batch_max_age = _as_int("BATCH_MAX_AGE_SEC", os.getenv("BATCH_MAX_AGE_SEC"), 30)
+    coalesce = os.getenv("COALESCE", "off").strip().lower()
+    coalesce_bucket_ms = _as_int(
+        "COALESCE_BUCKET_MS", os.getenv("COALESCE_BUCKET_MS"), 1000
+    )
+
+    breaker_threshold = _as_int("BREAKER_THRESHOLD", os.getenv("BREAKER_THRESHOLD"), 0)
+    breaker_cooldown = _as_int(
+        "BREAKER_COOLDOWN_SEC", os.getenv("BREAKER_COOLDOWN_SEC"), 30
+    )
+    park_max_records = _as_int("PARK_MAX_RECORDS", os.getenv("PARK_MAX_RECORDS"), 50000)
+
+    fresh_window = _as_int("FRESH_WINDOW_SEC", os.getenv("FRESH_WINDOW_SEC"), 0)
+    record_ttl = _as_int("RECORD_TTL_SEC", os.getenv("RECORD_TTL_SEC"), 0)
+    ttl_action = os.getenv("TTL_ACTION", "drop").strip().lower()
+    backlog_rate = _as_int("BACKLOG_RATE", os.getenv("BACKLOG_RATE"), 200)
+    batch_max_bytes = _as_int("BATCH_MAX_BYTES", os.getenv("BATCH_MAX_BYTES"), 524288)
+    frame_include = os.getenv("FRAME_INCLUDE", "").strip().lower()
+    frame_exclude = os.getenv("FRAME_EXCLUDE", "").strip().lower()
+    sanitize = os.getenv("SANITIZE", "off").strip().lower()
+    capture_exclude_macs = _mac_list("CAPTURE_EXCLUDE_MACS")
+    load_shed = _is_truthy(os.getenv("LOAD_SHED"))
+    load_shed_lag_ms = _as_int("LOAD_SHED_LAG_MS", os.getenv("LOAD_SHED_LAG_MS"), 2000)
+    load_shed_backlog_kb = _as_int(
+        "LOAD_SHED_BACKLOG_KB", os.getenv("LOAD_SHED_BACKLOG_KB"), 48
+    )
+    dedupe = _is_truthy(os.getenv("DEDUPE"))
+    dedupe_gap_ms = _as_int("DEDUPE_GAP_MS", os.getenv("DEDUPE_GAP_MS"), 50)
+    random_mac_mode = os.getenv("RANDOM_MAC_MODE", "off").strip().lower()
+    random_mac_window_sec = _as_int(
+        "RANDOM_MAC_WINDOW_SEC", os.getenv("RANDOM_MAC_WINDOW_SEC"), 10
+    )
+    infra_mode = os.getenv("INFRA_MODE", "off").strip().lower()
+    infra_registry_path = os.getenv("INFRA_REGISTRY_PATH", "").strip()
+    infra_keep_sec = _as_int("INFRA_KEEP_SEC", os.getenv("INFRA_KEEP_SEC"), 60)
+    infra_stable_sec = _as_int("INFRA_STABLE_SEC", os.getenv("INFRA_STABLE_SEC"), 600)
+    infra_stable_db = _as_int("INFRA_STABLE_DB", os.getenv("INFRA_STABLE_DB"), 2)
+    infra_allow = _mac_list("INFRA_ALLOW")
+    infra_deny = _mac_list("INFRA_DENY")
+    snapshot_mode = os.getenv("SNAPSHOT_MODE", "off").strip().lower()
+    snapshot_interval_sec = _as_int(
+        "SNAPSHOT_INTERVAL_SEC", os.getenv("SNAPSHOT_INTERVAL_SEC"), 5
+    )
+    snapshot_min_delta_db = _as_int(
+        "SNAPSHOT_MIN_DELTA_DB", os.getenv("SNAPSHOT_MIN_DELTA_DB"), 2
+    )
+    snapshot_refresh_sec = _as_int(
+        "SNAPSHOT_REFRESH_SEC", os.getenv("SNAPSHOT_REFRESH_SEC"), 60
+    )
 
     # Validate log level
     valid_levels = {"DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"}
     if log_level not in valid_levels:
         raise ValueError(f"LOG_LEVEL must be one of {valid_levels}, got {log_level!r}")
 
+    # Validate adaptive batching bounds
+    if batch_min < 1 or batch_ceiling < batch_min:
+        raise ValueError("BATCH_MIN must be >= 1 and <= BATCH_CEILING")
+
+    # Validate coalescing mode
+    valid_coalesce = {"off", "dedupe", "max", "median"}
+    if coalesce not in valid_coalesce:
+        raise ValueError(f"COALESCE must be one of {valid_coalesce}, got {coalesce!r}")
+    if coalesce_bucket_ms <= 0:
+        raise ValueError("COALESCE_BUCKET_MS must be > 0")
+
+    # Validate freshness / TTL delivery policy
+    if ttl_action not in {"drop", "backfill"}:
+        raise ValueError(f"TTL_ACTION must be drop or backfill, got {ttl_action!r}")
+    if record_ttl and fresh_window and record_ttl < fresh_window:
+        raise ValueError("RECORD_TTL_SEC must be >= FRESH_WINDOW_SEC")
+
+    # Validate edge-side record validation mode
+    if sanitize not in {"off", "drop", "clamp"}:
+        raise ValueError(f"SANITIZE must be off, drop or clamp, got {sanitize!r}")
+
+    # Validate load-shedding thresholds
+    if load_shed_lag_ms <= 0 or load_shed_backlog_kb <= 0:
+        raise ValueError("LOAD_SHED_LAG_MS and LOAD_SHED_BACKLOG_KB must be > 0")
+
+    # Validate retransmission dedupe
+    if dedupe_gap_ms < 0:
+        raise ValueError("DEDUPE_GAP_MS must be >= 0")
+
+    # Validate randomized-MAC collapsing
+    if random_mac_mode not in {"off", "summary", "drop"}:
+        raise ValueError(
+            f"RANDOM_MAC_MODE must be off, summary or drop, got {random_mac_mode!r}"
+        )
+    if random_mac_window_sec <= 0:
+        raise ValueError("RANDOM_MAC_WINDOW_SEC must be > 0")
+
+    # Validate the infrastructure registry policy
+    if infra_mode not in {"off", "suppress", "downsample"}:
+        raise ValueError(
+            f"INFRA_MODE must be off, suppress or downsample, got {infra_mode!r}"
+        )
+    if infra_keep_sec <= 0 or infra_stable_sec <= 0:
+        raise ValueError("INFRA_KEEP_SEC and INFRA_STABLE_SEC must be > 0")
+
+    # Validate the RSSI snapshot mode
+    if snapshot_mode not in {"off", "latest", "median"}:
+        raise ValueError(
+            f"SNAPSHOT_MODE must be off, latest or median, got {snapshot_mode!r}"
+        )
+    if snapshot_interval_sec <= 0 or snapshot_min_delta_db < 0:
+        raise ValueError(
+            "SNAPSHOT_INTERVAL_SEC must be > 0 and SNAPSHOT_MIN_DELTA_DB >= 0"
+        )
+    if snapshot_refresh_sec < snapshot_interval_sec:
+        raise ValueError("SNAPSHOT_REFRESH_SEC must be >= SNAPSHOT_INTERVAL_SEC")
+
     # Return a validated, immutable Config instance
     return Config(
         endpoint_id=endpoint_id,
@@ -99,4 +319,41 @@ def load_config() -> Config:
         heartbeat_sec=heartbeat_sec,
         batch_max=batch_max,
         batch_interval=batch_interval,
+        batch_adaptive=batch_adaptive,
+        batch_min=batch_min,
+        batch_ceiling=batch_ceiling,
+        batch_target_latency_ms=batch_target_latency_ms,
+        batch_max_age=batch_max_age,
+        coalesce=coalesce,
+        coalesce_bucket_ms=coalesce_bucket_ms,
+        breaker_threshold=breaker_threshold,
+        breaker_cooldown=breaker_cooldown,
+        park_max_records=park_max_records,
+        fresh_window=fresh_window,
+        record_ttl=record_ttl,
+        ttl_action=ttl_action,
+        backlog_rate=backlog_rate,
+        batch_max_bytes=batch_max_bytes,
+        frame_include=frame_include,
+        frame_exclude=frame_exclude,
+        capture_exclude_macs=capture_exclude_macs,
+        sanitize=sanitize,
+        load_shed=load_shed,
+        load_shed_lag_ms=load_shed_lag_ms,
+        load_shed_backlog_kb=load_shed_backlog_kb,
+        dedupe=dedupe,
+        dedupe_gap_ms=dedupe_gap_ms,
+        random_mac_mode=random_mac_mode,
+        random_mac_window_sec=random_mac_window_sec,
+        infra_mode=infra_mode,
+        infra_registry_path=infra_registry_path,
+        infra_keep_sec=infra_keep_sec,
+        infra_stable_sec=infra_stable_sec,
+        infra_stable_db=infra_stable_db,
+        infra_allow=infra_allow,
+        infra_deny=infra_deny,
+        snapshot_mode=snapshot_mode,
+        snapshot_interval_sec=snapshot_interval_sec,
+        snapshot_min_delta_db=snapshot_min_delta_db,
+        snapshot_refresh_sec=snapshot_refresh_sec,
     )
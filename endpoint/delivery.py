@@ -0,0 +1,253 @@
+"""
+delivery.py
+Freshness-aware holding lanes for records the Shipper could not send immediately
+(circuit breaker open, backlog after an outage, records past their TTL).
+
+Usage pattern:
+    from delivery import DeliveryLanes
+
+    lanes = DeliveryLanes(fresh_s=300, ttl_s=3600, ttl_action="backfill", backlog_rate=200)
+    lanes.add(batch)                 # classify by record age and hold
+    item, dropped = lanes.pop(max_records=200)  # dropped: expired while held
+    if item:
+        lane, records = item         # lane is "live", "backlog" or "backfill"
+
+Lanes (highest priority first):
+    live      records younger than fresh_s; served LIFO (newest batch first) so the heatmap,
+              which only looks at the last few minutes, recovers first after an outage
+    backlog   records older than fresh_s but within ttl_s; served newest-first, capped at
+              backlog_rate records/second so it trickles behind live data
+    backfill  records older than ttl_s when ttl_action="backfill"; only served when the
+              other lanes are empty (same rate cap). With ttl_action="drop" they are discarded.
+
+With fresh_s=None freshness is disabled: every held batch goes to the backlog lane and is
+served oldest-first with no rate cap (plain FIFO parking).
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+LIVE = "live"
+BACKLOG = "backlog"
+BACKFILL = "backfill"
+TTL_ACTIONS = ("drop", "backfill")
+
+Record = Dict[str, Any]
+
+
+def _record_ts(rec: Record) -> Optional[float]:
+    ts = rec.get("timestamp", rec.get("ts"))
+    return float(ts) if isinstance(ts, (int, float)) else None
+
+
+class DeliveryLanes:
+    """
+    Bounded, age-classified storage of pending batches.
+
+    - classify(records, now): split records into (live, backlog, expired) by age
+    - add(records, now): classify and hold; returns the number of records dropped
+    - pop(max_records, now): (next (lane, records) to send or None if nothing is due,
+      records dropped on the way)
+    """
+
+    def __init__(
+        self,
+        fresh_s: Optional[float] = None,
+        ttl_s: Optional[float] = None,
+        ttl_action: str = "drop",
+        backlog_rate: Optional[float] = None,
+        max_records: int = 50000,
+        clock: Callable[[], float] = time.time,
+    ):
+        if ttl_action not in TTL_ACTIONS:
+            raise ValueError(
+                f"ttl_action must be one of {TTL_ACTIONS}, got {ttl_action!r}"
+            )
+        self.fresh_s = float(fresh_s) if fresh_s else None
+        self.ttl_s = float(ttl_s) if ttl_s else None
+        self.ttl_action = ttl_action
+        self.backlog_rate = float(backlog_rate) if backlog_rate else None
+        self.max_records = int(max_records)
+        self._clock = clock
+
+        self._lanes: Dict[str, Deque[List[Record]]] = {
+            LIVE: deque(),
+            BACKLOG: deque(),
+            BACKFILL: deque(),
+        }
+        self._sizes: Dict[str, int] = {LIVE: 0, BACKLOG: 0, BACKFILL: 0}
+
+        # Token bucket for the backlog/backfill lanes (burst = one second of rate)
+        self._tokens = self.backlog_rate or 0.0
+        self._tokens_at = self._clock()
+
+        self.expired_dropped = 0
+        self.expired_demoted = 0
+        self.overflow_dropped = 0
+
+    @property
+    def freshness_enabled(self) -> bool:
+        return self.fresh_s is not None
+
+    def __len__(self) -> int:
+        return sum(self._sizes.values())
+
+    def batches(self) -> int:
+        return sum(len(q) for q in self._lanes.values())
+
+    # ---------------- Classification ----------------
+
+    def classify(
+        self, records: List[Record], now: Optional[float] = None
+    ) -> Tuple[List[Record], List[Record], List[Record]]:
+        """Split records into (live, backlog, expired) by capture-timestamp age."""
+        if not self.freshness_enabled and self.ttl_s is None:
+            return [], list(records), []
+        now = self._clock() if now is None else now
+        live: List[Record] = []
+        backlog: List[Record] = []
+        expired: List[Record] = []
+        for rec in records:
+            ts = _record_ts(rec)
+            age = (now - ts) if ts is not None else 0.0
+            if self.ttl_s is not None and age > self.ttl_s:
+                expired.append(rec)
+            elif self.fresh_s is not None and age <= self.fresh_s:
+                live.append(rec)
+            else:
+                backlog.append(rec)
+        if not self.freshness_enabled:
+            # TTL only: everything that survived is plain backlog
+            backlog, live = live + backlog, []
+        return live, backlog, expired
+
+    # ---------------- Holding ----------------
+
+    def _push(self, lane: str, records: List[Record]) -> None:
+        if records:
+            self._lanes[lane].append(records)
+            self._sizes[lane] += len(records)
+
+    def add(self, records: List[Record], now: Optional[float] = None) -> int:
+        """Hold records in the lane matching their age. Returns records dropped."""
+        live, backlog, expired = self.classify(records, now)
+        dropped = self.demote(expired)
+        self._push(LIVE, live)
+        self._push(BACKLOG, backlog)
+        return dropped + self._enforce_bound()
+
+    def demote(self, expired: List[Record]) -> int:
+        """Move expired records to the backfill lane, or drop them. Returns records dropped."""
+        if not expired:
+            return 0
+        if self.ttl_action == "backfill":
+            self._push(BACKFILL, expired)
+            self.expired_demoted += len(expired)
+            return self._enforce_bound()
+        self.expired_dropped += len(expired)
+        return len(expired)
+
+    def _enforce_bound(self) -> int:
+        """Drop oldest data (backfill, then backlog, then live) beyond max_records."""
+        dropped = 0
+        for lane in (BACKFILL, BACKLOG, LIVE):
+            q = self._lanes[lane]
+            while len(self) > self.max_records and q:
+                old = q.popleft()
+                self._sizes[lane] -= len(old)
+                dropped += len(old)
+        self.overflow_dropped += dropped
+        return dropped
+
+    # ---------------- Serving ----------------
+
+    def _take_tokens(self, want: int, now: float) -> int:
+        if self.backlog_rate is None:
+            return want
+        self._tokens = min(
+            self.backlog_rate,
+            self._tokens + (now - self._tokens_at) * self.backlog_rate,
+        )
+        self._tokens_at = now
+        granted = min(want, int(self._tokens))
+        self._tokens -= granted
+        return granted
+
+    def _pop_lane(
+        self, lane: str, max_records: Optional[int], newest_first: bool
+    ) -> List[Record]:
+        q = self._lanes[lane]
+        batch = q.pop() if newest_first else q.popleft()
+        if max_records is not None and len(batch) > max_records:
+            # Serve part of the batch; hold the remainder in place
+            if newest_first:
+                batch, rest = batch[-max_records:], batch[:-max_records]
+                q.append(rest)
+            else:
+                batch, rest = batch[:max_records], batch[max_records:]
+                q.appendleft(rest)
+        self._sizes[lane] -= len(batch)
+        return batch
+
+    def pop(
+        self, max_records: Optional[int] = None, now: Optional[float] = None
+    ) -> Tuple[Optional[Tuple[str, List[Record]]], int]:
+        """
+        Return (item, dropped): item is the next (lane, records) to send, or None if
+        nothing is due now; dropped counts records that expired while held.
+        """
+        now = self._clock() if now is None else now
+        dropped = 0
+
+        if self.freshness_enabled:
+            while self._lanes[LIVE]:
+                batch = self._pop_lane(LIVE, max_records, newest_first=True)
+                # Records may have aged while held: re-classify before serving
+                live, backlog, expired = self.classify(batch, now)
+                self._push(BACKLOG, backlog)
+                dropped += self.demote(expired)
+                if live:
+                    return (LIVE, live), dropped
+
+        for lane in (BACKLOG, BACKFILL):
+            if not self._lanes[lane]:
+                continue
+            if self.ttl_s is not None and lane == BACKLOG:
+                dropped += self._expire_backlog(now)
+                if not self._lanes[lane]:
+                    continue
+            granted = self._take_tokens(
+                min(max_records or self._sizes[lane], self._sizes[lane]), now
+            )
+            if granted <= 0:
+                return None, dropped
+            batch = self._pop_lane(lane, granted, newest_first=self.freshness_enabled)
+            return (lane, batch), dropped
+        return None, dropped
+
+    def _expire_backlog(self, now: float) -> int:
+        """Move expired records out of the backlog lane. Returns records dropped."""
+        kept: Deque[List[Record]] = deque()
+        expired: List[Record] = []
+        for batch in self._lanes[BACKLOG]:
+            live, keep, gone = self.classify(batch, now)
+            keep = live + keep
+            if keep:
+                kept.append(keep)
+            expired.extend(gone)
+        self._lanes[BACKLOG] = kept
+        self._sizes[BACKLOG] = sum(len(b) for b in kept)
+        return self.demote(expired)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "live_records": self._sizes[LIVE],
+            "backlog_records": self._sizes[BACKLOG],
+            "backfill_records": self._sizes[BACKFILL],
+            "expired_dropped": self.expired_dropped,
+            "expired_demoted": self.expired_demoted,
+            "overflow_dropped": self.overflow_dropped,
+        }
@@ -0,0 +1,184 @@
+"""
+event_loop.py
+A small select()-based line reader with periodic timers, so time-driven work
+(closing aggregation windows, progress logs, file rotation) runs on schedule whether or
+not input arrives.
+
+Iterating `for line in sys.stdin` blocks until the next line: on a quiet channel nothing
+that is driven from the loop body runs, and windows that should have closed seconds ago
+stay open. TimerLoop.lines() waits on the input fd with a timeout instead and runs due
+timers between reads and while the input is idle.
+
+Usage pattern:
+    from event_loop import CaptureClock, TimerLoop
+
+    loop = TimerLoop()
+    clock = CaptureClock()
+    loop.every(0.5, lambda: aggr.flush_expired(clock.now()))
+    for line in loop.lines(sys.stdin.buffer, encoding="utf-8", stop=lambda: stopped):
+        rec = parse_line(line)
+        clock.ts = rec["timestamp"]     # one attribute store per record
+        ...
+    loop.run_due()                      # sources the loop does not read (e.g. replay)
+
+Behaviour:
+    - input is read in chunks of up to chunk_size bytes and split on b"\\n"; lines keep
+      their newline, a trailing partial line is yielded at EOF
+    - due timers run after every chunk and whenever select() times out, so a timer is
+      late by at most one chunk's processing time (or max_wait_s while idle)
+    - a timer that falls behind is not run repeatedly to catch up; it runs once and is
+      rescheduled one interval ahead
+    - sources without a usable fd (io.StringIO in tests) are iterated directly, with
+      timers checked after every line
+    - regular files are always readable; they are read without select()
+"""
+
+from __future__ import annotations
+
+import heapq
+import io
+import itertools
+import os
+import selectors
+import time
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Union
+
+
+class CaptureClock:
+    """
+    Capture-time "now" that keeps advancing while no records arrive.
+
+    Callers store each record's capture timestamp in .ts; now() returns the latest one
+    plus the wall time elapsed since it last changed. Live input tracks the wall clock,
+    replays of old captures keep their own time base. The estimate starts moving on the
+    first now() call after the last change, so it lags by at most one timer interval.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.ts: Optional[float] = None
+        self._clock = clock
+        self._seen: Optional[float] = None
+        self._since = 0.0
+
+    def now(self) -> Optional[float]:
+        """Estimated current capture time (None until a timestamp was seen)."""
+        t = self._clock()
+        if self.ts != self._seen:
+            self._seen = self.ts
+            self._since = t
+        if self.ts is None:
+            return None
+        return self.ts + (t - self._since)
+
+
+class TimerLoop:
+    """
+    Periodic timers plus a line reader that runs them while waiting for input.
+
+    - max_wait_s: longest select() timeout, i.e. how often stop() is polled when idle
+    - chunk_size: bytes read per os.read(); small (like io.BufferedReader's buffer) so
+      unread input stays in the pipe, where a FIONREAD backlog check can see it
+    - clock: monotonic time source (injectable for tests)
+    """
+
+    def __init__(
+        self,
+        max_wait_s: float = 1.0,
+        chunk_size: int = 8192,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_wait_s <= 0 or chunk_size < 1:
+            raise ValueError("need max_wait_s > 0 and chunk_size >= 1")
+        self.max_wait_s = float(max_wait_s)
+        self.chunk_size = int(chunk_size)
+        self._clock = clock
+        # (due, seq, interval, fn); seq keeps equal due times in registration order
+        self._timers: List[Tuple[float, int, float, Callable[[], Any]]] = []
+        self._seq = itertools.count()
+        self._next_due = float("inf")
+        self.fired = 0
+
+    def every(self, interval_s: float, fn: Callable[[], Any]) -> None:
+        """Run fn() every interval_s seconds (first run one interval from now)."""
+        if interval_s <= 0:
+            raise ValueError("interval_s must be > 0")
+        due = self._clock() + interval_s
+        heapq.heappush(self._timers, (due, next(self._seq), float(interval_s), fn))
+        self._next_due = self._timers[0][0]
+
+    def run_due(self) -> None:
+        """Run the timers that are due; cheap when none are."""
+        now = self._clock()
+        if now < self._next_due:
+            return
+        while self._timers and self._timers[0][0] <= now:
+            due, seq, interval, fn = heapq.heappop(self._timers)
+            heapq.heappush(self._timers, (max(due + interval, now), seq, interval, fn))
+            self.fired += 1
+            fn()
+        self._next_due = self._timers[0][0] if self._timers else float("inf")
+
+    def _timeout(self) -> float:
+        return min(self.max_wait_s, max(0.0, self._next_due - self._clock()))
+
+    def lines(
+        self,
+        source: Union[int, Any],
+        encoding: Optional[str] = None,
+        stop: Optional[Callable[[], bool]] = None,
+    ) -> Iterator[Union[bytes, str]]:
+        """
+        Yield lines from source (an fd or a file object) while running due timers.
+
+        Lines are bytes, or str decoded with errors="replace" when encoding is given.
+        Ends at EOF or once stop() returns True.
+        """
+        try:
+            fd = source if isinstance(source, int) else source.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            yield from self._iterate(source, encoding, stop)
+            return
+
+        sel: Optional[selectors.BaseSelector] = selectors.DefaultSelector()
+        try:
+            sel.register(fd, selectors.EVENT_READ)
+        except PermissionError:  # epoll refuses regular files; they never block
+            sel.close()
+            sel = None
+        pending = b""
+        try:
+            while not (stop and stop()):
+                if sel is not None and not sel.select(self._timeout()):
+                    self.run_due()
+                    continue
+                chunk = os.read(fd, self.chunk_size)
+                if not chunk:
+                    break
+                buf = pending + chunk if pending else chunk
+                start = 0
+                end = buf.find(b"\n")
+                while end >= 0:
+                    line = buf[start : end + 1]
+                    yield line.decode(encoding, "replace") if encoding else line
+                    start = end + 1
+                    end = buf.find(b"\n", start)
+                pending = buf[start:]
+                self.run_due()
+            else:
+                pending = b""  # stopped: drop the partial line
+            if pending:
+                yield pending.decode(encoding, "replace") if encoding else pending
+        finally:
+            if sel is not None:
+                sel.close()
+
+    def _iterate(
+        self, source: Any, encoding: Optional[str], stop: Optional[Callable[[], bool]]
+    ) -> Iterator[Union[bytes, str]]:
+        for line in source:
+            if stop and stop():
+                break
+            if encoding and isinstance(line, bytes):
+                line = line.decode(encoding, "replace")
+            yield line
+            self.run_due()
@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+"""
+fleet_load.py
+Fleet load generator: N virtual endpoints in one process, each with its own endpoint_id,
+Shipper and traffic source, plus send_status.py-style heartbeats, against one ingest
+target. Reports aggregate throughput, POST latency percentiles and error rates over time.
+
+Usage pattern:
+    # 200 synthetic endpoints ramped up over 60 s against a local stand-in with 30 ms latency
+    python fleet_load.py --endpoints 200 --rate 50 --ramp-sec 60 --duration 300 \
+        --local --local-latency-ms 30 --out /tmp/fleet.jsonl
+
+    # Replay a recorded capture from every endpoint against staging
+    python fleet_load.py --endpoints 50 --replay sample_captures/third_scan_raw.txt \
+        --target https://staging.example.org --api-key "$API_KEY" --duration 600
+
+    from fleet_load import Fleet
+    fleet = Fleet(server_url, api_key, endpoints=20, rate=100)
+    fleet.start()
+    fleet.run(duration_s=30, report_s=5, on_report=print)   # one row per report interval
+    fleet.close()
+
+Model:
+    - one driver thread feeds every endpoint: each tick it pulls rate * elapsed lines from
+      the endpoint's source (TrafficGenerator seeded per endpoint, or a looping,
+      rebased ReplaySource), parses them with parser_scan.parse_line and adds the records
+      to that endpoint's Shipper; the Shippers POST concurrently from their own threads
+    - endpoint i comes online at i * ramp_s / N, so a ramp finds the fleet size at which
+      ingest starts to fail
+    - heartbeats reuse send_status.build_payload / try_send with its schedule (first beat
+      when the endpoint comes online, then every heartbeat_s, failures retried after
+      60 s), all from one heartbeat thread
+
+Each report row (and --out JSONL line) holds per-interval deltas: offered lines/s,
+records/s accepted by the server, POSTs/s, POST error rate, retries, drops, queued
+records, p50/p95/p99 POST latency (interpolated from the Shippers' latency histograms),
+heartbeat results and, with --local, the stand-in's status-code counts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import signal
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from urllib.parse import urljoin
+
+import send_status
+from parser_scan import parse_line
+from replay import ReplaySource
+from shipper import Shipper
+from traffic_gen import TrafficGenerator
+
+log = logging.getLogger("fleet_load")
+
+_TICK_S = 0.05
+_COUNTERS = (
+    "records_sent",
+    "posts_ok",
+    "posts_failed",
+    "retries",
+    "records_dropped",
+    "bytes_on_wire",
+)
+
+
+def _merge_buckets(snaps: List[Dict[str, Any]]) -> Dict[str, int]:
+    merged: Dict[str, int] = {}
+    for snap in snaps:
+        for bound, n in snap["buckets"].items():
+            merged[bound] = merged.get(bound, 0) + n
+    return merged
+
+
+def hist_quantile(buckets: Dict[str, int], q: float) -> Optional[float]:
+    """
+    Quantile from cumulative Prometheus-style buckets, interpolated linearly inside the
+    bucket that holds it (like histogram_quantile). None when the histogram is empty.
+    """
+    total = buckets.get("+Inf", 0)
+    if total <= 0:
+        return None
+    target = q * total
+    prev_bound, prev_n = 0.0, 0
+    for key, n in buckets.items():
+        if key == "+Inf":
+            break
+        bound = float(key)
+        if n >= target:
+            width = n - prev_n
+            frac = (target - prev_n) / width if width else 1.0
+            return prev_bound + (bound - prev_bound) * frac
+        prev_bound, prev_n = bound, n
+    return prev_bound  # beyond the last finite bucket
+
+
+class VirtualEndpoint:
+    """One simulated Pi: an endpoint_id, a traffic source and a Shipper."""
+
+    def __init__(self, endpoint_id: str, source: Iterator[str], shipper: Shipper):
+        self.endpoint_id = endpoint_id
+        self.source = source
+        self.shipper = shipper
+        self.online_at = 0.0  # seconds after start
+        self.lines = 0
+        self.records = 0
+        self.heartbeats_ok = 0
+        self.heartbeats_failed = 0
+
+    def pump(self, due_lines: int) -> int:
+        """Read up to due_lines more lines from the source; returns lines read."""
+        n = 0
+        ship = self.shipper
+        for line in self.source:
+            rec = parse_line(line)
+            if rec is not None:
+                ship.add(rec)
+                self.records += 1
+            n += 1
+            if n >= due_lines:
+                break
+        self.lines += n
+        return n
+
+
+class Fleet:
+    """N virtual endpoints against one ingest base URL."""
+
+    def __init__(
+        self,
+        server_url: str,
+        api_key: str,
+        endpoints: int,
+        rate: float,
+        ramp_s: float = 0.0,
+        replay_path: Optional[str] = None,
+        devices: int = 100,
+        heartbeat_s: float = 300.0,
+        id_prefix: str = "loadgen",
+        seed: int = 1,
+        shipper_options: Optional[Dict[str, Any]] = None,
+        server_stats: Optional[Callable[[], Dict[str, Any]]] = None,
+    ):
+        if endpoints < 1:
+            raise ValueError("endpoints must be >= 1")
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        base = server_url.rstrip("/") + "/"
+        self.scan_url = urljoin(base, "api/endpoint/scan-data")
+        self.status_url = send_status.build_status_url(server_url)
+        self.api_key = api_key
+        self.rate = float(rate)
+        self.ramp_s = float(ramp_s)
+        self.heartbeat_s = float(heartbeat_s)
+        self._server_stats = server_stats
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._started: Optional[float] = None
+
+        opts = dict(shipper_options or {})
+        self.endpoints: List[VirtualEndpoint] = []
+        for i in range(endpoints):
+            endpoint_id = f"{id_prefix}-{i:04d}"
+            if replay_path:
+                source = self._replay_lines(replay_path)
+            else:
+                gen = TrafficGenerator(devices=devices, seed=seed + i)
+                source = gen.lines(rate=self.rate)
+            ship = Shipper(
+                server_url=self.scan_url,
+                api_key=api_key,
+                endpoint_id=endpoint_id,
+                user_agent=f"WiFiEndpoint/1.0 loadgen {endpoint_id}",
+                **opts,
+            )
+            ep = VirtualEndpoint(endpoint_id, source, ship)
+            ep.online_at = self.ramp_s * i / endpoints
+            self.endpoints.append(ep)
+
+        self._prev_counters = {k: 0 for k in _COUNTERS}
+        self._prev_lat: Dict[str, int] = {}
+        self._prev_lines = 0
+        self._prev_hb = (0, 0)
+        self._prev_server: Dict[str, int] = {}
+        self._prev_t: Optional[float] = None
+        self.rows: List[Dict[str, Any]] = []
+
+    def _replay_lines(self, path: str) -> Iterator[str]:
+        src = ReplaySource(
+            path, speed=None, loops=0, rebase=True, stop=self._stop.is_set
+        )
+        for raw in src:
+            yield raw.decode("utf-8", errors="replace")
+
+    # ---------------- Lifecycle ----------------
+
+    def start(self) -> None:
+        self._started = time.monotonic()
+        self._prev_t = self._started
+        for target, name in (
+            (self._drive, "FleetDriver"),
+            (self._heartbeats, "FleetHeartbeat"),
+        ):
+            t = threading.Thread(target=target, name=name, daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def close(self, drain_s: float = 30.0) -> None:
+        """Stop traffic, wait up to drain_s for in-flight records, then close the Shippers."""
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=5.0)
+        closers = [
+            threading.Thread(target=ep.shipper.flush, daemon=True)
+            for ep in self.endpoints
+        ]
+        for t in closers:
+            t.start()
+        deadline = time.monotonic() + drain_s
+        while time.monotonic() < deadline and not self._drained():
+            time.sleep(0.1)
+        for ep in self.endpoints:
+            ep.shipper.close()
+
+    def _drained(self) -> bool:
+        """Every parsed record was either accepted, dropped or parked by its Shipper."""
+        for ep in self.endpoints:
+            s = ep.shipper.stats()
+            done = s["records_sent"] + s["records_dropped"] + s["parked_records"]
+            if done < ep.records:
+                return False
+        return True
+
+    def run(
+        self,
+        duration_s: Optional[float],
+        report_s: float = 5.0,
+        on_report: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Block for duration_s (None = until stop()), emitting a report row every report_s."""
+        end = None if duration_s is None else self._started + duration_s
+        while not self._stop.is_set():
+            wait = report_s
+            if end is not None:
+                wait = min(wait, end - time.monotonic())
+            if wait > 0 and self._stop.wait(wait):
+                break
+            row = self.report()
+            if on_report is not None:
+                on_report(row)
+            if end is not None and time.monotonic() >= end:
+                break
+        return self.rows
+
+    # ---------------- Traffic + heartbeats ----------------
+
+    def _online(self, elapsed: float) -> List[VirtualEndpoint]:
+        return [ep for ep in self.endpoints if ep.online_at <= elapsed]
+
+    def _drive(self) -> None:
+        while not self._stop.is_set():
+            elapsed = time.monotonic() - self._started
+            for ep in self._online(elapsed):
+                due = int((elapsed - ep.online_at) * self.rate) - ep.lines
+                if due > 0:
+                    ep.pump(due)
+                if self._stop.is_set():
+                    return
+            spent = time.monotonic() - self._started - elapsed
+            if spent < _TICK_S:
+                self._stop.wait(_TICK_S - spent)
+
+    def _heartbeats(self) -> None:
+        headers = send_status.make_headers(self.api_key)
+        # Like send_status.py: first beat at boot (retried every 60 s), then every interval
+        due = [ep.online_at for ep in self.endpoints]
+        while not self._stop.is_set():
+            elapsed = time.monotonic() - self._started
+            for i, ep in enumerate(self.endpoints):
+                if due[i] > elapsed or self._stop.is_set():
+                    continue
+                try:
+                    ok, code, body = send_status.try_send(
+                        self.status_url,
+                        headers,
+                        send_status.build_payload(ep.endpoint_id),
+                    )
+                except Exception as e:  # requests.RequestException and friends
+                    ok, code, body = False, None, str(e)
+                if ok:
+                    ep.heartbeats_ok += 1
+                    due[i] = elapsed + self.heartbeat_s
+                else:
+                    ep.heartbeats_failed += 1
+                    log.debug(
+                        "Heartbeat %s failed (%s): %s", ep.endpoint_id, code, body
+                    )
+                    due[i] = elapsed + min(60.0, self.heartbeat_s)
+            self._stop.wait(0.2)
+
+    # ---------------- Reporting ----------------
+
+    def report(self) -> Dict[str, Any]:
+        """One row of per-interval deltas since the previous report."""
+        now = time.monotonic()
+        dt = max(now - self._prev_t, 1e-9)
+        stats = [ep.shipper.stats() for ep in self.endpoints]
+
+        totals = {k: sum(s[k] for s in stats) for k in _COUNTERS}
+        delta = {k: totals[k] - self._prev_counters[k] for k in _COUNTERS}
+        self._prev_counters = totals
+
+        lat = _merge_buckets([s["post_latency_hist"] for s in stats])
+        lat_delta = {k: v - self._prev_lat.get(k, 0) for k, v in lat.items()}
+        self._prev_lat = lat
+
+        lines = sum(ep.lines for ep in self.endpoints)
+        hb = (
+            sum(ep.heartbeats_ok for ep in self.endpoints),
+            sum(ep.heartbeats_failed for ep in self.endpoints),
+        )
+        attempts = delta["posts_ok"] + delta["posts_failed"]
+        elapsed = now - self._started
+
+        def _ms(q: float) -> Optional[float]:
+            v = hist_quantile(lat_delta, q)
+            return None if v is None else round(v * 1000.0, 1)
+
+        row: Dict[str, Any] = {
+            "t": round(elapsed, 1),
+            "endpoints_online": len(self._online(elapsed)),
+            "lines_per_s": round((lines - self._prev_lines) / dt, 1),
+            "records_per_s": round(delta["records_sent"] / dt, 1),
+            "posts_per_s": round(attempts / dt, 2),
+            "post_error_rate": (
+                round(delta["posts_failed"] / attempts, 4) if attempts else 0.0
+            ),
+            "retries": delta["retries"],
+            "records_dropped": delta["records_dropped"],
+            "kbytes_per_s": round(delta["bytes_on_wire"] / dt / 1024.0, 1),
+            "pending": sum(s["pending"] for s in stats),
+            "latency_ms": {"p50": _ms(0.5), "p95": _ms(0.95), "p99": _ms(0.99)},
+            "heartbeats_ok": hb[0] - self._prev_hb[0],
+            "heartbeats_failed": hb[1] - self._prev_hb[1],
+        }
+        if self._server_stats is not None:
+            by_status = self._server_stats().get("by_status", {})
+            row["server_status"] = {
+                k: v - self._prev_server.get(k, 0)
+                for k, v in by_status.items()
+                if v - self._prev_server.get(k, 0)
+            }
+            self._prev_server = dict(by_status)
+        self._prev_lines = lines
+        self._prev_hb = hb
+        self._prev_t = now
+        self.rows.append(row)
+        return row
+
+    def summary(self) -> Dict[str, Any]:
+        """Whole-run totals, including the overall latency percentiles."""
+        stats = [ep.shipper.stats() for ep in self.endpoints]
+        totals = {k: sum(s[k] for s in stats) for k in _COUNTERS}
+        lat = _merge_buckets([s["post_latency_hist"] for s in stats])
+        attempts = totals["posts_ok"] + totals["posts_failed"]
+        wall = time.monotonic() - self._started
+        out = dict(totals)
+        out.update(
+            {
+                "endpoints": len(self.endpoints),
+                "wall_s": round(wall, 1),
+                "lines": sum(ep.lines for ep in self.endpoints),
+                "records_parsed": sum(ep.records for ep in self.endpoints),
+                "records_per_s": round(totals["records_sent"] / wall, 1),
+                "post_error_rate": (
+                    round(totals["posts_failed"] / attempts, 4) if attempts else 0.0
+                ),
+                "latency_ms": {
+                    f"p{int(q * 100)}": (
+                        None
+                        if hist_quantile(lat, q) is None
+                        else round(hist_quantile(lat, q) * 1000.0, 1)
+                    )
+                    for q in (0.5, 0.95, 0.99)
+                },
+                "heartbeats_ok": sum(ep.heartbeats_ok for ep in self.endpoints),
+                "heartbeats_failed": sum(ep.heartbeats_failed for ep in self.endpoints),
+            }
+        )
+        return out
+
+
+def _format_row(row: Dict[str, Any]) -> str:
+    lat = row["latency_ms"]
+    text = (
+        f"t={row['t']:>6}s eps={row['endpoints_online']:>4} "
+        f"lines/s={row['lines_per_s']:>8} rec/s={row['records_per_s']:>8} "
+        f"posts/s={row['posts_per_s']:>6} err={row['post_error_rate'] * 100:5.1f}% "
+        f"p50/95/99={lat['p50']}/{lat['p95']}/{lat['p99']}ms "
+        f"pending={row['pending']} hb={row['heartbeats_ok']}/{row['heartbeats_failed']}"
+    )
+    if "server_status" in row:
+        text += f" server={row['server_status']}"
+    return text
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Drive N virtual endpoints at one ingest")
+    target = ap.add_mutually_exclusive_group(required=True)
+    target.add_argument("--target", help="Ingest base URL (like SERVER_URL)")
+    target.add_argument(
+        "--local", action="store_true", help="Start an in-process ingest_server"
+    )
+    ap.add_argument("--api-key", default="loadgen")
+    ap.add_argument("--endpoints", type=int, default=10)
+    ap.add_argument("--rate", type=float, default=50.0, help="Lines/s per endpoint")
+    ap.add_argument("--ramp-sec", type=float, default=0.0, help="Bring endpoints up")
+    ap.add_argument("--duration", type=float, default=60.0, help="0 = until Ctrl-C")
+    ap.add_argument("--report-sec", type=float, default=5.0)
+    ap.add_argument("--replay", default=None, help="Capture file instead of synthetic")
+    ap.add_argument("--devices", type=int, default=100, help="Synthetic devices each")
+    ap.add_argument("--heartbeat-sec", type=float, default=300.0)
+    ap.add_argument("--id-prefix", default="loadgen")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--batch-size", type=int, default=200)
+    ap.add_argument("--flush-ms", type=int, default=5000)
+    ap.add_argument("--timeout-sec", type=int, default=30)
+    ap.add_argument("--gzip", action="store_true")
+    ap.add_argument("--adaptive", action="store_true")
+    ap.add_argument("--out", default=None, help="Append report rows as JSONL")
+    ap.add_argument("--local-latency-ms", type=float, default=0.0)
+    ap.add_argument("--local-jitter-ms", type=float, default=0.0)
+    ap.add_argument("--local-error-rate", type=float, default=0.0)
+    ap.add_argument("--local-rate-429", type=float, default=0.0)
+    ap.add_argument("--log-level", default="INFO")
+    args = ap.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.INFO),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+    server = None
+    server_url = args.target
+    if args.local:
+        from ingest_server import IngestServer
+
+        server = IngestServer(
+            api_key=args.api_key,
+            latency_ms=args.local_latency_ms,
+            jitter_ms=args.local_jitter_ms,
+            error_rate=args.local_error_rate,
+            rate_429=args.local_rate_429,
+        ).start()
+        server_url = server.url
+        log.info("Local ingest stand-in on %s", server_url)
+
+    fleet = Fleet(
+        server_url,
+        args.api_key,
+        endpoints=args.endpoints,
+        rate=args.rate,
+        ramp_s=args.ramp_sec,
+        replay_path=args.replay,
+        devices=args.devices,
+        heartbeat_s=args.heartbeat_sec,
+        id_prefix=args.id_prefix,
+        seed=args.seed,
+        shipper_options={
+            "batch_size": args.batch_size,
+            "flush_ms": args.flush_ms,
+            "timeout_s": args.timeout_sec,
+            "use_gzip": args.gzip,
+            "adaptive": args.adaptive,
+        },
+        server_stats=server.stats if server is not None else None,
+    )
+    out = open(args.out, "a", encoding="utf-8") if args.out else None
+
+    def _on_report(row: Dict[str, Any]) -> None:
+        log.info("%s", _format_row(row))
+        if out is not None:
+            out.write(json.dumps(row) + "\n")
+            out.flush()
+
+    signal.signal(signal.SIGTERM, lambda *_: fleet.stop())
+    log.info(
+        "Starting %d endpoints at %.0f lines/s each against %s",
+        args.endpoints,
+        args.rate,
+        fleet.scan_url,
+    )
+    fleet.start()
+    try:
+        fleet.run(args.duration or None, args.report_sec, _on_report)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fleet.close()
+        summary = fleet.summary()
+        if server is not None:
+            summary["server"] = server.stats()
+            server.stop()
+        print(json.dumps(summary, indent=2, sort_keys=True))
+        if out is not None:
+            out.write(json.dumps({"summary": summary}) + "\n")
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
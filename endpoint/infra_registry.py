@@ -0,0 +1,284 @@
+"""
+infra_registry.py
+Learned registry of infrastructure transmitters (access points, fixed bridges, printers)
+whose records carry no value for device localization but dominate the frame counts.
+
+Usage pattern:
+    from infra_registry import InfraRegistry
+
+    infra = InfraRegistry("/home/pi/logs/infra.bin", mode="downsample", keep_every_s=60,
+                          allow=["aa:bb:cc:dd:ee:ff"], deny=["11:22:33:44:55:66"])
+    rec = infra.filter(rec)     # None when the record belongs to a suppressed transmitter
+    infra.maybe_save()          # periodically; writes only when something was learned
+    infra.save()                # on shutdown
+
+Learning:
+    - the source of a Beacon / Probe Response frame is infrastructure immediately
+    - any other transmitter is infrastructure once its RSSI stayed within stable_stddev
+      dB over stable_s seconds of capture time and at least stable_min_samples records
+    - deny (config) MACs are always infrastructure, allow MACs never are; neither list
+      is written to disk
+    - learned entries not seen for ttl_s are forgotten when the registry is saved
+    - beacon learning needs beacons to be parsed: leave them out of FRAME_EXCLUDE and
+      let the registry suppress them (and every other frame their APs send)
+
+Modes:
+    - suppress: infrastructure records are dropped
+    - downsample: one record per transmitter per keep_every_s of capture time is kept
+
+On disk: b"INFR1" followed by 11-byte entries (6-byte MAC, 1-byte source, 4-byte
+last-seen epoch seconds, big endian), replaced atomically on save. 10k APs = 110 kB.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import struct
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+log = logging.getLogger("infra_registry")
+
+INFRA_MODES = ("off", "suppress", "downsample")
+MAGIC = b"INFR1"
+_ENTRY = struct.Struct(">6sBI")
+# Learned-from codes stored on disk
+SOURCE_BEACON = 1
+SOURCE_STABLE = 2
+_SOURCE_NAMES = {SOURCE_BEACON: "beacon", SOURCE_STABLE: "stable"}
+BEACON_FRAME_TYPES = frozenset({"beacon", "probe_response"})
+
+
+def _pack_mac(mac: str) -> bytes:
+    return bytes.fromhex(mac.replace(":", ""))
+
+
+def _unpack_mac(raw: bytes) -> str:
+    return ":".join(f"{b:02x}" for b in raw)
+
+
+class InfraRegistry:
+    """
+    Learns infrastructure MACs and suppresses or downsamples their records.
+
+    - path: registry file (None = in-memory only)
+    - mode: "suppress" or "downsample"
+    - keep_every_s: downsample period per transmitter (capture seconds)
+    - allow / deny: manual overrides (lowercase colon MACs)
+    - stable_s / stable_stddev / stable_min_samples: RSSI stability rule
+    - ttl_s: forget learned entries not seen for this long
+    - max_tracked: cap on MACs tracked for the stability rule
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        mode: str = "suppress",
+        keep_every_s: float = 60.0,
+        allow: Iterable[str] = (),
+        deny: Iterable[str] = (),
+        stable_s: float = 600.0,
+        stable_stddev: float = 2.0,
+        stable_min_samples: int = 50,
+        ttl_s: float = 7 * 86400.0,
+        max_tracked: int = 50000,
+        save_interval_s: float = 300.0,
+    ):
+        if mode not in ("suppress", "downsample"):
+            raise ValueError(f"mode must be suppress or downsample, got {mode!r}")
+        if keep_every_s <= 0 or stable_s <= 0 or stable_min_samples < 2:
+            raise ValueError(
+                "need keep_every_s > 0, stable_s > 0 and stable_min_samples >= 2"
+            )
+        self.path = path
+        self.mode = mode
+        self.keep_every_s = float(keep_every_s)
+        self.allow = frozenset(allow)
+        self.deny = frozenset(deny)
+        self.stable_s = float(stable_s)
+        self.stable_stddev = float(stable_stddev)
+        self.stable_min_samples = int(stable_min_samples)
+        self.ttl_s = float(ttl_s)
+        self.max_tracked = int(max_tracked)
+        self.save_interval_s = float(save_interval_s)
+
+        # mac -> [source, last_seen]
+        self.known: Dict[str, List[int]] = {}
+        # mac -> [first_ts, last_ts, n, mean, m2] (Welford, per stability window)
+        self._tracked: Dict[str, List[float]] = {}
+        self._last_kept: Dict[str, float] = {}
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._latest_ts = 0.0
+        self.suppressed = 0
+        self.kept = 0
+        self.learned = {"beacon": 0, "stable": 0}
+        if path:
+            self.load()
+
+    # --- Classification ----------------------------------------------------------
+
+    def is_infra(self, mac: str) -> bool:
+        if mac in self.allow:
+            return False
+        return mac in self.deny or mac in self.known
+
+    def _learn(self, mac: str, source: int, ts: float) -> None:
+        if mac in self.allow or mac in self.known:
+            return
+        self.known[mac] = [source, int(ts)]
+        self._tracked.pop(mac, None)
+        self.learned[_SOURCE_NAMES[source]] += 1
+        self._dirty = True
+        log.info("Learned infrastructure %s (%s)", mac, _SOURCE_NAMES[source])
+
+    def _track(self, mac: str, rssi: float, ts: float) -> None:
+        st = self._tracked.get(mac)
+        if st is None:
+            if len(self._tracked) >= self.max_tracked:
+                self._prune_tracked(ts)
+                if len(self._tracked) >= self.max_tracked:
+                    return
+            self._tracked[mac] = [ts, ts, 1, rssi, 0.0]
+            return
+        st[1] = ts
+        st[2] += 1
+        delta = rssi - st[3]
+        st[3] += delta / st[2]
+        st[4] += delta * (rssi - st[3])
+        if ts - st[0] < self.stable_s:
+            return
+        n = st[2]
+        if n >= self.stable_min_samples and math.sqrt(st[4] / n) <= self.stable_stddev:
+            self._learn(mac, SOURCE_STABLE, ts)
+        else:
+            self._tracked[mac] = [ts, ts, 1, rssi, 0.0]  # start the next window
+
+    def _prune_tracked(self, ts: float) -> None:
+        stale = [m for m, st in self._tracked.items() if ts - st[1] > self.stable_s]
+        for mac in stale:
+            del self._tracked[mac]
+
+    def filter(self, rec: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Learn from the record; return it, or None if it is suppressed."""
+        if rec is None:
+            return None
+        mac = rec["mac"]
+        ts = float(rec["timestamp"])
+        if ts > self._latest_ts:
+            self._latest_ts = ts
+        if mac in self.allow:
+            return rec
+        entry = self.known.get(mac)
+        if entry is None and mac not in self.deny:
+            if rec.get("frame_type") in BEACON_FRAME_TYPES:
+                self._learn(mac, SOURCE_BEACON, ts)
+                entry = self.known[mac]
+            else:
+                self._track(mac, float(rec["rssi"]), ts)
+                entry = self.known.get(mac)
+                if entry is None:
+                    return rec
+        if entry is not None and ts - entry[1] >= 3600:
+            entry[1] = int(ts)  # last-seen is kept at hour resolution
+            self._dirty = True
+        if self.mode == "downsample":
+            last = self._last_kept.get(mac)
+            if last is None or ts - last >= self.keep_every_s or ts < last:
+                self._last_kept[mac] = ts
+                self.kept += 1
+                return rec
+        self.suppressed += 1
+        return None
+
+    # --- Persistence -------------------------------------------------------------
+
+    def load(self) -> None:
+        """Read the registry file (a missing or damaged file starts empty)."""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        if not data.startswith(MAGIC) or (len(data) - len(MAGIC)) % _ENTRY.size:
+            log.warning("Ignoring unreadable infrastructure registry %s", self.path)
+            return
+        for raw, source, last_seen in _ENTRY.iter_unpack(data[len(MAGIC) :]):
+            if source in _SOURCE_NAMES:
+                self.known[_unpack_mac(raw)] = [source, last_seen]
+        log.info("Loaded %d infrastructure MACs from %s", len(self.known), self.path)
+
+    def save(self, now: Optional[float] = None) -> None:
+        """Forget expired entries and atomically rewrite the registry file."""
+        self._last_save = time.monotonic()
+        if not self.path:
+            return
+        if now is None:  # capture time, so replays of old captures keep their entries
+            now = self._latest_ts or time.time()
+        for mac in [m for m, e in self.known.items() if now - e[1] > self.ttl_s]:
+            del self.known[mac]
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            for mac, (source, last_seen) in sorted(self.known.items()):
+                f.write(_ENTRY.pack(_pack_mac(mac), source, last_seen & 0xFFFFFFFF))
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+    def maybe_save(self) -> bool:
+        """Save if something changed and save_interval_s has passed."""
+        if not self._dirty or time.monotonic() - self._last_save < self.save_interval_s:
+            return False
+        self.save()
+        return True
+
+    # --- Reporting ---------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        by_source = {name: 0 for name in _SOURCE_NAMES.values()}
+        for source, _ in self.known.values():
+            by_source[_SOURCE_NAMES[source]] += 1
+        return {
+            "known": len(self.known),
+            "known_by_source": by_source,
+            "deny": len(self.deny),
+            "allow": len(self.allow),
+            "tracked": len(self._tracked),
+            "learned": dict(self.learned),
+            "suppressed": self.suppressed,
+            "kept": self.kept,
+        }
+
+    def summary(self) -> str:
+        s = self.stats()
+        src = s["known_by_source"]
+        return (
+            f"known={s['known']} (beacon={src['beacon']} stable={src['stable']} "
+            f"deny={s['deny']}) suppressed={s['suppressed']} kept={s['kept']}"
+        )
+
+    def samples(self) -> List[Tuple[str, str, str, float]]:
+        """Metrics collector: registry size and suppressed / kept record counts."""
+        s = self.stats()
+        return [
+            (
+                "infra_known",
+                "gauge",
+                "Learned infrastructure MACs",
+                s["known"],
+            ),
+            (
+                "infra_records_suppressed_total",
+                "counter",
+                "Records dropped as infrastructure",
+                s["suppressed"],
+            ),
+            (
+                "infra_records_kept_total",
+                "counter",
+                "Infrastructure records kept by downsampling",
+                s["kept"],
+            ),
+        ]
@@ -0,0 +1,642 @@
+#!/usr/bin/env python3
+"""
+ingest_server.py
+Local stand-in for the ingest API (/api/endpoint/scan-data and /api/endpoint/status), for
+load testing the endpoint without the Next.js server or a database.
+
+Usage pattern:
+    python ingest_server.py --port 8080 --api-key devkey --latency-ms 40 --jitter-ms 20 \
+        --error-rate 0.01 --rate-429 0.02 --max-body-kb 512
+    # then point the endpoint at it: SERVER_URL=http://127.0.0.1:8080 ALLOW_INSECURE_HTTP=true
+
+    from ingest_server import IngestServer
+
+    srv = IngestServer(api_key="devkey", latency_ms=20)
+    srv.start()                  # background thread, port 0 picks a free port
+    srv.url                      # "http://127.0.0.1:<port>"
+    srv.stats()                  # requests / records / bytes / status counts / rates
+    srv.stop()
+
+Validation mirrors server/app/api/endpoint/*/route.ts: same auth (x-api-key or
+"Authorization: ApiKey <key>"), same per-scan checks and error strings, same status
+codes (201 all stored, 207 partly rejected, 400 none valid, 401, 500 on a bad body).
+Accepted rows are kept in a bounded in-memory buffer instead of Postgres.
+
+Fault injection (applied before validation, after auth):
+    latency_ms + uniform(0, jitter_ms)   added to every API request
+    error_rate                           fraction answered 500 (or 503 with Retry-After)
+    rate_429                             fraction answered 429 with Retry-After
+    max_body_bytes / rate_413            bodies over the cap (or a random fraction) get 413
+
+Throughput accounting: GET /__stats returns the counters as JSON (POST /__reset clears
+them), and --report-sec logs a one-line summary periodically.
+"""
+
+from __future__ import annotations
+
+import argparse
+import email.utils
+import json
+import logging
+import math
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+log = logging.getLogger("ingest_server")
+
+SCAN_PATH = "/api/endpoint/scan-data"
+STATUS_PATH = "/api/endpoint/status"
+MAC_RE = re.compile(r"^([0-9A-Fa-f]{2}[:]){5}([0-9A-Fa-f]{2})$")
+VALID_STATUSES = ("online", "offline", "error")
+# JavaScript Date range: +-8.64e15 ms around the epoch
+_JS_DATE_MAX_MS = 8.64e15
+
+
+# ---------------- Validation (mirrors scan-data/route.ts) ----------------
+
+
+def _js_truthy(v: Any) -> bool:
+    if v is None or v is False or v == "":
+        return False
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return v != 0 and not math.isnan(v)
+    return True
+
+
+def _is_integer(v: Any) -> bool:
+    """Number.isInteger: JSON 5 and 5.0 both qualify, booleans and strings do not."""
+    if isinstance(v, bool):
+        return False
+    if isinstance(v, int):
+        return True
+    return isinstance(v, float) and math.isfinite(v) and v.is_integer()
+
+
+def parse_timestamp(v: Any) -> Optional[datetime]:
+    """
+    Approximation of `new Date(v)`: numbers are epoch milliseconds, strings must be
+    ISO-8601 or RFC 2822. Returns None where the server would see an Invalid Date.
+    """
+    if isinstance(v, bool):
+        v = int(v)
+    if isinstance(v, (int, float)):
+        if not math.isfinite(v) or abs(v) > _JS_DATE_MAX_MS:
+            return None
+        ms = math.trunc(v)
+        return datetime(1970, 1, 1, tzinfo=timezone.utc) + timedelta(milliseconds=ms)
+    if isinstance(v, str):
+        s = v.strip()
+        try:
+            dt = datetime.fromisoformat(s[:-1] + "+00:00" if s.endswith("Z") else s)
+        except ValueError:
+            try:
+                dt = email.utils.parsedate_to_datetime(s)
+            except (TypeError, ValueError, IndexError):
+                return None
+        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    return None
+
+
+def validate_scan(scan: Any, index: int) -> Tuple[List[str], Optional[Dict[str, Any]]]:
+    """(errors, normalized row) for one scan; errors use the server's exact wording."""
+    if not isinstance(scan, dict):
+        scan = {}
+    errors: List[str] = []
+    endpoint_id = scan.get("endpoint_id")
+    mac = scan.get("mac")
+    rssi = scan.get("rssi")
+    timestamp = scan.get("timestamp")
+
+    if not _js_truthy(endpoint_id) or not isinstance(endpoint_id, str):
+        errors.append(f"Scan {index}: endpoint_id is required and must be a string")
+
+    norm_mac = ""
+    if not _js_truthy(mac) or not isinstance(mac, str):
+        errors.append(f"Scan {index}: mac is required and must be a string")
+    else:
+        norm_mac = mac.strip().lower().replace("-", ":")
+        if not MAC_RE.match(norm_mac):
+            errors.append(
+                f"Scan {index}: invalid MAC address format (expected xx:xx:xx:xx:xx:xx)"
+            )
+
+    if rssi is None:
+        errors.append(f"Scan {index}: rssi is required")
+    elif not _is_integer(rssi) or rssi < -100 or rssi > 0:
+        errors.append(f"Scan {index}: rssi must be an integer between -100 and 0")
+
+    if not _js_truthy(timestamp):
+        errors.append(f"Scan {index}: timestamp is required")
+    elif parse_timestamp(timestamp) is None:
+        errors.append(f"Scan {index}: invalid timestamp format")
+
+    if errors:
+        return errors, None
+    return [], {"endpoint_id": endpoint_id, "mac": norm_mac, "rssi": int(rssi)}
+
+
+def extract_api_key(headers) -> Optional[str]:
+    auth = headers.get("Authorization")
+    if auth and auth.startswith("ApiKey "):
+        return auth[7:]
+    return headers.get("x-api-key")
+
+
+# ---------------- Throughput accounting ----------------
+
+
+class IngestStats:
+    """Thread-safe counters for the stand-in, with a sliding-window request rate."""
+
+    def __init__(self, window_s: float = 10.0):
+        self.window_s = window_s
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started = time.time()
+            self.requests = 0
+            self.bytes_in = 0
+            self.records_accepted = 0
+            self.records_rejected = 0
+            self.heartbeats = 0
+            self.by_status: Dict[int, int] = {}
+            self.injected: Dict[str, int] = {}
+            self._recent: deque = deque()  # (monotonic, records accepted)
+
+    def observe(
+        self,
+        status: int,
+        nbytes: int,
+        accepted: int = 0,
+        rejected: int = 0,
+        injected: Optional[str] = None,
+        heartbeat: bool = False,
+    ) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            self.bytes_in += nbytes
+            self.records_accepted += accepted
+            self.records_rejected += rejected
+            self.heartbeats += int(heartbeat)
+            self.by_status[status] = self.by_status.get(status, 0) + 1
+            if injected:
+                self.injected[injected] = self.injected.get(injected, 0) + 1
+            self._recent.append((now, accepted))
+            self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        while self._recent and self._recent[0][0] < now - self.window_s:
+            self._recent.popleft()
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            uptime = max(time.time() - self.started, 1e-9)
+            window = min(self.window_s, uptime)
+            recent_records = sum(n for _, n in self._recent)
+            return {
+                "uptime_s": round(uptime, 3),
+                "requests": self.requests,
+                "bytes_in": self.bytes_in,
+                "records_accepted": self.records_accepted,
+                "records_rejected": self.records_rejected,
+                "heartbeats": self.heartbeats,
+                "by_status": {str(k): v for k, v in sorted(self.by_status.items())},
+                "injected": dict(self.injected),
+                "rps": round(self.requests / uptime, 2),
+                "records_per_s": round(self.records_accepted / uptime, 1),
+                "recent_rps": round(len(self._recent) / window, 2),
+                "recent_records_per_s": round(recent_records / window, 1),
+            }
+
+
+# ---------------- HTTP handler ----------------
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        log.debug("%s " + format, self.address_string(), *args)
+
+    # -- helpers --
+
+    def _reply(
+        self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length > 0 else b""
+
+    def _authorized(self) -> bool:
+        return extract_api_key(self.headers) == self.server.owner.api_key
+
+    # -- routing --
+
+    def do_GET(self):  # noqa: N802 (http.server naming)
+        url = urlsplit(self.path)
+        owner = self.server.owner
+        if url.path == "/__stats":
+            return self._reply(200, owner.stats())
+        if url.path == STATUS_PATH:
+            return self._get_status(parse_qs(url.query))
+        if url.path == SCAN_PATH:
+            q = parse_qs(url.query)
+            limit = int(q.get("limit", ["100"])[0])
+            with owner.lock:
+                rows = list(owner.rows)[-limit:] if limit > 0 else []
+            return self._reply(200, {"success": True, "data": rows})
+        self._reply(404, {"error": "Not found"})
+
+    def do_POST(self):  # noqa: N802 (http.server naming)
+        path = urlsplit(self.path).path
+        owner = self.server.owner
+        if path == "/__reset":
+            self._read_body()
+            owner.reset()
+            return self._reply(200, {"success": True})
+        if path not in (SCAN_PATH, STATUS_PATH):
+            self._read_body()
+            return self._reply(404, {"error": "Not found"})
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if not self._authorized():
+            self._read_body()
+            owner.counters.observe(401, length)
+            if path == SCAN_PATH:
+                return self._reply(401, {"success": False, "error": "Unauthorized"})
+            return self._reply(
+                401, {"error": "Unauthorized - Invalid or missing API key"}
+            )
+
+        injected = owner.inject(length)
+        owner.delay()
+        body = self._read_body()
+        if injected is not None:
+            status, payload, headers = injected
+            owner.counters.observe(status, len(body), injected=str(status))
+            return self._reply(status, payload, headers)
+
+        if path == SCAN_PATH:
+            return self._post_scans(body)
+        return self._post_status(body)
+
+    # -- scan-data --
+
+    def _post_scans(self, raw: bytes) -> None:
+        owner = self.server.owner
+        try:
+            body = json.loads(raw)
+        except ValueError as e:
+            owner.counters.observe(500, len(raw))
+            return self._reply(
+                500,
+                {
+                    "success": False,
+                    "error": "Failed to store scan data",
+                    "details": str(e),
+                },
+            )
+        if isinstance(body, dict) and isinstance(body.get("records"), list):
+            scans = body["records"]
+        elif isinstance(body, list):
+            scans = body
+        else:
+            scans = [body]
+
+        valid: List[Dict[str, Any]] = []
+        rejected: List[Dict[str, Any]] = []
+        for i, scan in enumerate(scans):
+            errors, row = validate_scan(scan, i)
+            if errors:
+                rejected.append({"index": i, "errors": errors})
+            else:
+                valid.append(row)
+
+        if not valid:
+            owner.counters.observe(400, len(raw), rejected=len(rejected))
+            return self._reply(
+                400,
+                {"success": False, "error": "Validation failed", "details": rejected},
+            )
+
+        stored = owner.store(valid)
+        status = 207 if rejected else 201
+        owner.counters.observe(status, len(raw), len(valid), len(rejected))
+        self._reply(
+            status,
+            {
+                "success": True,
+                "message": f"Successfully stored {len(stored)} scan(s)",
+                "rejected": len(rejected),
+                "rejected_details": rejected or None,
+                "data": stored if owner.echo_rows else [],
+            },
+        )
+
+    # -- status --
+
+    def _post_status(self, raw: bytes) -> None:
+        owner = self.server.owner
+        try:
+            body = json.loads(raw)
+            if not isinstance(body, dict):
+                raise ValueError("body must be a JSON object")
+        except ValueError as e:
+            owner.counters.observe(500, len(raw))
+            return self._reply(
+                500,
+                {"error": "Failed to update endpoint status", "details": str(e)},
+            )
+        endpoint_id = body.get("endpoint_id")
+        status = body.get("status", "online")
+        if not _js_truthy(endpoint_id):
+            owner.counters.observe(400, len(raw))
+            return self._reply(400, {"error": "endpoint_id is required"})
+        if status not in VALID_STATUSES:
+            owner.counters.observe(400, len(raw))
+            return self._reply(
+                400, {"error": "status must be one of: online, offline, error"}
+            )
+        row = {
+            "endpoint_id": endpoint_id,
+            "status": status,
+            "last_seen": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "metadata": body.get("metadata") or None,
+        }
+        with owner.lock:
+            owner.statuses[str(endpoint_id)] = (time.time(), row)
+        owner.counters.observe(200, len(raw), heartbeat=True)
+        self._reply(
+            200,
+            {
+                "success": True,
+                "message": "Endpoint status updated",
+                "endpoint_status": row,
+            },
+        )
+
+    def _get_status(self, q: Dict[str, List[str]]) -> None:
+        owner = self.server.owner
+        timeout = int(q.get("timeout", ["300"])[0])
+        now = time.time()
+        with owner.lock:
+            entries = dict(owner.statuses)
+
+        def _view(seen: float, row: Dict[str, Any]) -> Dict[str, Any]:
+            age = now - seen
+            return dict(
+                row,
+                computed_status="stale" if age > timeout else row["status"],
+                seconds_since_seen=int(age),
+            )
+
+        if "endpoint_id" in q:
+            endpoint_id = q["endpoint_id"][0]
+            entry = entries.get(endpoint_id)
+            if entry is None:
+                return self._reply(404, {"error": f"Endpoint {endpoint_id} not found"})
+            return self._reply(200, {"success": True, "endpoint_status": _view(*entry)})
+        rows = [
+            _view(*entries[k])
+            for k in sorted(entries)
+            if "status" not in q or entries[k][1]["status"] == q["status"][0]
+        ]
+        self._reply(
+            200,
+            {
+                "success": True,
+                "count": len(rows),
+                "timeout_seconds": timeout,
+                "endpoint_statuses": rows,
+            },
+        )
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # socketserver's default of 5 resets bursts of connects
+    owner: "IngestServer"
+
+
+# ---------------- Public server object ----------------
+
+
+class IngestServer:
+    """Threaded stand-in ingest server with fault injection and throughput counters."""
+
+    def __init__(
+        self,
+        api_key: str,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        rate_503: float = 0.0,
+        rate_429: float = 0.0,
+        retry_after_s: int = 1,
+        max_body_bytes: Optional[int] = None,
+        rate_413: float = 0.0,
+        keep_rows: int = 10000,
+        echo_rows: bool = False,
+        seed: Optional[int] = None,
+    ):
+        for name, rate in (
+            ("error_rate", error_rate),
+            ("rate_503", rate_503),
+            ("rate_429", rate_429),
+            ("rate_413", rate_413),
+        ):
+            if not 0.0 <= rate <= 1.0:
+                raise ValueError(f"{name} must be within 0..1")
+        self.api_key = api_key
+        self.host = host
+        self.port = port
+        self.latency_ms = float(latency_ms)
+        self.jitter_ms = float(jitter_ms)
+        self.error_rate = float(error_rate)
+        self.rate_503 = float(rate_503)
+        self.rate_429 = float(rate_429)
+        self.retry_after_s = int(retry_after_s)
+        self.max_body_bytes = max_body_bytes
+        self.rate_413 = float(rate_413)
+        self.echo_rows = echo_rows
+
+        self.counters = IngestStats()
+        self.rows: deque = deque(maxlen=keep_rows)
+        self.statuses: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self.lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._server: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # -- lifecycle --
+
+    def _bind(self) -> _Server:
+        self._server = _Server((self.host, self.port), _Handler)
+        self._server.owner = self
+        self.port = self._server.server_address[1]
+        return self._server
+
+    def start(self) -> "IngestServer":
+        self._bind()
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="IngestServer", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    # -- behaviour --
+
+    def _roll(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def delay(self) -> None:
+        ms = self.latency_ms
+        if self.jitter_ms > 0:
+            ms += self._roll() * self.jitter_ms
+        if ms > 0:
+            time.sleep(ms / 1000.0)
+
+    def inject(self, length: int) -> Optional[Tuple[int, Dict[str, Any], Dict]]:
+        """Pick an injected failure for this request, or None to process it normally."""
+        if self.max_body_bytes is not None and length > self.max_body_bytes:
+            return 413, {"success": False, "error": "Payload too large"}, {}
+        if self.rate_413 and self._roll() < self.rate_413:
+            return 413, {"success": False, "error": "Payload too large"}, {}
+        retry = {"Retry-After": str(self.retry_after_s)}
+        if self.rate_429 and self._roll() < self.rate_429:
+            return 429, {"success": False, "error": "Too many requests"}, retry
+        if self.rate_503 and self._roll() < self.rate_503:
+            return 503, {"success": False, "error": "Service unavailable"}, retry
+        if self.error_rate and self._roll() < self.error_rate:
+            return 500, {"success": False, "error": "Injected server error"}, {}
+        return None
+
+    def store(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        now = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        # The server stamps rows with its own clock, not the endpoint's timestamp
+        stored = [
+            dict(r, id=str(uuid.uuid4()), timestamp=now, created_at=now) for r in rows
+        ]
+        with self.lock:
+            self.rows.extend(stored)
+        return stored
+
+    def stats(self) -> Dict[str, Any]:
+        snap = self.counters.snapshot()
+        with self.lock:
+            snap["endpoints"] = len(self.statuses)
+        return snap
+
+    def reset(self) -> None:
+        self.counters.reset()
+        with self.lock:
+            self.rows.clear()
+            self.statuses.clear()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Local stand-in for the ingest API")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--api-key", required=True)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of 500s")
+    ap.add_argument("--rate-503", type=float, default=0.0, help="fraction of 503s")
+    ap.add_argument("--rate-429", type=float, default=0.0, help="fraction of 429s")
+    ap.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds")
+    ap.add_argument("--max-body-kb", type=int, default=None, help="413 above this")
+    ap.add_argument("--rate-413", type=float, default=0.0, help="fraction of 413s")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--report-sec", type=float, default=10.0, help="0 disables")
+    ap.add_argument("--log-level", default="INFO")
+    args = ap.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.INFO),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    try:
+        srv = IngestServer(
+            api_key=args.api_key,
+            host=args.host,
+            port=args.port,
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            rate_503=args.rate_503,
+            rate_429=args.rate_429,
+            retry_after_s=args.retry_after,
+            max_body_bytes=args.max_body_kb * 1024 if args.max_body_kb else None,
+            rate_413=args.rate_413,
+            seed=args.seed,
+        )
+    except ValueError as e:
+        print(f"[INGEST] {e}", file=sys.stderr)
+        return 2
+    srv.start()
+    log.info("Listening on %s (%s, %s)", srv.url, SCAN_PATH, STATUS_PATH)
+    try:
+        while True:
+            time.sleep(args.report_sec if args.report_sec > 0 else 3600)
+            if args.report_sec > 0:
+                s = srv.stats()
+                log.info(
+                    "req=%d rps=%.1f records=%d (%.0f/s recent) rejected=%d "
+                    "bytes=%d status=%s injected=%s",
+                    s["requests"],
+                    s["recent_rps"],
+                    s["records_accepted"],
+                    s["recent_records_per_s"],
+                    s["records_rejected"],
+                    s["bytes_in"],
+                    s["by_status"],
+                    s["injected"],
+                )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
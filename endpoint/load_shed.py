@@ -0,0 +1,293 @@
+"""
+load_shed.py
+Adaptive load shedding for stream.py when parsing falls behind the capture.
+
+When the frame rate spikes, stream.py reads the tcpdump pipe slower than tcpdump writes;
+the pipe fills, tcpdump drops packets silently and records arrive late. LoadShedder
+measures how far behind real time the input is and steps through degraded modes until
+the lag clears.
+
+Usage pattern:
+    from load_shed import LoadShedder
+
+    shed = LoadShedder(fd=lambda: 0, emit=ship.add)      # fd: pipe to measure (FIONREAD)
+    for raw_line in lines:
+        shed.tick(raw_line)                  # cheap; re-evaluates twice a second
+        keep, ftype = shed.admit_line(raw_line)  # data_only+: skip non-data frames
+        if not keep:
+            frames.count(ftype)              # still counted (and archived) as seen
+            continue
+        rec = shed.admit(frames.parse(raw_line, ftype or None))  # classified once
+        ...
+    shed.flush_expired(now)                  # from a timer: close windows on quiet input
+    shed.close()                             # emits open aggregation windows
+
+Signals (evaluated every check_s of wall time):
+    - lag: wall clock minus the capture timestamp of the line being read
+    - backlog: bytes waiting in the input pipe (FIONREAD)
+
+Levels (one step at a time, with hysteresis):
+    0 normal          every record
+    1 sample          at most one record per MAC per sample_s
+    2 data_only       + non-data frames are dropped before field extraction
+    3 aggregate_only  + records are folded into MacAggregator windows; one median
+                        record per MAC per window is emitted
+
+A level is entered when lag > lag_high_s or backlog > backlog_high has held for
+escalate_after_s, and left when lag < lag_low_s and backlog < backlog_low has held for
+recover_after_s. Every transition is counted and logged.
+"""
+
+from __future__ import annotations
+
+import array
+import fcntl
+import logging
+import re
+import termios
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aggregator import MacAggregator
+from parser_scan import classify_frame
+
+log = logging.getLogger("load_shed")
+
+LEVELS = ("normal", "sample", "data_only", "aggregate_only")
+# admit_line() result for a line admitted without classifying it (levels 0 and 1)
+UNCLASSIFIED = ""
+_TS_RE = re.compile(r"^(\d+\.\d+)")
+
+Record = Dict[str, Any]
+
+
+def pipe_backlog(fd: int) -> int:
+    """Bytes waiting to be read on fd (0 if the fd does not support FIONREAD)."""
+    buf = array.array("i", [0])
+    try:
+        fcntl.ioctl(fd, termios.FIONREAD, buf, True)
+    except OSError:
+        return 0
+    return buf[0]
+
+
+class LoadShedder:
+    """
+    Lag / backlog driven degraded modes for the stream loop.
+
+    - fd: callable returning the input fd for FIONREAD (None = lag only)
+    - emit: receives aggregated records in aggregate_only mode
+    - lag_high_s / lag_low_s, backlog_high / backlog_low: escalate / recover thresholds
+    - escalate_after_s / recover_after_s: how long a condition must hold
+    - sample_s: per-MAC sampling period (level >= 1)
+    - agg_window_s: aggregation window (level 3)
+    - max_level: highest level used (1..3)
+    """
+
+    def __init__(
+        self,
+        fd: Optional[Callable[[], Optional[int]]] = None,
+        emit: Optional[Callable[[Record], None]] = None,
+        lag_high_s: float = 2.0,
+        lag_low_s: float = 0.5,
+        backlog_high: int = 48 * 1024,
+        backlog_low: int = 8 * 1024,
+        escalate_after_s: float = 2.0,
+        recover_after_s: float = 10.0,
+        sample_s: float = 1.0,
+        agg_window_s: float = 2.0,
+        max_level: int = 3,
+        check_s: float = 0.5,
+        clock: Callable[[], float] = time.time,
+    ):
+        if lag_low_s > lag_high_s or backlog_low > backlog_high:
+            raise ValueError("low thresholds must not exceed high thresholds")
+        if not 1 <= max_level <= 3:
+            raise ValueError("max_level must be 1..3")
+        if max_level == 3 and emit is None:
+            raise ValueError("aggregate_only needs an emit callback")
+        self._fd = fd
+        self.emit = emit
+        self.lag_high_s = float(lag_high_s)
+        self.lag_low_s = float(lag_low_s)
+        self.backlog_high = int(backlog_high)
+        self.backlog_low = int(backlog_low)
+        self.escalate_after_s = float(escalate_after_s)
+        self.recover_after_s = float(recover_after_s)
+        self.sample_s = float(sample_s)
+        self.max_level = int(max_level)
+        self.check_s = float(check_s)
+        self._clock = clock
+
+        self.level = 0
+        self.lag_s = 0.0
+        self.backlog = 0
+        self._next_check = 0.0
+        self._over_since: Optional[float] = None
+        self._under_since: Optional[float] = None
+        self._last_kept: Dict[str, float] = {}
+        self._aggr = MacAggregator(window_s=agg_window_s, emit_cb=self._emit_aggregate)
+        self._latest_ts = 0.0
+        self.transitions: Dict[str, int] = {}
+        self.shed: Dict[str, int] = {"sample": 0, "data_only": 0, "aggregate_only": 0}
+
+    # --- Detection ---------------------------------------------------------------
+
+    def tick(self, raw_line: str) -> int:
+        """Re-evaluate the level (at most every check_s); returns the current level."""
+        now = self._clock()
+        if now < self._next_check:
+            return self.level
+        self._next_check = now + self.check_s
+        m = _TS_RE.match(raw_line)
+        if m:
+            self.lag_s = max(0.0, now - float(m.group(1)))
+        fd = self._fd() if self._fd else None
+        self.backlog = pipe_backlog(fd) if fd is not None else 0
+        self._evaluate(now)
+        if self.level == 3:
+            self._aggr.flush_expired(self._latest_ts)
+        return self.level
+
+    def _evaluate(self, now: float) -> None:
+        over = self.lag_s > self.lag_high_s or self.backlog > self.backlog_high
+        under = self.lag_s < self.lag_low_s and self.backlog < self.backlog_low
+        if not over:
+            self._over_since = None
+        elif self._over_since is None:
+            self._over_since = now
+        if not under:
+            self._under_since = None
+        elif self._under_since is None:
+            self._under_since = now
+        if over and self.level < self.max_level:
+            if now - self._over_since >= self.escalate_after_s:
+                self._set_level(self.level + 1)
+                self._over_since = now
+        elif under and self.level > 0:
+            if now - self._under_since >= self.recover_after_s:
+                self._set_level(self.level - 1)
+                self._under_since = now
+
+    def _set_level(self, level: int) -> None:
+        old = self.level
+        self.level = level
+        key = f"{LEVELS[old]}->{LEVELS[level]}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        logger = log.warning if level > old else log.info
+        logger(
+            "Load shedding %s -> %s (lag=%.1fs backlog=%d bytes)",
+            LEVELS[old],
+            LEVELS[level],
+            self.lag_s,
+            self.backlog,
+        )
+        if old == 3:
+            self._aggr.flush_all()
+        if level == 0:
+            self._last_kept.clear()
+
+    # --- Shedding ----------------------------------------------------------------
+
+    def admit_line(self, raw_line: str) -> Tuple[bool, str]:
+        """
+        (keep, frame_type): keep is False if the line should be skipped before parsing
+        (data_only and up); frame_type is UNCLASSIFIED below data_only. Pass the type
+        on to FrameFilter so the line is not classified a second time.
+        """
+        if self.level < 2:
+            return True, UNCLASSIFIED
+        ftype = classify_frame(raw_line)
+        if ftype == "data":
+            return True, ftype
+        self.shed["data_only"] += 1
+        return False, ftype
+
+    def admit(self, rec: Optional[Record]) -> Optional[Record]:
+        """The record, or None if the current level sheds / aggregates it."""
+        if rec is None or self.level == 0:
+            return rec
+        mac = rec["mac"]
+        ts = float(rec["timestamp"])
+        if ts > self._latest_ts:
+            self._latest_ts = ts
+        if self.level == 3:
+            self._aggr.add_sample(mac=mac, rssi=rec["rssi"], ts=ts)
+            self.shed["aggregate_only"] += 1
+            return None
+        last = self._last_kept.get(mac)
+        if last is not None and 0 <= ts - last < self.sample_s:
+            self.shed["sample"] += 1
+            return None
+        self._last_kept[mac] = ts
+        return rec
+
+    def _emit_aggregate(self, agg: Dict[str, Any]) -> None:
+        # Same compatible shape parser_scan emits: median RSSI at the window's end
+        self.emit(
+            {
+                "mac": agg["mac"],
+                "rssi": int(round(float(agg["median_rssi"]))),
+                "timestamp": float(agg["last_seen"]),
+            }
+        )
+
+    def flush_expired(self, now: Optional[float] = None) -> None:
+        """Emit aggregation windows that ended before capture time `now`."""
+        self._aggr.flush_expired(self._latest_ts if now is None else now)
+
+    def close(self) -> None:
+        """Emit records still held in aggregation windows."""
+        self._aggr.flush_all()
+
+    # --- Reporting ---------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "level": LEVELS[self.level],
+            "lag_s": self.lag_s,
+            "backlog": self.backlog,
+            "transitions": dict(self.transitions),
+            "shed": dict(self.shed),
+        }
+
+    def summary(self) -> str:
+        shed = " ".join(f"{k}={v}" for k, v in self.shed.items() if v) or "none"
+        return (
+            f"level={LEVELS[self.level]} lag={self.lag_s:.1f}s backlog={self.backlog} "
+            f"transitions={sum(self.transitions.values())} shed: {shed}"
+        )
+
+    def samples(self) -> List[Tuple[str, str, str, float]]:
+        """Metrics collector: level, lag, backlog, transitions and shed records."""
+        out: List[Tuple[str, str, str, float]] = [
+            ("load_shed_level", "gauge", "0 normal .. 3 aggregate_only", self.level),
+            (
+                "load_shed_lag_seconds",
+                "gauge",
+                "Wall clock minus capture ts",
+                self.lag_s,
+            ),
+            (
+                "load_shed_backlog_bytes",
+                "gauge",
+                "Bytes waiting in the input pipe",
+                self.backlog,
+            ),
+            (
+                "load_shed_transitions_total",
+                "counter",
+                "Degraded-mode transitions",
+                sum(self.transitions.values()),
+            ),
+        ]
+        out.extend(
+            (
+                f'load_shed_records_total{{mode="{k}"}}',
+                "counter",
+                "Lines / records shed by degraded mode",
+                v,
+            )
+            for k, v in sorted(self.shed.items())
+        )
+        return out
@@ -0,0 +1,273 @@
+"""
+metrics.py
+Lightweight metric primitives shared by the endpoint components.
+
+Usage pattern:
+    from metrics import Histogram, BYTES_BUCKETS
+
+    h = Histogram(BYTES_BUCKETS)
+    h.observe(1834)
+    h.snapshot()   # {"count": 1, "sum": 1834.0, "buckets": {"1024": 0, "4096": 1, ..., "+Inf": 1}}
+
+Buckets are cumulative upper bounds (Prometheus style): each bucket counts observations
+less than or equal to its bound, and "+Inf" equals the total count.
+
+Pipeline-wide registry:
+    from metrics import MetricsRegistry, start_http_server, JsonSnapshotWriter
+
+    reg = MetricsRegistry()
+    lines = reg.counter("lines_seen_total", "tcpdump lines read")
+    lines.inc()
+    reg.register_collector(lambda: [("queue_depth", "gauge", "pending records", 12)])
+    start_http_server(reg, port=9108)            # GET /metrics, /metrics.json (localhost)
+    JsonSnapshotWriter(reg, "/tmp/metrics.json")  # periodic JSON snapshot file
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Default bucket bounds
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+RECORDS_BUCKETS = (1, 10, 50, 100, 200, 500, 1000, 2000, 5000)
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _fmt_bound(b: float) -> str:
+    return str(int(b)) if float(b).is_integer() else repr(float(b))
+
+
+class Histogram:
+    """Fixed-bucket histogram with count and sum; safe to observe from several threads."""
+
+    def __init__(self, bounds: Sequence[float]):
+        if list(bounds) != sorted(bounds) or not bounds:
+            raise ValueError("bounds must be a non-empty ascending sequence")
+        self.bounds: List[float] = [float(b) for b in bounds]
+        self._counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[i] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self) -> Dict[str, object]:
+        """Cumulative bucket counts keyed by upper bound, plus count and sum."""
+        with self._lock:
+            counts = list(self._counts)
+            total, total_sum = self.count, self.sum
+        buckets: Dict[str, int] = {}
+        running = 0
+        for bound, n in zip(self.bounds, counts):
+            running += n
+            buckets[_fmt_bound(bound)] = running
+        buckets["+Inf"] = total
+        return {"count": total, "sum": total_sum, "buckets": buckets}
+
+
+class Counter:
+    """Monotonic counter. inc() is a plain attribute add (cheap enough for hot paths)."""
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n: int = 1) -> None:
+        self.value += n
+
+
+class Gauge:
+    """Point-in-time value."""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+# (name, kind, help, value) produced by pull-style collectors at scrape time
+Sample = Tuple[str, str, str, float]
+
+
+class MetricsRegistry:
+    """
+    Named metrics for the whole pipeline, rendered as Prometheus text or a JSON snapshot.
+
+    - counter(name, help) / gauge(name, help) / histogram(name, help, bounds)
+    - register_collector(fn): fn() -> List[Sample], evaluated only at scrape time, so
+      components can expose their existing counters without any hot-path cost.
+      Sample names may carry Prometheus labels, e.g. 'frames_total{type="beacon"}'.
+    - render_prometheus() / snapshot()
+    """
+
+    def __init__(self, prefix: str = "wifi_endpoint"):
+        self.prefix = prefix
+        self._metrics: Dict[str, Tuple[str, str, object]] = {}
+        self._collectors: List[Callable[[], List[Sample]]] = []
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def _full(self, name: str) -> str:
+        return f"{self.prefix}_{name}" if self.prefix else name
+
+    def _register(self, name: str, kind: str, help_text: str, obj):
+        full = self._full(name)
+        with self._lock:
+            existing = self._metrics.get(full)
+            if existing is not None:
+                if existing[0] != kind:
+                    raise ValueError(
+                        f"metric {full} already registered as {existing[0]}"
+                    )
+                return existing[2]
+            self._metrics[full] = (kind, help_text, obj)
+        return obj
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        return self._register(name, "counter", help_text, Counter())
+
+    def gauge(self, name: str, help_text: str = "") -> Gauge:
+        return self._register(name, "gauge", help_text, Gauge())
+
+    def histogram(
+        self, name: str, help_text: str = "", bounds: Sequence[float] = ()
+    ) -> Histogram:
+        return self._register(name, "histogram", help_text, Histogram(bounds))
+
+    def register_collector(self, fn: Callable[[], List[Sample]]) -> None:
+        with self._lock:
+            self._collectors.append(fn)
+
+    def _collect(self) -> List[Tuple[str, str, str, object]]:
+        with self._lock:
+            items = [(n, k, h, o) for n, (k, h, o) in self._metrics.items()]
+            collectors = list(self._collectors)
+        for fn in collectors:
+            try:
+                samples = fn()
+            except Exception:
+                continue
+            for name, kind, help_text, value in samples:
+                items.append((self._full(name), kind, help_text, value))
+        return sorted(items, key=lambda item: item[0])
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        described = set()
+        for name, kind, help_text, obj in self._collect():
+            # Labelled samples ('name{k="v"}') share one HELP/TYPE header
+            base = name.split("{", 1)[0]
+            if base not in described:
+                described.add(base)
+                if help_text:
+                    lines.append(f"# HELP {base} {help_text}")
+                lines.append(f"# TYPE {base} {kind}")
+            if isinstance(obj, Histogram):
+                snap = obj.snapshot()
+                for bound, n in snap["buckets"].items():
+                    lines.append(f'{name}_bucket{{le="{bound}"}} {n}')
+                lines.append(f"{name}_sum {snap['sum']}")
+                lines.append(f"{name}_count {snap['count']}")
+            else:
+                value = obj.value if isinstance(obj, (Counter, Gauge)) else obj
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, object]:
+        """JSON-friendly snapshot of every metric."""
+        out: Dict[str, object] = {
+            "timestamp": time.time(),
+            "uptime_s": round(time.time() - self.started, 3),
+        }
+        for name, _kind, _help, obj in self._collect():
+            if isinstance(obj, Histogram):
+                out[name] = obj.snapshot()
+            elif isinstance(obj, (Counter, Gauge)):
+                out[name] = obj.value
+            else:
+                out[name] = obj
+        return out
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry
+
+    def do_GET(self):  # noqa: N802 (http.server naming)
+        if self.path.split("?")[0] in ("/", "/metrics"):
+            body = self.registry.render_prometheus().encode("utf-8")
+            ctype = "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path.split("?")[0] == "/metrics.json":
+            body = json.dumps(self.registry.snapshot()).encode("utf-8")
+            ctype = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # keep scrapes out of the endpoint log
+        pass
+
+
+def start_http_server(
+    registry: MetricsRegistry, port: int, host: str = "127.0.0.1"
+) -> ThreadingHTTPServer:
+    """Serve /metrics (Prometheus text) and /metrics.json on a daemon thread."""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name="MetricsHTTP", daemon=True
+    ).start()
+    return server
+
+
+class JsonSnapshotWriter:
+    """Periodically writes registry.snapshot() to a JSON file (atomic replace)."""
+
+    def __init__(self, registry: MetricsRegistry, path: str, interval_s: float = 10.0):
+        self.registry = registry
+        self.path = path
+        self.interval_s = float(interval_s)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="MetricsJSON", daemon=True
+        )
+        self._thread.start()
+
+    def write(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.registry.snapshot(), f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.write()
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        """Stop the writer and write one final snapshot."""
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        try:
+            self.write()
+        except OSError:
+            pass
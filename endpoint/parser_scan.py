@@ -1,8 +1,28 @@
 """
 parser_scan.py
 Parses tcpdump lines to JSONL. With aggregation enabled, it emits one record per MAC
-per small time window (median RSSI). Output remains compatibility-safe for existing
-shipper/server: {mac, rssi, timestamp} ONLY.
+per small time window (median RSSI). Aggregated output remains compatibility-safe for
+existing shipper/server: {mac, rssi, timestamp} ONLY. With --agg-align the windows snap
+to epoch multiples of --agg-window and each record also carries its "window_id", so
+readings of the same device from several endpoints join on (mac, window_id).
+
+Frame types: every line is classified from its 802.11 frame-type token (Beacon, Probe
+Request, Request-To-Send, Data, BA, ...) before any field is extracted. parse_line()
+records carry it as "frame_type" (the server ignores unknown fields). FrameFilter applies
+an include/exclude policy on that type first, so excluded frames never pay for the
+timestamp / RSSI / MAC regexes, and keeps per-type counts.
+
+The CLI also runs records through sanitize.RecordSanitizer (--sanitize), so readings the
+server would reject (e.g. -111 dBm) never reach the aggregator or the output.
+
+Usage pattern:
+    from parser_scan import FrameFilter, parse_line
+
+    parse_line(line)   # {"mac", "rssi", "timestamp", "frame_type"} or None
+
+    frames = FrameFilter(exclude={"beacon", "rts"})   # or include={"probe_request", "data"}
+    rec = frames.parse(line)                           # None when filtered or unparsable
+    frames.snapshot()                                  # {"seen": {...}, "dropped": {...}}
 """
 
 from __future__ import annotations
@@ -13,9 +33,14 @@ import os
 import json
 import signal
 import argparse
-from typing import Optional, Dict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 from aggregator import MacAggregator  # local module
+from dedupe import RetryDedupe
+from event_loop import CaptureClock, TimerLoop
+from profiler import StageProfiler
+from random_mac import RANDOM_MAC_MODES, RandomMacCollapser
+from sanitize import SANITIZE_MODES, RecordSanitizer
 
 # --- Regex patterns for tcpdump parsing ---
 TS_RE = re.compile(r"^(\d+\.\d{3,})")
@@ -23,17 +48,60 @@ RSSI_RE = re.compile(r"(-?\d{1,3})dBm signal")
 MAC_TA = re.compile(r"\bTA:([0-9A-Fa-f:]{17})\b")
 MAC_SA = re.compile(r"\bSA:([0-9A-Fa-f:]{17})\b")
 
+# tcpdump frame-type token -> frame_type name. The first token on the line wins, and
+# it always precedes the SSID / payload text that could contain the same words.
+FRAME_TYPES: Dict[str, str] = {
+    "Beacon": "beacon",
+    "Probe Request": "probe_request",
+    "Probe Response": "probe_response",
+    "Assoc Request": "assoc_request",
+    "Assoc Response": "assoc_response",
+    "ReAssoc Request": "reassoc_request",
+    "ReAssoc Response": "reassoc_response",
+    "Disassociation": "disassociation",
+    "Authentication": "authentication",
+    "DeAuthentication": "deauthentication",
+    "Action": "action",
+    "ATIM": "atim",
+    "Request-To-Send": "rts",
+    "Clear-To-Send": "cts",
+    "Acknowledgment": "ack",
+    "BA": "ba",
+    "BAR": "bar",
+    "Power Save-Poll": "ps_poll",
+    "CF-End": "cf_end",
+    "QoS": "data",  # "CF +QoS" precedes "Data"; QoS-Null frames have no "Data" token
+    "Data": "data",
+}
+OTHER_FRAME = "other"
+RADIOTAP_TAIL = " signal antenna "
+FRAME_TYPE_NAMES = frozenset(FRAME_TYPES.values()) | {OTHER_FRAME}
+FRAME_RE = re.compile(
+    r"\b("
+    + "|".join(re.escape(t) for t in sorted(FRAME_TYPES, key=len, reverse=True))
+    + r")\b"
+)
+
+Record = Dict[str, object]
+
 
 def normal_mac(m: str) -> str:
     """Normalize MAC address to lowercase."""
     return m.lower()
 
 
-def parse_line(line: str) -> Optional[Dict[str, object]]:
-    """
-    Parse one tcpdump line and extract timestamp, RSSI, and MAC.
-    Returns None if required fields are missing.
-    """
+def classify_frame(line: str) -> str:
+    """Frame type name of a tcpdump line ("other" if no known token is present)."""
+    # The token follows the radiotap fields: start at the first per-antenna signal,
+    # which skips ~half the line (and the regex cost with it); then try the prefix
+    start = line.find(RADIOTAP_TAIL) + 1
+    m = FRAME_RE.search(line, start) or (
+        FRAME_RE.search(line, 0, start) if start else None
+    )
+    return FRAME_TYPES[m.group(1)] if m else OTHER_FRAME
+
+
+def _parse_fields(line: str, frame_type: str) -> Optional[Record]:
     ts_match = TS_RE.search(line)
     rssi_match = RSSI_RE.search(line)
     mac_match = MAC_TA.search(line) or MAC_SA.search(line)
@@ -44,15 +112,145 @@ def parse_line(line: str) -> Optional[Dict[str, object]]:
     ts = float(ts_match.group(1))
     rssi = int(rssi_match.group(1))
     mac = normal_mac(mac_match.group(1))
-    return {"mac": mac, "rssi": rssi, "timestamp": ts}
+    return {"mac": mac, "rssi": rssi, "timestamp": ts, "frame_type": frame_type}
+
+
+def parse_line(line: str) -> Optional[Record]:
+    """
+    Parse one tcpdump line and extract timestamp, RSSI, MAC and frame type.
+    Returns None if required fields are missing.
+    """
+    return _parse_fields(line, classify_frame(line))
+
+
+def parse_frame_types(spec: Optional[str]) -> Optional[frozenset]:
+    """'beacon, rts' -> frozenset({'beacon', 'rts'}); empty/None -> None."""
+    if not spec:
+        return None
+    names = frozenset(p.strip().lower() for p in spec.split(",") if p.strip())
+    unknown = names - FRAME_TYPE_NAMES
+    if unknown:
+        raise ValueError(
+            f"Unknown frame type(s) {sorted(unknown)}; "
+            f"expected some of {sorted(FRAME_TYPE_NAMES)}"
+        )
+    return names or None
+
+
+class FrameFilter:
+    """
+    Frame-type policy applied before field extraction, plus per-type line counts.
+
+    - include: only these frame types are parsed (None = all)
+    - exclude: these frame types are dropped (applied after include)
+    - parse: optional replacement for parse_line (the record gets frame_type added);
+      by default lines are classified once and parsed with the same regexes
+    """
+
+    def __init__(
+        self,
+        include: Optional[Iterable[str]] = None,
+        exclude: Optional[Iterable[str]] = None,
+        parse: Optional[Callable[[str], Optional[Record]]] = None,
+    ):
+        self.include = frozenset(include) if include else None
+        self.exclude = frozenset(exclude) if exclude else frozenset()
+        for names in (self.include or (), self.exclude):
+            unknown = set(names) - FRAME_TYPE_NAMES
+            if unknown:
+                raise ValueError(f"Unknown frame type(s) {sorted(unknown)}")
+        if parse is None or parse is parse_line:
+            self._fields = _parse_fields
+        else:
+            self._fields = lambda line, ftype: _tag(parse(line), ftype)
+        self.seen: Dict[str, int] = {}
+        self.dropped: Dict[str, int] = {}
+
+    @property
+    def active(self) -> bool:
+        """True when the policy can drop anything."""
+        return self.include is not None or bool(self.exclude)
+
+    def allows(self, frame_type: str) -> bool:
+        if self.include is not None and frame_type not in self.include:
+            return False
+        return frame_type not in self.exclude
+
+    def parse(self, line: str, frame_type: Optional[str] = None) -> Optional[Record]:
+        """Record for the line, or None; frame_type skips classification if known."""
+        ftype = frame_type or classify_frame(line)
+        self.seen[ftype] = self.seen.get(ftype, 0) + 1
+        if not self.allows(ftype):
+            self.dropped[ftype] = self.dropped.get(ftype, 0) + 1
+            return None
+        return self._fields(line, ftype)
 
+    def count(self, frame_type: str) -> None:
+        """Count a line dropped before parsing (e.g. by load shedding) as seen."""
+        self.seen[frame_type] = self.seen.get(frame_type, 0) + 1
 
-def _iter_lines(source_path: Optional[str]):
-    """Yield lines from file or stdin."""
-    if source_path:
+    def merge(self, counts: Dict[str, Dict[str, int]]) -> None:
+        """Add counts in snapshot() shape (e.g. from parser worker processes)."""
+        for key, target in (("seen", self.seen), ("dropped", self.dropped)):
+            for ftype, n in counts.get(key, {}).items():
+                target[ftype] = target.get(ftype, 0) + n
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        return {"seen": dict(self.seen), "dropped": dict(self.dropped)}
+
+    def summary(self) -> str:
+        """'beacon=120 rts=80 data=12 (dropped beacon=120)', most frequent first."""
+        parts = [
+            f"{k}={v}" for k, v in sorted(self.seen.items(), key=lambda kv: -kv[1])
+        ]
+        text = " ".join(parts) or "none"
+        if self.dropped:
+            text += " (dropped " + " ".join(
+                f"{k}={v}" for k, v in sorted(self.dropped.items())
+            )
+            text += ")"
+        return text
+
+    def samples(self) -> List[Tuple[str, str, str, float]]:
+        """Metrics collector: frames_total / frames_dropped_total by type."""
+        out = [
+            (f'frames_total{{type="{k}"}}', "counter", "Lines by frame type", v)
+            for k, v in sorted(self.seen.items())
+        ]
+        out.extend(
+            (
+                f'frames_dropped_total{{type="{k}"}}',
+                "counter",
+                "Lines dropped by the frame-type policy",
+                v,
+            )
+            for k, v in sorted(self.dropped.items())
+        )
+        return out
+
+
+def _tag(rec: Optional[Record], frame_type: str) -> Optional[Record]:
+    if rec is not None and "frame_type" not in rec:
+        rec["frame_type"] = frame_type
+    return rec
+
+
+def _iter_lines(
+    source_path: Optional[str],
+    loop: Optional[TimerLoop] = None,
+    stop: Optional[Callable[[], bool]] = None,
+):
+    """Yield lines from file or stdin (through `loop`, so its timers run while idle)."""
+    if source_path and loop:
+        with open(source_path, "rb") as f:
+            yield from loop.lines(f, encoding="utf-8", stop=stop)
+    elif source_path:
         with open(source_path, "r", encoding="utf-8") as f:
             for line in f:
                 yield line
+    elif loop:
+        stdin = getattr(sys.stdin, "buffer", sys.stdin)
+        yield from loop.lines(stdin, encoding="utf-8", stop=stop)
     else:
         for line in sys.stdin:
             yield line
@@ -80,12 +278,102 @@ def main():
         default=2.0,
         help="Aggregation window in seconds (default: 2.0)",
     )
+    parser.add_argument(
+        "--agg-align",
+        action="store_true",
+        help="Align windows to epoch multiples of --agg-window and add window_id "
+        "(floor(ts / window)) to each record, for cross-endpoint joins",
+    )
     parser.add_argument(
         "--emit-raw",
         action="store_true",
         help="Also emit raw per-packet records (debug)",
     )
+    parser.add_argument(
+        "--frame-include",
+        default=None,
+        help="Only parse these frame types, comma-separated (e.g. probe_request,data)",
+    )
+    parser.add_argument(
+        "--frame-exclude",
+        default=None,
+        help="Drop these frame types before parsing, comma-separated (e.g. beacon,rts)",
+    )
+    parser.add_argument(
+        "--frame-stats",
+        action="store_true",
+        help="Print per-frame-type line counts to stderr on exit",
+    )
+    parser.add_argument(
+        "--sanitize",
+        choices=SANITIZE_MODES,
+        default="drop",
+        help="Records the server would reject (RSSI outside -100..0, bad MAC / "
+        "timestamp): drop them, clamp RSSI into range, or keep them (default: drop)",
+    )
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Drop 802.11 retransmissions (same IV, or Retry flag within --dedupe-gap-ms)",
+    )
+    parser.add_argument(
+        "--dedupe-gap-ms",
+        type=float,
+        default=50.0,
+        help="Retry frames without IV this close to the previous one are copies "
+        "(default: 50)",
+    )
+    parser.add_argument(
+        "--random-mac",
+        choices=RANDOM_MAC_MODES,
+        default="off",
+        help="Randomized (locally administered) MACs: keep them out of the output and "
+        "print one summary line per window to stderr, drop them, or aggregate them "
+        "like any MAC (default: off)",
+    )
+    parser.add_argument(
+        "--random-mac-window",
+        type=float,
+        default=10.0,
+        help="Summary window in seconds for --random-mac summary (default: 10)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time each stage (sampled) and print a report to stderr on exit / SIGUSR1",
+    )
+    parser.add_argument(
+        "--profile-sample",
+        type=int,
+        default=100,
+        help="Time 1 in N lines in --profile mode (default: 100)",
+    )
+    parser.add_argument(
+        "--profile-cprofile-sec",
+        type=float,
+        default=0.0,
+        help="Also run cProfile for the first N seconds in --profile mode",
+    )
     args = parser.parse_args()
+    try:
+        frames = FrameFilter(
+            include=parse_frame_types(args.frame_include),
+            exclude=parse_frame_types(args.frame_exclude),
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    sanitizer = None if args.sanitize == "off" else RecordSanitizer(args.sanitize)
+    dedupe = (
+        RetryDedupe(retry_gap_s=args.dedupe_gap_ms / 1000.0) if args.dedupe else None
+    )
+
+    prof = None
+    if args.profile:
+        prof = StageProfiler(
+            sample_every=args.profile_sample, cprofile_s=args.profile_cprofile_sec
+        )
+        prof.install_sigusr1(sys.stderr)
 
     # Open output
     if args.out_path == "-":
@@ -108,9 +396,23 @@ def main():
             "rssi": int(round(float(agg["median_rssi"]))),
             "timestamp": float(agg["last_seen"]),
         }
+        if "window_id" in agg:
+            compat["window_id"] = agg["window_id"]
         _emit_line(compat)
 
-    aggr = MacAggregator(window_s=args.agg_window, emit_cb=_emit_json_compat)
+    aggr = MacAggregator(
+        window_s=args.agg_window, emit_cb=_emit_json_compat, aligned=args.agg_align
+    )
+
+    # Window summaries are not device records: keep them out of the JSONL output
+    def _emit_random_summary(summary: Dict[str, object]) -> None:
+        sys.stderr.write(f"random macs window: {json.dumps(summary)}\n")
+
+    rand = None
+    if args.random_mac != "off":
+        rand = RandomMacCollapser(
+            args.random_mac, args.random_mac_window, emit=_emit_random_summary
+        )
 
     shutdown = False
 
@@ -121,16 +423,41 @@ def main():
     signal.signal(signal.SIGINT, _graceful)
     signal.signal(signal.SIGTERM, _graceful)
 
+    # Windows close on a timer against the capture clock, so a quiet channel still
+    # emits them within agg_window + tick (and not only when the next line arrives)
+    loop = TimerLoop()
+    clock = CaptureClock()
+    tick_s = min(0.5, args.agg_window / 4)
+
+    def _flush_windows() -> None:
+        now = clock.now()
+        if now is None:
+            return
+        aggr.flush_expired(now)
+        if rand:
+            rand.flush_expired(now)
+
+    loop.every(tick_s, _flush_windows)
+
     try:
-        last_ts_seen: Optional[float] = None
-        for line in _iter_lines(args.source):
+        lines = _iter_lines(args.source, loop, stop=lambda: shutdown)
+        if prof:
+            lines = prof.iterate("read", lines)
+        for line in lines:
             if shutdown:
                 break
 
-            record = parse_line(line)
+            t = prof.start() if prof else None
+            record = frames.parse(line)
+            if dedupe:
+                record = dedupe.filter(record, line)
+            if sanitizer:
+                record = sanitizer.apply(record)
+            if rand:
+                record = rand.route(record)
+            if t:
+                t = prof.lap("parse", t)
             if record is None:
-                # Even if no record, allow periodic flush based on last capture ts (if any)
-                aggr.flush_expired(last_ts_seen)
                 continue
 
             if args.emit_raw:
@@ -139,19 +466,36 @@ def main():
             mac = str(record["mac"])
             rssi = int(record["rssi"])
             ts = float(record["timestamp"])
-            last_ts_seen = ts
+            clock.ts = ts
 
             # We are not parsing channel yet; pass -1 as placeholder
             aggr.add_sample(mac=mac, rssi=rssi, ts=ts, channel=-1)
 
             # Flush any windows that have expired relative to this capture timestamp
-            aggr.flush_expired(last_ts_seen)
+            aggr.flush_expired(ts)
+            if t:
+                prof.lap("aggregate", t)
 
         # graceful shutdown
         aggr.flush_all()
+        if rand:
+            rand.flush()
     finally:
         if out is not sys.stdout:
             out.close()
+        if prof:
+            prof.stop_cprofile()
+            prof.write_report(sys.stderr)
+        if args.frame_stats or frames.active:
+            sys.stderr.write(f"frames: {frames.summary()}\n")
+        if sanitizer and (sanitizer.rejected or sanitizer.clamped):
+            sys.stderr.write(f"invalid: {sanitizer.summary()}\n")
+        if dedupe:
+            sys.stderr.write(f"retransmissions: {dedupe.summary()}\n")
+        if rand:
+            sys.stderr.write(f"random macs: {rand.summary()}\n")
+        if args.agg_align and aggr.late_dropped:
+            sys.stderr.write(f"late samples dropped: {aggr.late_dropped}\n")
 
 
 if __name__ == "__main__":
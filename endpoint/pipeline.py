@@ -0,0 +1,363 @@
+"""
+pipeline.py
+Multi-process capture pipeline: one reader process fills a shared-memory ring buffer with
+raw tcpdump bytes, N parser worker processes decode and parse it, and the parent process
+receives the parsed records in input order (and therefore in order per MAC) to hand to
+the Shipper. This lets parsing use more than one core on a Pi.
+
+Usage pattern:
+    from pipeline import ProcessPipeline
+    from parser_scan import FrameFilter
+
+    frames = FrameFilter(exclude={"beacon"})
+    pipe = ProcessPipeline(None, workers=3, parse=frames.parse, counters=frames)
+    pipe.start()
+    for records in pipe.results():   # lists of records, in input order
+        for rec in records:
+            ship.add(rec)
+        if stopping:
+            pipe.stop()                  # reader stops; everything already read still arrives
+    pipe.close()
+
+Ring layout (multiprocessing.shared_memory):
+    [slots x uint32 length][slots x slot_bytes data]
+    The reader packs as many complete lines as fit into one slot (a chunk). Workers claim
+    slots in order under a lock and copy the chunk out before releasing the slot, so slots
+    are recycled strictly in order; parsing runs outside the lock, in parallel.
+    Chunks carry their ring sequence number and the parent re-orders them before release.
+
+Counters: with counters= (an object with snapshot() / merge(), like the FrameFilter whose
+parse method the workers run), every chunk also carries the change in the worker's copy
+of snapshot(); results() merges it into the parent's object, so per-type counts cover the
+lines the workers dropped, not only the records that came back.
+
+Shutdown: stop() (or SIGTERM to the parent, which calls stop()) makes the reader finish
+its current chunk and publish one end-of-input marker per worker. Workers drain every
+chunk still in the ring, so no buffered line is lost. Child processes ignore SIGINT and
+SIGTERM from the terminal; the parent coordinates the shutdown.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing as mp
+import os
+import queue
+import signal
+import struct
+import threading
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+log = logging.getLogger("pipeline")
+
+_LEN = struct.Struct("=I")
+_EOF = 0xFFFFFFFF
+
+Record = Dict[str, Any]
+
+
+class _Stop(Exception):
+    """Raised inside the reader's blocking read when it is asked to stop."""
+
+
+class ProcessPipeline:
+    """Reader process → shared-memory ring → N parser processes → ordered results."""
+
+    def __init__(
+        self,
+        source_path: Optional[str],
+        workers: int,
+        parse: Callable[[str], Optional[Record]],
+        slots: int = 64,
+        slot_bytes: int = 64 * 1024,
+        counters: Optional[Any] = None,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        if slots < 2:
+            raise ValueError("slots must be >= 2")
+        self.source_path = source_path
+        self.workers = int(workers)
+        self.parse = parse
+        self.slots = int(slots)
+        self.slot_bytes = int(slot_bytes)
+        self.counters = counters
+
+        # fork: children inherit the ring, the stdin fd and the parse function as-is.
+        # Call start() before the caller starts any thread: a forked child only gets the
+        # forking thread, and locks other threads held (logging, urllib) stay locked.
+        self._ctx = mp.get_context("fork")
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._procs: List[mp.Process] = []
+        self._reader: Optional[mp.Process] = None
+        self._results: "mp.Queue" = self._ctx.Queue()
+        self._free = self._ctx.Semaphore(self.slots)
+        self._filled = self._ctx.Semaphore(0)
+        self._read_lock = self._ctx.Lock()
+        self._read_idx = self._ctx.Value("q", 0, lock=False)
+        self._stop = self._ctx.Event()
+        self._abort = self._ctx.Event()
+        self._stdin_fd: Optional[int] = None
+
+        self.lines = 0
+        self.skipped = 0
+        self.chunks = 0
+        self.max_reorder = 0
+
+    # ---------------- Parent API ----------------
+
+    def start(self) -> None:
+        if threading.active_count() > 1:
+            log.warning(
+                "Forking parser processes with %d threads running; start the pipeline "
+                "before other threads",
+                threading.active_count(),
+            )
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=self.slots * (_LEN.size + self.slot_bytes)
+        )
+        if self.source_path is None:
+            # multiprocessing closes sys.stdin in children; hand the reader a duplicate
+            self._stdin_fd = os.dup(0)
+        self._reader = self._ctx.Process(
+            target=self._reader_main, name="PipelineReader", daemon=True
+        )
+        self._reader.start()
+        for i in range(self.workers):
+            p = self._ctx.Process(
+                target=self._worker_main, args=(i,), name=f"PipelineParser-{i}"
+            )
+            p.daemon = True
+            p.start()
+            self._procs.append(p)
+        if self._stdin_fd is not None:
+            os.close(self._stdin_fd)
+            self._stdin_fd = None
+        log.info(
+            "Pipeline started: 1 reader + %d parsers, ring %d x %d KiB",
+            self.workers,
+            self.slots,
+            self.slot_bytes // 1024,
+        )
+
+    def stop(self) -> None:
+        """Ask the reader to stop; already-read input keeps flowing to results()."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        if self._reader is not None and self._reader.is_alive():
+            try:
+                os.kill(self._reader.pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+    def results(self, poll_s: float = 0.5) -> Iterator[List[Record]]:
+        """
+        Yield parsed record lists in input order until every worker has finished.
+        Yields [] every poll_s while idle so the caller can do periodic work.
+        Ends early (after releasing what arrived) if a parser process dies.
+        """
+        pending: Dict[int, List[Record]] = {}
+        next_seq = 0
+        done: Set[int] = set()
+        while len(done) < self.workers:
+            try:
+                msg = self._results.get(timeout=poll_s)
+            except queue.Empty:
+                if not self._check_children(done):
+                    break
+                yield []
+                continue
+            kind = msg[0]
+            if kind == "done":
+                done.add(msg[1])
+                continue
+            _, seq, records, lines, skipped, counts = msg
+            if counts:
+                self.counters.merge(counts)
+            self.lines += lines
+            self.skipped += skipped
+            self.chunks += 1
+            pending[seq] = records
+            self.max_reorder = max(self.max_reorder, len(pending))
+            while next_seq in pending:
+                yield pending.pop(next_seq)
+                next_seq += 1
+            # A gap wider than the ring usually means the chunk's parser died
+            if len(pending) > self.slots and not self._check_children(done):
+                break
+        # A chunk can only be missing if a worker died; release the rest anyway
+        for seq in sorted(pending):
+            yield pending[seq]
+
+    def close(self) -> None:
+        self._abort.set()
+        for p in [self._reader] + self._procs:
+            if p is not None:
+                p.join(timeout=5.0)
+                if p.is_alive():
+                    p.terminate()
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "chunks": self.chunks,
+            "lines": self.lines,
+            "skipped": self.skipped,
+            "max_reorder": self.max_reorder,
+        }
+
+    def _check_children(self, done: Set[int]) -> bool:
+        """
+        Unblock the workers if the reader died without publishing end markers.
+        Returns False (and aborts the pipeline) if a parser died before reporting done:
+        its chunk is lost and it may have died holding the ring lock.
+        """
+        reader = self._reader
+        if reader is not None and reader.exitcode not in (None, 0):
+            if not self._abort.is_set():
+                log.error("Pipeline reader exited with code %s", reader.exitcode)
+                self._abort.set()
+        for i, p in enumerate(self._procs):
+            if i not in done and p.exitcode not in (None, 0):
+                log.error(
+                    "Pipeline parser %s exited with code %s; stopping the pipeline",
+                    p.name,
+                    p.exitcode,
+                )
+                self._abort.set()
+                self.stop()
+                return False
+        return True
+
+    # ---------------- Reader process ----------------
+
+    def _reader_main(self) -> None:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        state = {"in_read": False}
+
+        def _on_term(*_):
+            self._stop.set()
+            if state["in_read"]:
+                raise _Stop()
+
+        signal.signal(signal.SIGTERM, _on_term)
+
+        if self.source_path is not None:
+            fd = os.open(self.source_path, os.O_RDONLY)
+        else:
+            fd = self._stdin_fd
+        buf = self._shm.buf
+        seq = 0
+        carry = b""
+        try:
+            while not self._stop.is_set():
+                try:
+                    state["in_read"] = True
+                    if self._stop.is_set():
+                        break
+                    data = os.read(fd, self.slot_bytes - len(carry))
+                finally:
+                    state["in_read"] = False
+                if not data:
+                    break
+                carry += data
+                cut = carry.rfind(b"\n") + 1
+                if cut == 0 and len(carry) < self.slot_bytes:
+                    continue  # wait for the rest of the line
+                if cut == 0:
+                    cut = len(carry)  # oversized line: ship as-is (will not parse)
+                seq = self._publish(buf, seq, carry[:cut])
+                carry = carry[cut:]
+        except _Stop:
+            pass
+        finally:
+            if carry:
+                seq = self._publish(buf, seq, carry)
+            for _ in range(self.workers):
+                seq = self._publish(buf, seq, None)
+            os.close(fd)
+
+    def _publish(self, buf, seq: int, chunk: Optional[bytes]) -> int:
+        self._free.acquire()
+        slot = seq % self.slots
+        if chunk is None:
+            _LEN.pack_into(buf, slot * _LEN.size, _EOF)
+        else:
+            base = self.slots * _LEN.size + slot * self.slot_bytes
+            buf[base : base + len(chunk)] = chunk
+            _LEN.pack_into(buf, slot * _LEN.size, len(chunk))
+        self._filled.release()
+        return seq + 1
+
+    # ---------------- Worker processes ----------------
+
+    def _worker_main(self, worker_id: int) -> None:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        buf = self._shm.buf
+        parse = self.parse
+        counters = self.counters
+        last = counters.snapshot() if counters is not None else None
+        try:
+            while True:
+                if not self._filled.acquire(timeout=0.5):
+                    if self._abort.is_set():
+                        return
+                    continue
+                # Claim + copy under the lock so slots are released strictly in order
+                with self._read_lock:
+                    seq = self._read_idx.value
+                    self._read_idx.value = seq + 1
+                    slot = seq % self.slots
+                    (length,) = _LEN.unpack_from(buf, slot * _LEN.size)
+                    data = None
+                    if length != _EOF:
+                        base = self.slots * _LEN.size + slot * self.slot_bytes
+                        data = bytes(buf[base : base + length])
+                    self._free.release()
+                if data is None:
+                    return
+
+                records: List[Record] = []
+                lines = data.decode("utf-8", errors="replace").splitlines(True)
+                for line in lines:
+                    rec = parse(line)
+                    if rec is not None:
+                        records.append(rec)
+                counts = None
+                if counters is not None:
+                    now = counters.snapshot()
+                    counts = _delta(now, last)
+                    last = now
+                self._results.put(
+                    (
+                        "chunk",
+                        seq,
+                        records,
+                        len(lines),
+                        len(lines) - len(records),
+                        counts,
+                    )
+                )
+        finally:
+            self._results.put(("done", worker_id))
+
+
+def _delta(
+    now: Dict[str, Dict[str, int]], last: Dict[str, Dict[str, int]]
+) -> Dict[str, Dict[str, int]]:
+    """Per-key counter increase between two snapshot() results (empty keys omitted)."""
+    out: Dict[str, Dict[str, int]] = {}
+    for key, counts in now.items():
+        before = last.get(key, {})
+        changed = {k: v - before.get(k, 0) for k, v in counts.items()}
+        changed = {k: v for k, v in changed.items() if v}
+        if changed:
+            out[key] = changed
+    return out
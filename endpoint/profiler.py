@@ -0,0 +1,229 @@
+"""
+profiler.py
+Low-overhead, sampled per-stage timing for the stream / parser_scan pipelines (--profile).
+
+Usage pattern:
+    from profiler import StageProfiler
+
+    prof = StageProfiler(sample_every=100, cprofile_s=30)
+    for line in prof.iterate("read", lines):     # times next() on sampled iterations
+        t = prof.start()                         # None except on every Nth call
+        rec = parse_line(line)
+        if t:
+            t = prof.lap("parse", t)             # records wall + CPU time, restarts the clock
+        ...
+    prof.install_sigusr1(sys.stderr)             # `kill -USR1 <pid>` dumps a report
+    prof.write_report(sys.stderr)                # on shutdown
+
+Each stage keeps a wall-clock and a CPU-time (time.thread_time, i.e. the calling thread)
+histogram. Only one iteration in sample_every pays for the clock reads, so the profile
+mode can stay on in the field. Stages timed with begin() (e.g. the shipper's send) are
+recorded on every call. The report's est_total/share columns scale sampled stages back up
+by sample_every so the two kinds can be compared.
+
+With cprofile_s > 0, cProfile runs on the main thread for the first cprofile_s seconds and
+its top functions are appended to the report.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import pstats
+import signal
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, TypeVar
+
+from metrics import Histogram
+
+# Seconds; stages range from microseconds (parse_line) to seconds (HTTP POST)
+STAGE_BUCKETS = (
+    1e-6,
+    2e-6,
+    5e-6,
+    1e-5,
+    2e-5,
+    5e-5,
+    1e-4,
+    2e-4,
+    5e-4,
+    1e-3,
+    5e-3,
+    1e-2,
+    5e-2,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+)
+
+# (wall start, cpu start, scale): scale is sample_every for sampled tokens, else 1
+Token = Tuple[float, float, int]
+T = TypeVar("T")
+
+
+def _quantile(snap: Dict[str, object], q: float) -> float:
+    """Upper bound of the bucket holding quantile q (from a Histogram snapshot)."""
+    total = snap["count"]
+    if not total:
+        return 0.0
+    target = q * total
+    for bound, n in snap["buckets"].items():
+        if n >= target:
+            return float("inf") if bound == "+Inf" else float(bound)
+    return float("inf")
+
+
+def _fmt_s(v: float) -> str:
+    if v == float("inf"):
+        return "   >5s"
+    if v >= 1.0:
+        return f"{v:5.2f}s"
+    if v >= 1e-3:
+        return f"{v * 1e3:4.1f}ms"
+    return f"{v * 1e6:4.0f}us"
+
+
+class StageProfiler:
+    """Sampled wall/CPU histograms per pipeline stage, plus an optional cProfile window."""
+
+    def __init__(self, sample_every: int = 100, cprofile_s: float = 0.0):
+        if sample_every < 1:
+            raise ValueError("sample_every must be >= 1")
+        self.sample_every = int(sample_every)
+        self.started = time.time()
+        self._n = 0
+        self._wall: Dict[str, Histogram] = {}
+        self._cpu: Dict[str, Histogram] = {}
+        self._order: List[str] = []
+        self._scale: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._cprofile_until = 0.0
+        self._cprofile_stats: Optional[str] = None
+        if cprofile_s and cprofile_s > 0:
+            self._cprofile = cProfile.Profile()
+            self._cprofile_until = time.monotonic() + float(cprofile_s)
+            self._cprofile.enable()
+
+    # ---------------- Timing ----------------
+
+    def start(self) -> Optional[Token]:
+        """Start a timing token on one call in sample_every; otherwise None."""
+        self._n += 1
+        if self._n % self.sample_every:
+            return None
+        if self._cprofile is not None and time.monotonic() >= self._cprofile_until:
+            self.stop_cprofile()
+        return self._sampled_token()
+
+    def begin(self) -> Token:
+        """Start an unsampled timing token (for rare, expensive stages)."""
+        return (time.perf_counter(), time.thread_time(), 1)
+
+    def _sampled_token(self) -> Token:
+        return (time.perf_counter(), time.thread_time(), self.sample_every)
+
+    def lap(self, stage: str, token: Token) -> Token:
+        """Record the time since token under stage; returns a fresh token."""
+        wall, cpu = time.perf_counter(), time.thread_time()
+        hists = self._wall.get(stage)
+        if hists is None:
+            with self._lock:
+                if stage not in self._wall:
+                    self._wall[stage] = Histogram(STAGE_BUCKETS)
+                    self._cpu[stage] = Histogram(STAGE_BUCKETS)
+                    self._scale[stage] = token[2]
+                    self._order.append(stage)
+            hists = self._wall[stage]
+        hists.observe(wall - token[0])
+        self._cpu[stage].observe(cpu - token[1])
+        return (time.perf_counter(), time.thread_time(), token[2])
+
+    def iterate(self, stage: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Yield from iterable, timing next() on sampled iterations (the read stage)."""
+        it = iter(iterable)
+        n = 0
+        while True:
+            # Own counter: start() is also called once per line by the loop body
+            n += 1
+            t = None if n % self.sample_every else self._sampled_token()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            if t:
+                self.lap(stage, t)
+            yield item
+
+    # ---------------- cProfile window ----------------
+
+    def stop_cprofile(self, top: int = 25) -> None:
+        if self._cprofile is None:
+            return
+        self._cprofile.disable()
+        buf = io.StringIO()
+        pstats.Stats(self._cprofile, stream=buf).sort_stats("cumulative").print_stats(
+            top
+        )
+        self._cprofile_stats = buf.getvalue()
+        self._cprofile = None
+
+    # ---------------- Reporting ----------------
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            stages = list(self._order)
+        return {
+            s: {
+                "wall": self._wall[s].snapshot(),
+                "cpu": self._cpu[s].snapshot(),
+                "scale": self._scale[s],
+            }
+            for s in stages
+        }
+
+    def report(self) -> str:
+        lines = [
+            f"profile: uptime={time.time() - self.started:.1f}s "
+            f"sample_every={self.sample_every}",
+            f"{'stage':<12} {'samples':>8} {'wall_mean':>9} {'wall_p50':>8} "
+            f"{'wall_p95':>8} {'wall_p99':>8} {'cpu_mean':>8} {'est_total':>9} "
+            f"{'share':>6}",
+        ]
+        snap = self.snapshot()
+        totals = {k: s["wall"]["sum"] * s["scale"] for k, s in snap.items()}
+        grand = sum(totals.values()) or 1.0
+        for stage, s in snap.items():
+            wall, cpu = s["wall"], s["cpu"]
+            n = wall["count"] or 1
+            lines.append(
+                f"{stage:<12} {wall['count']:>8} {_fmt_s(wall['sum'] / n):>9} "
+                f"{_fmt_s(_quantile(wall, 0.5)):>8} {_fmt_s(_quantile(wall, 0.95)):>8} "
+                f"{_fmt_s(_quantile(wall, 0.99)):>8} {_fmt_s(cpu['sum'] / n):>8} "
+                f"{_fmt_s(totals[stage]):>9} {100.0 * totals[stage] / grand:5.1f}%"
+            )
+        if self._cprofile is not None:
+            lines.append("cProfile window still running")
+        elif self._cprofile_stats:
+            lines.append("cProfile (main thread, cumulative):")
+            lines.append(self._cprofile_stats.rstrip())
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, out: TextIO) -> None:
+        out.write(self.report())
+        out.flush()
+
+    def install_sigusr1(self, out: TextIO) -> None:
+        """Dump a report on SIGUSR1 (written from a helper thread, never in the handler)."""
+        if not hasattr(signal, "SIGUSR1"):
+            return
+
+        def _handler(signum, frame):
+            threading.Thread(
+                target=self.write_report, args=(out,), name="ProfileReport", daemon=True
+            ).start()
+
+        signal.signal(signal.SIGUSR1, _handler)
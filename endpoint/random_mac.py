@@ -0,0 +1,229 @@
+"""
+random_mac.py
+Detection and collapsing of randomized (locally administered) MAC addresses.
+
+Phones probe with a fresh random MAC every few minutes, so in public spaces most parsed
+MACs are one-off keys: each becomes its own MacAggregator entry and its own stream of
+uplink records. RandomMacCollapser keeps them off the device path: it folds them into one
+bucketed summary per window (count + RSSI distribution) or drops them.
+
+Summaries are crowd statistics, not device readings: they have no mac / rssi and must
+not be shipped to /api/endpoint/scan-data (the server would keep only those fields and
+store a phantom device). stream.py exports the last closed window through the metrics
+registry (Prometheus text / JSON snapshot); parser_scan writes them to stderr.
+
+Usage pattern:
+    from random_mac import RandomMacCollapser, is_randomized
+
+    is_randomized("da:a1:19:00:00:01")            # True: 0xda & 0x02
+
+    rand = RandomMacCollapser(mode="summary", window_s=10)  # emit=callback (optional)
+    rec = rand.route(rec)      # None for randomized MACs (counted / summarized)
+    rand.flush_expired(now)    # from a timer: close the window once `now` passed it
+    rand.flush()               # on shutdown: emit the open window
+
+Window summary (one per window with randomized traffic; also kept as .last_window):
+{
+  "window_start": <float>, "window_s": 10.0,
+  "last_seen": <float>,        # last capture ts in the window
+  "count": 412,                # records collapsed
+  "unique_macs": 37,
+  "rssi_p10": -88, "rssi_median": -71, "rssi_p90": -55,
+  "rssi_hist": {"-90": 51, "-80": 120, ...}    # 10 dB buckets (lower edge)
+}
+
+Windows are aligned to multiples of window_s in capture time and close when a record
+from a later window arrives, or when flush_expired() is called with a later capture time.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+RANDOM_MAC_MODES = ("off", "summary", "drop")
+HIST_STEP_DB = 10
+
+Record = Dict[str, Any]
+
+
+def is_randomized(mac: str) -> bool:
+    """Locally administered bit (0x02 of the first octet) is set."""
+    return bool(int(mac[0:2], 16) & 0x02)
+
+
+def _percentile(sorted_vals: List[int], q: float) -> int:
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))]
+
+
+class RandomMacCollapser:
+    """
+    Collapse randomized-MAC records into per-window summaries, or drop them.
+
+    - mode: "summary" or "drop"
+    - window_s: summary window (capture seconds)
+    - emit: optional callback receiving each window summary (summary mode)
+    """
+
+    def __init__(
+        self,
+        mode: str = "summary",
+        window_s: float = 10.0,
+        emit: Optional[Callable[[Record], None]] = None,
+    ):
+        if mode not in ("summary", "drop"):
+            raise ValueError(f"mode must be summary or drop, got {mode!r}")
+        if window_s <= 0:
+            raise ValueError("window_s must be > 0")
+        self.mode = mode
+        self.window_s = float(window_s)
+        self.emit = emit
+        self._window: Optional[int] = None
+        self._rssi: List[int] = []
+        self._macs: Set[str] = set()
+        self._last_ts = 0.0
+        self.passed = 0
+        self.collapsed = 0
+        self.summaries = 0
+        self.last_window: Optional[Record] = None
+
+    def route(self, rec: Optional[Record]) -> Optional[Record]:
+        """The record if its MAC is globally unique, else None (collapsed/dropped)."""
+        if rec is None:
+            return None
+        mac = rec["mac"]
+        if not int(mac[0:2], 16) & 0x02:  # is_randomized(), inlined for the hot path
+            self.passed += 1
+            return rec
+        self.collapsed += 1
+        if self.mode == "drop":
+            return None
+        ts = float(rec["timestamp"])
+        window = int(ts // self.window_s)
+        if window != self._window:
+            if self._window is not None and window < self._window:
+                window = self._window  # late record: count it in the open window
+            else:
+                self.flush()
+                self._window = window
+        self._rssi.append(int(rec["rssi"]))
+        self._macs.add(mac)
+        if ts > self._last_ts:
+            self._last_ts = ts
+        return None
+
+    def flush_expired(self, now: Optional[float]) -> Optional[Record]:
+        """Emit the open window if capture time `now` is past its end."""
+        if now is None or self._window is None:
+            return None
+        if now < (self._window + 1) * self.window_s:
+            return None
+        return self.flush()
+
+    def flush(self) -> Optional[Record]:
+        """Emit (and return) the summary of the open window, if it has records."""
+        if not self._rssi:
+            return None
+        vals = sorted(self._rssi)
+        hist: Dict[str, int] = {}
+        for v in vals:
+            edge = str(v // HIST_STEP_DB * HIST_STEP_DB)
+            hist[edge] = hist.get(edge, 0) + 1
+        summary = {
+            "window_start": self._window * self.window_s,
+            "window_s": self.window_s,
+            "last_seen": self._last_ts,
+            "count": len(vals),
+            "unique_macs": len(self._macs),
+            "rssi_p10": _percentile(vals, 0.1),
+            "rssi_median": _percentile(vals, 0.5),
+            "rssi_p90": _percentile(vals, 0.9),
+            "rssi_hist": hist,
+        }
+        self._rssi = []
+        self._macs = set()
+        self.summaries += 1
+        self.last_window = summary
+        if self.emit is not None:
+            self.emit(summary)
+        return summary
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "passed": self.passed,
+            "collapsed": self.collapsed,
+            "summaries": self.summaries,
+            "last_window": self.last_window,
+        }
+
+    def summary(self) -> str:
+        text = (
+            f"randomized={self.collapsed} of {self.collapsed + self.passed} "
+            f"({self.mode}, summaries={self.summaries})"
+        )
+        w = self.last_window
+        if w is not None:
+            text += (
+                f" last window: count={w['count']} unique={w['unique_macs']} "
+                f"rssi p10/p50/p90={w['rssi_p10']}/{w['rssi_median']}/{w['rssi_p90']}"
+            )
+        return text
+
+    def samples(self) -> List[Tuple[str, str, str, float]]:
+        """Metrics collector: randomized-MAC counters and the last closed window."""
+        out: List[Tuple[str, str, str, float]] = [
+            (
+                "random_mac_records_total",
+                "counter",
+                "Records from locally administered (randomized) MACs",
+                self.collapsed,
+            ),
+            (
+                "random_mac_summaries_total",
+                "counter",
+                "Randomized-MAC windows summarized",
+                self.summaries,
+            ),
+        ]
+        w = self.last_window
+        if w is None:
+            return out
+        out.extend(
+            [
+                (
+                    "random_mac_window_records",
+                    "gauge",
+                    "Randomized-MAC records in the last closed window",
+                    w["count"],
+                ),
+                (
+                    "random_mac_window_unique_macs",
+                    "gauge",
+                    "Distinct randomized MACs in the last closed window",
+                    w["unique_macs"],
+                ),
+            ]
+        )
+        out.extend(
+            (
+                f'random_mac_window_rssi{{quantile="{q}"}}',
+                "gauge",
+                "RSSI quantiles of randomized MACs in the last closed window",
+                w[key],
+            )
+            for q, key in (
+                ("0.1", "rssi_p10"),
+                ("0.5", "rssi_median"),
+                ("0.9", "rssi_p90"),
+            )
+        )
+        out.extend(
+            (
+                f'random_mac_window_rssi_bucket{{dbm="{edge}"}}',
+                "gauge",
+                "Randomized-MAC records per 10 dB RSSI bucket in the last closed window",
+                n,
+            )
+            for edge, n in sorted(w["rssi_hist"].items(), key=lambda kv: int(kv[0]))
+        )
+        return out
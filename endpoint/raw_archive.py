@@ -0,0 +1,213 @@
+"""
+raw_archive.py
+In-process archival of the raw tcpdump text, replacing the `tee "$RAW_LOG"` shell pipe.
+
+Usage pattern:
+    from raw_archive import RawArchiver
+
+    arch = RawArchiver("/home/pi/logs/capture_wlan1.log.gz", sample_every=10,
+                       rotate_bytes=50 << 20, max_total_bytes=500 << 20)
+    for raw in sys.stdin.buffer:                # bytes, exactly as tcpdump wrote them
+        rec = parse_line(raw.decode("utf-8", errors="replace"))
+        arch.write(raw, parsed=rec is not None)
+    arch.close()
+
+Behaviour:
+    - lines are archived as the raw input bytes (no decode/re-encode round trip)
+    - sampling: sample_every=N keeps 1 in N lines; failed_only=True keeps only lines that
+      did not parse (useful when debugging the parser); both may be combined
+    - compress=True (default) streams through zlib in gzip format; every flush ends with a
+      sync flush so a power cut loses at most the last buffer, and `zcat` can read the
+      active segment while it is still being written
+    - when the active file reaches rotate_bytes (on disk, i.e. compressed) it is renamed to
+      `<name>.YYYYmmdd-HHMMSS[.gz]` and a fresh one is started
+    - with max_total_bytes the oldest rotated segments are deleted to cap disk use
+"""
+
+from __future__ import annotations
+
+import glob
+import logging
+import os
+import time
+import zlib
+from typing import Dict, List, Optional
+
+log = logging.getLogger("raw_archive")
+
+
+class RawArchiver:
+    """Sampled, streaming-compressed, size-rotated archive of raw capture lines."""
+
+    def __init__(
+        self,
+        path: str,
+        sample_every: int = 1,
+        failed_only: bool = False,
+        compress: bool = True,
+        compress_level: int = 6,
+        rotate_bytes: Optional[int] = None,
+        max_total_bytes: Optional[int] = None,
+        flush_bytes: int = 64 * 1024,
+        flush_interval_s: float = 2.0,
+    ):
+        if sample_every < 1:
+            raise ValueError("sample_every must be >= 1")
+        self.path = path
+        self.sample_every = int(sample_every)
+        self.failed_only = bool(failed_only)
+        self.compress = bool(compress)
+        self.compress_level = int(compress_level)
+        self.rotate_bytes = int(rotate_bytes) if rotate_bytes else None
+        self.max_total_bytes = int(max_total_bytes) if max_total_bytes else None
+        self.flush_bytes = int(flush_bytes)
+        self.flush_interval_s = float(flush_interval_s)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._buf: List[bytes] = []
+        self._buf_bytes = 0
+        self._last_flush = time.monotonic()
+        self._candidates = 0
+        self._open()
+
+        self.lines_in = 0
+        self.lines_kept = 0
+        self.bytes_in = 0
+        self.bytes_written = 0
+        self.rotations = 0
+
+    # ---------------- Public API ----------------
+
+    def write(self, raw: bytes, parsed: bool = True) -> bool:
+        """Offer one raw input line; returns True if it was kept by the sampling policy."""
+        self.lines_in += 1
+        if self.failed_only and parsed:
+            return False
+        self._candidates += 1
+        if self.sample_every > 1 and (self._candidates - 1) % self.sample_every:
+            return False
+        self._buf.append(raw)
+        self._buf_bytes += len(raw)
+        self.lines_kept += 1
+        if self._buf_bytes >= self.flush_bytes:
+            self.flush()
+        return True
+
+    def tick(self) -> None:
+        """Flush the buffer if flush_interval_s has passed (call periodically)."""
+        if self._buf and time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self.flush()
+
+    def flush(self) -> None:
+        """Compress and write the buffered lines; rotate if the segment is full."""
+        self._write_buffer()
+        if self.rotate_bytes and self._file_bytes >= self.rotate_bytes:
+            self.rotate()
+
+    def rotate(self) -> Optional[str]:
+        """Finish the active segment, rename it with a timestamp and start a new one."""
+        self._write_buffer()
+        if not self._file_bytes:
+            return None
+        self._finish()
+        segment = self._segment_name()
+        os.replace(self.path, segment)
+        self.rotations += 1
+        self._open()
+        self._enforce_cap()
+        return segment
+
+    def close(self) -> None:
+        self._write_buffer()
+        self._finish()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "lines_in": self.lines_in,
+            "lines_kept": self.lines_kept,
+            "bytes_in": self.bytes_in,
+            "bytes_written": self.bytes_written,
+            "rotations": self.rotations,
+        }
+
+    # ---------------- Helpers ----------------
+
+    def _open(self) -> None:
+        self._file = open(self.path, "ab")
+        self._file_bytes = self._file.tell()
+        # wbits=31: gzip container, so segments are plain .gz files
+        self._zlib = (
+            zlib.compressobj(self.compress_level, zlib.DEFLATED, 31)
+            if self.compress
+            else None
+        )
+
+    def _emit(self, data: bytes) -> None:
+        if data:
+            self._file.write(data)
+            self._file_bytes += len(data)
+            self.bytes_written += len(data)
+
+    def _write_buffer(self) -> None:
+        if self._buf:
+            data = b"".join(self._buf)
+            self._buf.clear()
+            self._buf_bytes = 0
+            self.bytes_in += len(data)
+            if self._zlib is not None:
+                self._emit(self._zlib.compress(data))
+                self._emit(self._zlib.flush(zlib.Z_SYNC_FLUSH))
+            else:
+                self._emit(data)
+            self._file.flush()
+        self._last_flush = time.monotonic()
+
+    def _finish(self) -> None:
+        if self._file.closed:
+            return
+        if self._zlib is not None:
+            self._emit(self._zlib.flush(zlib.Z_FINISH))
+            self._zlib = None
+        self._file.close()
+
+    def _split_ext(self):
+        if self.path.endswith(".gz"):
+            return self.path[:-3], ".gz"
+        return self.path, ""
+
+    def _segment_name(self) -> str:
+        stem, ext = self._split_ext()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime())
+        name = f"{stem}.{stamp}{ext}"
+        n = 1
+        while os.path.exists(name):
+            name = f"{stem}.{stamp}.{n}{ext}"
+            n += 1
+        return name
+
+    def _segments(self) -> List[str]:
+        """Rotated segments, oldest first."""
+        stem, ext = self._split_ext()
+        paths = [
+            p
+            for p in glob.glob(glob.escape(stem) + ".*" + ext)
+            if p != self.path and not p.endswith(".tmp")
+        ]
+        return sorted(paths, key=lambda p: os.path.getmtime(p))
+
+    def _enforce_cap(self) -> None:
+        if not self.max_total_bytes:
+            return
+        segments = self._segments()
+        total = self._file_bytes + sum(os.path.getsize(p) for p in segments)
+        for seg in segments:
+            if total <= self.max_total_bytes:
+                break
+            size = os.path.getsize(seg)
+            try:
+                os.remove(seg)
+                total -= size
+                log.info("Removed old raw capture segment %s to cap disk use", seg)
+            except OSError:
+                pass
@@ -0,0 +1,170 @@
+"""
+replay.py
+Time-scaled replay of a recorded tcpdump capture, for load testing stream.py.
+
+Usage pattern:
+    from replay import ReplaySource
+
+    src = ReplaySource("sample_captures/first_scan_with_edits.txt", speed=10.0, loops=3)
+    for raw in src:            # raw byte lines, paced by their capture timestamps
+        ...
+    src.stats()                # achieved vs target line rate, lag behind schedule
+
+Behaviour:
+    - speed=1.0 reproduces the original pacing, 10.0 plays ten times faster and
+      speed=None plays as fast as possible (timestamps are still rewritten)
+    - loops=N plays the file N times (0 = forever); every pass shifts the timestamps by
+      the capture span (+ one mean inter-arrival gap) so time keeps moving forward
+    - rebase=True shifts the first timestamp to "now", so downstream freshness / TTL
+      logic sees the replay as live traffic
+    - both -tt epoch stamps (1758170263.440596) and clock stamps (00:47:00.199409) are
+      understood; lines without a timestamp pass through unpaced and unchanged
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+EPOCH_TS = re.compile(rb"^(\d+)\.(\d+)")
+CLOCK_TS = re.compile(rb"^(\d{2}):(\d{2}):(\d{2})\.(\d+)")
+DAY_S = 86400.0
+_MAX_SLEEP_S = 0.5
+
+
+def _read_ts(line: bytes) -> Optional[Tuple[float, int, bool]]:
+    """(seconds, prefix length, is_clock_format) of the leading timestamp, if any."""
+    m = EPOCH_TS.match(line)
+    if m:
+        return float(m.group(0)), m.end(), False
+    m = CLOCK_TS.match(line)
+    if m:
+        h, mi, s, frac = m.groups()
+        secs = int(h) * 3600 + int(mi) * 60 + int(s) + float(b"0." + frac)
+        return secs, m.end(), True
+    return None
+
+
+def _format_ts(secs: float, digits: int, clock: bool) -> bytes:
+    if clock:
+        secs %= DAY_S
+        whole = int(secs)
+        frac = f"{secs - whole:.{digits}f}"[2:]
+        return (
+            f"{whole // 3600:02d}:{whole // 60 % 60:02d}:{whole % 60:02d}.{frac}"
+        ).encode("ascii")
+    return f"{secs:.{digits}f}".encode("ascii")
+
+
+class ReplaySource:
+    """Iterator of raw capture lines paced by capture time and a speed factor."""
+
+    def __init__(
+        self,
+        path: str,
+        speed: Optional[float] = 1.0,
+        loops: int = 1,
+        rebase: bool = False,
+        stop: Optional[Callable[[], bool]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be > 0 (or None for max speed)")
+        if loops < 0:
+            raise ValueError("loops must be >= 0")
+        self.path = path
+        self.speed = float(speed) if speed else None
+        self.loops = int(loops)
+        self.rebase = bool(rebase)
+        self._stop = stop or (lambda: False)
+        self._clock = clock
+        self._sleep = sleep
+
+        self.lines = 0
+        self.loops_done = 0
+        self._first_ts: Optional[float] = None
+        self._capture_pos = 0.0  # capture seconds covered so far (all passes)
+        self._started: Optional[float] = None
+        self._lag_s = 0.0
+
+    def __iter__(self) -> Iterator[bytes]:
+        self._started = self._clock()
+        rebase_shift = 0.0
+        loop_shift = 0.0
+        n = 0
+        while self.loops == 0 or n < self.loops:
+            last_ts: Optional[float] = None
+            prev_raw: Optional[float] = None
+            day = 0.0
+            count_ts = 0
+            with open(self.path, "rb") as f:
+                for line in f:
+                    if self._stop():
+                        return
+                    ts = _read_ts(line)
+                    if ts is None:
+                        self.lines += 1
+                        yield line
+                        continue
+                    raw_s, end, clock = ts
+                    if clock:
+                        # Clock stamps wrap at midnight
+                        if prev_raw is not None and raw_s + day < prev_raw - DAY_S / 2:
+                            day += DAY_S
+                        raw_s += day
+                    prev_raw = raw_s
+                    if self._first_ts is None:
+                        self._first_ts = raw_s
+                        if self.rebase:
+                            rebase_shift = time.time() - raw_s
+                    last_ts = raw_s
+                    count_ts += 1
+
+                    self._capture_pos = raw_s - self._first_ts + loop_shift
+                    self._pace()
+                    shift = rebase_shift + loop_shift
+                    if shift:
+                        digits = len(line[:end].rsplit(b".", 1)[1])
+                        line = _format_ts(raw_s + shift, digits, clock) + line[end:]
+                    self.lines += 1
+                    yield line
+            n += 1
+            self.loops_done = n
+            if last_ts is None or self._first_ts is None:
+                return  # nothing to pace / shift
+            span = last_ts - self._first_ts
+            gap = span / max(count_ts - 1, 1)
+            loop_shift += span + gap
+
+    # ---------------- Pacing ----------------
+
+    def _pace(self) -> None:
+        """Sleep until the current capture position is due at the chosen speed."""
+        if self.speed is None:
+            return
+        due = self._started + self._capture_pos / self.speed
+        while True:
+            delay = due - self._clock()
+            if delay <= 0.001 or self._stop():
+                self._lag_s = max(0.0, -delay)
+                return
+            self._sleep(min(delay, _MAX_SLEEP_S))
+
+    def stats(self) -> Dict[str, object]:
+        wall = (self._clock() - self._started) if self._started is not None else 0.0
+        capture = self._capture_pos
+        target = None
+        if self.speed is not None and capture > 0:
+            target = self.lines / (capture / self.speed)
+        return {
+            "lines": self.lines,
+            "loops_done": self.loops_done,
+            "speed": self.speed,
+            "capture_s": round(capture, 3),
+            "wall_s": round(wall, 3),
+            "target_rate": round(target, 1) if target is not None else None,
+            "achieved_rate": round(self.lines / wall, 1) if wall > 0 else 0.0,
+            "lag_s": round(self._lag_s, 3),
+        }
@@ -0,0 +1,162 @@
+"""
+sanitize.py
+Edge-side validation of parsed records against the server's scan-data schema, so records
+the server would reject (207 rejected_details) are never serialized or uploaded.
+
+Usage pattern:
+    from sanitize import RecordSanitizer
+
+    san = RecordSanitizer(mode="clamp")     # or "drop"
+    rec = san.apply(parse_line(line))       # None when the record cannot be shipped
+    san.summary()                           # 'rssi_range=12 (clamped rssi_range=3)'
+
+Rules (mirroring /api/endpoint/scan-data):
+    - mac: xx:xx:xx:xx:xx:xx (lowercase, colon separated)
+    - rssi: an integer between -100 and 0 (5.0 counts as an integer, True does not)
+    - timestamp: a non-zero finite epoch number, or an ISO-8601 string
+
+Modes:
+    - drop: any violation drops the record and counts it under its reason
+    - clamp: out-of-range RSSI is pinned to -100 / 0 and fractional RSSI is rounded;
+      records with a bad MAC, timestamp or non-numeric RSSI are still dropped
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+RSSI_MIN = -100
+RSSI_MAX = 0
+MAC_RE = re.compile(r"^[0-9a-f]{2}(:[0-9a-f]{2}){5}$")
+# Timestamps the server's `new Date(v)` accepts (+-8.64e15)
+_TS_MAX = 8.64e15
+
+SANITIZE_MODES = ("off", "drop", "clamp")
+REASONS = ("mac", "rssi_type", "rssi_range", "timestamp")
+
+Record = Dict[str, Any]
+
+
+def parse_mac_list(spec: Optional[str]) -> List[str]:
+    """'AA-BB-CC-DD-EE-FF, 11:22:...' -> normalized lowercase colon MACs."""
+    macs = []
+    for part in (spec or "").split(","):
+        mac = part.strip().lower().replace("-", ":")
+        if not mac:
+            continue
+        if not MAC_RE.match(mac):
+            raise ValueError(f"Invalid MAC address {part.strip()!r}")
+        macs.append(mac)
+    return macs
+
+
+def _valid_timestamp(ts: Any) -> bool:
+    if isinstance(ts, bool):
+        return False
+    if isinstance(ts, (int, float)):
+        return ts != 0 and math.isfinite(ts) and abs(ts) <= _TS_MAX
+    if isinstance(ts, str) and ts.strip():
+        s = ts.strip()
+        try:
+            datetime.fromisoformat(s[:-1] + "+00:00" if s.endswith("Z") else s)
+        except ValueError:
+            return False
+        return True
+    return False
+
+
+def check_record(rec: Record) -> Optional[str]:
+    """First rule the record breaks ('mac', 'rssi_type', ...), or None if it is valid."""
+    mac = rec.get("mac")
+    if not isinstance(mac, str) or not MAC_RE.match(mac):
+        return "mac"
+    rssi = rec.get("rssi")
+    if isinstance(rssi, bool) or not isinstance(rssi, (int, float)):
+        return "rssi_type"
+    if isinstance(rssi, float) and not (math.isfinite(rssi) and rssi.is_integer()):
+        return "rssi_type"
+    if rssi < RSSI_MIN or rssi > RSSI_MAX:
+        return "rssi_range"
+    if not _valid_timestamp(rec.get("timestamp")):
+        return "timestamp"
+    return None
+
+
+class RecordSanitizer:
+    """
+    Drop (or repair) records the server would reject, with per-reason counters.
+
+    - mode: "drop" or "clamp" (see module docstring)
+    """
+
+    def __init__(self, mode: str = "drop"):
+        if mode not in ("drop", "clamp"):
+            raise ValueError(f"mode must be drop or clamp, got {mode!r}")
+        self.mode = mode
+        self.checked = 0
+        self.rejected: Dict[str, int] = {}
+        self.clamped: Dict[str, int] = {}
+
+    def apply(self, rec: Optional[Record]) -> Optional[Record]:
+        """The record (possibly with a repaired rssi), or None if it must not ship."""
+        if rec is None:
+            return None
+        self.checked += 1
+        reason = check_record(rec)
+        if reason is None:
+            return rec
+        if self.mode == "clamp" and reason in ("rssi_type", "rssi_range"):
+            rssi = rec["rssi"]
+            numeric = isinstance(rssi, (int, float)) and not isinstance(rssi, bool)
+            if numeric and math.isfinite(rssi):
+                rec["rssi"] = min(max(int(round(rssi)), RSSI_MIN), RSSI_MAX)
+                later = check_record(rec)
+                if later is None:
+                    self.clamped[reason] = self.clamped.get(reason, 0) + 1
+                    return rec
+                reason = later
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "checked": self.checked,
+            "rejected": dict(self.rejected),
+            "clamped": dict(self.clamped),
+        }
+
+    def summary(self) -> str:
+        """'rssi_range=12 timestamp=1 (clamped rssi_range=3)' or 'none'."""
+        text = " ".join(f"{k}={v}" for k, v in sorted(self.rejected.items())) or "none"
+        if self.clamped:
+            text += (
+                " (clamped "
+                + " ".join(f"{k}={v}" for k, v in sorted(self.clamped.items()))
+                + ")"
+            )
+        return text
+
+    def samples(self) -> List[Tuple[str, str, str, float]]:
+        """Metrics collector: records_invalid_total / records_clamped_total by reason."""
+        out = [
+            (
+                f'records_invalid_total{{reason="{k}"}}',
+                "counter",
+                "Parsed records dropped by edge validation",
+                v,
+            )
+            for k, v in sorted(self.rejected.items())
+        ]
+        out.extend(
+            (
+                f'records_clamped_total{{reason="{k}"}}',
+                "counter",
+                "Parsed records repaired by edge validation",
+                v,
+            )
+            for k, v in sorted(self.clamped.items())
+        )
+        return out
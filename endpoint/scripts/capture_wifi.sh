@@ -11,7 +11,7 @@ mkdir -p "$LOGDIR"
 
 # --- Timestamped file names ---
 ts="$(date +%Y%m%d_%H%M%S)"
-RAW_LOG="$LOGDIR/capture_${IFACE}_${ts}.log"
+RAW_LOG="$LOGDIR/capture_${IFACE}_${ts}.log.gz"
 PARSED_LOG="$LOGDIR/parsed_${IFACE}_${ts}.jsonl"
 
 # --- Safety: kill any leftover tcpdump using this interface ---
@@ -34,6 +34,10 @@ cleanup() {
 trap cleanup INT TERM
 
 # --- Run tcpdump and stream in real time ---
-sudo tcpdump -i "$IFACE" -s 0 -l -e -tt -n -vvv \
-  | tee "$RAW_LOG" \
-  | "$PYTHON" -u /home/pi/WiFi_Project/stream.py --tee-jsonl "$PARSED_LOG"
+# stream.py starts and supervises tcpdump itself (restarted if it dies) with a BPF filter
+# built from FRAME_INCLUDE / FRAME_EXCLUDE / CAPTURE_EXCLUDE_MACS, and logs tcpdump's
+# kernel drop counters. It archives the raw lines itself (gzip, rotated, capped) instead
+# of `tee`. Add e.g. --raw-sample 10 or --raw-failed-only to archive less.
+WLAN_IFACE="$IFACE" "$PYTHON" -u /home/pi/WiFi_Project/stream.py --capture --capture-sudo \
+  --tee-jsonl "$PARSED_LOG" --tee-rotate-mb 50 --tee-gzip --tee-max-total-mb 500 \
+  --raw-archive "$RAW_LOG" --raw-rotate-mb 50 --raw-max-total-mb 1000
@@ -7,9 +7,25 @@ import gzip
 import threading
 import queue
 import logging
-from typing import Any, Dict, List, Optional, Literal
+from http.client import HTTPException
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Literal
 from urllib import request, error
 
+from batch_tuner import AimdTuner, parse_retry_after
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from coalesce import COALESCE_MODES, coalesce_records
+from delivery import DeliveryLanes
+from metrics import (
+    BYTES_BUCKETS,
+    LATENCY_BUCKETS,
+    RECORDS_BUCKETS,
+    Histogram,
+    MetricsRegistry,
+    Sample,
+)
+
+if TYPE_CHECKING:
+    from profiler import StageProfiler
 
 AuthStyle = Literal["x-api-key", "bearer"]
 
@@ -31,9 +47,51 @@ class Shipper:
             include_endpoint_in_records=True,  # inject endpointId into each record
             include_endpoint_top_level=True,   # also send { endpointId: ... } at top-level
             timestamp_as_iso=False,            # set True if your server expects ISO strings
+            adaptive=False,                    # AIMD-tune batch_size/flush_ms at runtime
+            coalesce=None,                     # or "dedupe" / "max" / "median"
+            breaker_threshold=5,               # opt-in; the default 0 disables it
+            fresh_s=300,                       # live lane: newest-first after outages
+            max_batch_bytes=512 * 1024,        # cap on the JSON body size per POST
         )
         ship.add({"mac": "...", "rssi": -42, "timestamp": 123.456})
         ship.flush()  # on shutdown
+        ship.stats()  # counters + current effective batch_size / flush_ms
+
+    Adaptive mode (adaptive=True) treats batch_size/flush_ms as starting values: the batch
+    grows while POSTs succeed under target_latency_ms and halves on timeouts, 413s, 429s
+    or slow responses. The flush interval never exceeds max_data_age_ms. Retry-After
+    headers on 429/503 are always honoured.
+
+    Coalescing (coalesce="dedupe"|"max"|"median") runs on each batch before it is
+    serialized: exact duplicates are dropped and, for "max"/"median", records are
+    collapsed per (mac, coalesce_bucket_s bucket). coalesce=None keeps the raw path.
+
+    Circuit breaker (breaker_threshold > 0): after that many consecutive failed POST
+    attempts the shipper stops posting for breaker_cooldown_s and parks batches in memory
+    (bounded by park_max_records, oldest dropped first). After the cooldown a single
+    one-attempt probe is sent; success closes the breaker and drains the parked batches.
+    Off by default: parked batches live only in memory and are lost if the process exits
+    while the breaker is open, where the default path keeps retrying each batch.
+
+    Freshness (fresh_s / ttl_s, see delivery.py): parked records younger than fresh_s are
+    sent newest-first once the server is back, older backlog trickles behind at
+    backlog_rate records/s, and records older than ttl_s are dropped or demoted to a
+    backfill lane (ttl_action). Without fresh_s parked batches drain oldest-first.
+
+    Byte-size batching (max_batch_bytes): batches are also cut when their estimated JSON
+    body reaches max_batch_bytes (uncompressed). The estimate is records x the average
+    record size of the bodies already posted, so records are not serialized twice; only a
+    batch estimated near the cap is measured record by record before it is cut. A batch
+    rejected with 413 is split in half and each half retried, down to single records.
+    stats() carries histograms of the posted batch sizes in bytes (on the wire) and in
+    records.
+
+    Metrics (metrics=MetricsRegistry): the batch-size and POST-latency histograms are
+    registered in the shared registry, and the stats() counters are exported through a
+    scrape-time collector (shipper_* names).
+
+    Profiling (profiler=StageProfiler): every batch hand-off on the sender thread is timed
+    as the "send" stage (coalescing, serialization, POSTs and retries included).
     """
 
     def __init__(
@@ -51,6 +109,24 @@ class Shipper:
         include_endpoint_top_level: bool = True,
         user_agent: str = "WiFiEndpoint/1.0",
         timestamp_as_iso: bool = False,
+        adaptive: bool = False,
+        min_batch_size: int = 10,
+        max_batch_size: int = 2000,
+        target_latency_ms: int = 2000,
+        max_data_age_ms: Optional[int] = None,
+        max_retry_after_s: float = 60.0,
+        coalesce: Optional[str] = None,
+        coalesce_bucket_s: float = 1.0,
+        breaker_threshold: int = 0,
+        breaker_cooldown_s: float = 30.0,
+        park_max_records: int = 50000,
+        fresh_s: Optional[float] = None,
+        ttl_s: Optional[float] = None,
+        ttl_action: str = "drop",
+        backlog_rate: Optional[float] = None,
+        max_batch_bytes: Optional[int] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        profiler: Optional["StageProfiler"] = None,
     ):
         if not server_url:
             raise ValueError("server_url is required")
@@ -70,17 +146,100 @@ class Shipper:
         self.include_endpoint_top_level = include_endpoint_top_level
         self.user_agent = user_agent
         self.timestamp_as_iso = bool(timestamp_as_iso)
+        self.max_retry_after_s = float(max_retry_after_s)
+        if coalesce is not None and coalesce not in COALESCE_MODES:
+            raise ValueError(f"Unknown coalesce mode: {coalesce}")
+        self.coalesce = coalesce
+        self.coalesce_bucket_s = float(coalesce_bucket_s)
+        self.max_batch_bytes = int(max_batch_bytes) if max_batch_bytes else None
+
+        # Optional AIMD tuner; owns the effective batch_size/flush_ms in adaptive mode
+        self._tuner: Optional[AimdTuner] = None
+        if adaptive:
+            self._tuner = AimdTuner(
+                batch_size=self.batch_size,
+                flush_ms=self.flush_ms,
+                min_batch_size=min_batch_size,
+                max_batch_size=max_batch_size,
+                target_latency_ms=target_latency_ms,
+                max_data_age_ms=max_data_age_ms,
+            )
+            self.batch_size = self._tuner.batch_size
+            self.flush_ms = self._tuner.flush_ms
+
+        # Optional circuit breaker; batches are parked in the delivery lanes while it is open
+        self._breaker: Optional[CircuitBreaker] = None
+        if breaker_threshold > 0:
+            self._breaker = CircuitBreaker(
+                failure_threshold=breaker_threshold,
+                cooldown_s=breaker_cooldown_s,
+                on_transition=self._on_breaker_transition,
+            )
+        self._lanes = DeliveryLanes(
+            fresh_s=fresh_s,
+            ttl_s=ttl_s,
+            ttl_action=ttl_action,
+            backlog_rate=backlog_rate,
+            max_records=park_max_records,
+        )
+
+        self._profiler = profiler
 
         self._q: "queue.Queue[Dict[str, Any]]" = queue.Queue()
         self._lock = threading.Lock()
         self._batch: List[Dict[str, Any]] = []
+        # Estimated body size (only tracked with max_batch_bytes)
+        self._batch_bytes = 0.0
+        # Average serialized record size, learned from posted bodies (seeded by the
+        # first record)
+        self._record_bytes: Optional[float] = None
         self._last_flush = time.time()
         self._running = True
+        self._stats: Dict[str, Any] = {
+            "posts_ok": 0,
+            "posts_failed": 0,
+            "retries": 0,
+            "records_sent": 0,
+            "records_dropped": 0,
+            "batches_dropped": 0,
+            "last_latency_ms": None,
+            "coalesce_in": 0,
+            "coalesce_out": 0,
+            "batches_parked": 0,
+            "splits_413": 0,
+            "bytes_on_wire": 0,
+        }
+        if metrics is not None:
+            self._hist_bytes = metrics.histogram(
+                "shipper_batch_bytes", "POST body size in bytes", BYTES_BUCKETS
+            )
+            self._hist_records = metrics.histogram(
+                "shipper_batch_records", "Records per POST", RECORDS_BUCKETS
+            )
+            self._hist_latency = metrics.histogram(
+                "shipper_post_latency_seconds",
+                "POST attempt latency",
+                LATENCY_BUCKETS,
+            )
+            metrics.register_collector(self._metric_samples)
+        else:
+            self._hist_bytes = Histogram(BYTES_BUCKETS)
+            self._hist_records = Histogram(RECORDS_BUCKETS)
+            self._hist_latency = Histogram(LATENCY_BUCKETS)
 
         self._log = logging.getLogger("shipper")
         if not self._log.handlers:
             self._log.addHandler(logging.NullHandler())
 
+        # Per-record overhead of the endpoint_id injected by _payload_bytes
+        self._record_overhead = 1 + (
+            len(json.dumps(self.endpoint_id, ensure_ascii=False))
+            + len('"endpoint_id":')
+            + 1
+            if self.endpoint_id and self.include_endpoint_in_records
+            else 0
+        )
+
         # Precompute static headers (auth header style is configurable)
         self._base_headers: Dict[str, str] = {
             "Content-Type": "application/json; charset=utf-8",
@@ -112,6 +271,92 @@ class Shipper:
         """Synchronously flush the current batch and drain the queue."""
         self._drain_queue()
         self._send_if_needed(force=True)
+        self._retry_parked()
+        with self._lock:
+            parked = len(self._lanes)
+        if parked:
+            self._log.warning(
+                "%d records still parked (circuit breaker %s); they are lost if the process exits.",
+                parked,
+                self._breaker.state if self._breaker else CLOSED,
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of delivery counters and the current effective batching settings."""
+        with self._lock:
+            snap = dict(self._stats)
+            snap["pending"] = len(self._batch) + self._q.qsize()
+        snap["adaptive"] = self._tuner is not None
+        snap["batch_size"] = self.batch_size
+        snap["flush_ms"] = self.flush_ms
+        if self.coalesce is not None:
+            # Fraction of records removed by coalescing (0.0 = nothing removed)
+            snap["coalesce_ratio"] = (
+                1.0 - snap["coalesce_out"] / snap["coalesce_in"]
+                if snap["coalesce_in"]
+                else 0.0
+            )
+        if self._tuner is not None:
+            snap["tuner"] = self._tuner.snapshot()
+        snap["max_batch_bytes"] = self.max_batch_bytes
+        snap["batch_bytes_hist"] = self._hist_bytes.snapshot()
+        snap["batch_records_hist"] = self._hist_records.snapshot()
+        snap["post_latency_hist"] = self._hist_latency.snapshot()
+        with self._lock:
+            snap["parked_batches"] = self._lanes.batches()
+            snap["parked_records"] = len(self._lanes)
+            if self._lanes.freshness_enabled or self._lanes.ttl_s is not None:
+                snap["lanes"] = self._lanes.snapshot()
+            if self._breaker is not None:
+                snap["breaker_state"] = self._breaker.state
+                snap["breaker_transitions"] = dict(self._breaker.transitions)
+        return snap
+
+    _COUNTER_HELP = {
+        "posts_ok": "Successful POSTs",
+        "posts_failed": "Failed POST attempts",
+        "retries": "POST retries",
+        "records_sent": "Records accepted by the server",
+        "records_dropped": "Records dropped (non-retriable, retries exhausted, overflow)",
+        "batches_dropped": "Batches dropped",
+        "batches_parked": "Batches parked while the circuit breaker was open",
+        "splits_413": "Batches split after a 413",
+        "bytes_on_wire": "Request body bytes sent (all attempts)",
+    }
+
+    def _metric_samples(self) -> List[Sample]:
+        """Scrape-time export of stats() for a MetricsRegistry."""
+        snap = self.stats()
+        samples: List[Sample] = [
+            (f"shipper_{key}_total", "counter", help_text, snap[key])
+            for key, help_text in self._COUNTER_HELP.items()
+        ]
+        samples += [
+            (
+                "shipper_queue_depth",
+                "gauge",
+                "Records waiting to be batched",
+                snap["pending"],
+            ),
+            (
+                "shipper_parked_records",
+                "gauge",
+                "Records held in delivery lanes",
+                snap["parked_records"],
+            ),
+            ("shipper_batch_size", "gauge", "Effective batch size", snap["batch_size"]),
+            ("shipper_flush_ms", "gauge", "Effective flush interval", snap["flush_ms"]),
+        ]
+        if "breaker_state" in snap:
+            samples.append(
+                (
+                    "shipper_breaker_open",
+                    "gauge",
+                    "1 while the circuit breaker is not closed",
+                    int(snap["breaker_state"] != CLOSED),
+                )
+            )
+        return samples
 
     # ---------------- Internal thread ----------------
 
@@ -121,12 +366,12 @@ class Shipper:
             while self._running:
                 try:
                     item = self._q.get(timeout=0.1)
-                    with self._lock:
-                        self._batch.append(item)
+                    self._append(item)
                     self._q.task_done()
                 except queue.Empty:
                     pass
                 self._send_if_needed(force=False)
+                self._retry_parked()
         except Exception as e:
             self._log.exception("Shipper thread crashed: %s", e)
         finally:
@@ -144,10 +389,49 @@ class Shipper:
                 item = self._q.get_nowait()
             except queue.Empty:
                 break
-            with self._lock:
-                self._batch.append(item)
+            self._append(item)
             self._q.task_done()
 
+    def _estimate_bytes(self, record: Dict[str, Any]) -> int:
+        """Approximate serialized size of one record inside the request body."""
+        return (
+            len(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            + self._record_overhead
+        )
+
+    def _append(self, item: Dict[str, Any]) -> None:
+        size = 0.0
+        if self.max_batch_bytes:
+            if self._record_bytes is None:
+                self._record_bytes = float(self._estimate_bytes(item))
+            size = self._record_bytes
+        with self._lock:
+            self._batch.append(item)
+            self._batch_bytes += size
+
+    def _chunk_by_bytes(
+        self, batch: List[Dict[str, Any]]
+    ) -> List[List[Dict[str, Any]]]:
+        """Greedily cut a batch into chunks whose estimated body fits max_batch_bytes."""
+        if not self.max_batch_bytes:
+            return [batch]
+        budget = self.max_batch_bytes - len('{"records":[]}') - 64  # envelope slack
+        if len(batch) * (self._record_bytes or 0.0) < 0.8 * budget:
+            return [batch]  # clearly fits: skip the per-record measurement
+        chunks: List[List[Dict[str, Any]]] = []
+        current: List[Dict[str, Any]] = []
+        used = 0
+        for rec in batch:
+            size = self._estimate_bytes(rec)
+            if current and used + size > budget:
+                chunks.append(current)
+                current, used = [], 0
+            current.append(rec)
+            used += size
+        if current:
+            chunks.append(current)
+        return chunks
+
     def _send_if_needed(self, force: bool) -> None:
         now = time.time()
         should_time_flush = (now - self._last_flush) * 1000.0 >= self.flush_ms
@@ -158,15 +442,135 @@ class Shipper:
                     self._last_flush = now
                 return
 
-            if not (force or len(self._batch) >= self.batch_size or should_time_flush):
+            over_bytes = bool(
+                self.max_batch_bytes and self._batch_bytes >= self.max_batch_bytes
+            )
+            if not (
+                force
+                or len(self._batch) >= self.batch_size
+                or over_bytes
+                or should_time_flush
+            ):
+                return
+
+            # Honour a server Retry-After hold unless we are being forced (shutdown)
+            if not force and self._tuner and self._tuner.hold_remaining(now) > 0:
                 return
 
             # Snapshot and clear current batch
             batch = self._batch
             self._batch = []
+            self._batch_bytes = 0.0
             self._last_flush = now
 
-        self._post_records(batch)
+        t = self._profiler.begin() if self._profiler else None
+        if self._lanes.freshness_enabled or self._lanes.ttl_s is not None:
+            batch = self._split_stale(batch, now)
+        if self.coalesce is not None:
+            batch = self._coalesce(batch)
+        for chunk in self._chunk_by_bytes(batch):
+            self._deliver(chunk)
+        if t:
+            self._profiler.lap("send", t)
+
+    def _split_stale(
+        self, batch: List[Dict[str, Any]], now: float
+    ) -> List[Dict[str, Any]]:
+        """Keep live records for immediate delivery; hold stale/expired ones in the lanes."""
+        with self._lock:
+            live, stale, expired = self._lanes.classify(batch, now)
+            if not self._lanes.freshness_enabled:
+                live, stale = stale, []
+            dropped = self._lanes.demote(expired) + self._lanes.add(stale, now)
+            if dropped:
+                self._stats["records_dropped"] += dropped
+        return live
+
+    def _coalesce(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop duplicates / collapse per-MAC buckets before serialization."""
+        out = coalesce_records(
+            batch, mode=self.coalesce, bucket_s=self.coalesce_bucket_s
+        )
+        self._count(coalesce_in=len(batch), coalesce_out=len(out))
+        return out
+
+    # ---------------- Circuit breaker / parking ----------------
+
+    def _on_breaker_transition(self, old: str, new: str, failures: int) -> None:
+        level = logging.WARNING if new == OPEN else logging.INFO
+        self._log.log(
+            level,
+            "Circuit breaker %s -> %s (consecutive_failures=%d, parked=%d records)",
+            old,
+            new,
+            failures,
+            len(self._lanes),
+        )
+
+    def _deliver(self, batch: List[Dict[str, Any]]) -> None:
+        """POST a batch, or park it while the circuit breaker is open."""
+        if not batch:
+            return
+        if self._breaker is None:
+            self._post_records(batch)
+            return
+
+        with self._lock:
+            allowed = self._breaker.allow_request()
+            probing = self._breaker.state == HALF_OPEN
+        if not allowed:
+            self._park(batch)
+            return
+        # A half-open probe gets exactly one attempt
+        if self._post_records(batch, max_attempts=1 if probing else None):
+            self._drain_parked()
+
+    def _park(self, batch: List[Dict[str, Any]]) -> None:
+        """Hold a batch in the delivery lanes until it can be sent (bounded)."""
+        with self._lock:
+            dropped = self._lanes.add(batch)
+            self._stats["batches_parked"] += 1
+            if dropped:
+                self._stats["records_dropped"] += dropped
+
+    def _retry_parked(self) -> None:
+        """Serve the lanes; with an open breaker, probe once the cooldown has elapsed."""
+        with self._lock:
+            if not len(self._lanes):
+                return
+            if self._breaker is None or self._breaker.state == CLOSED:
+                probe = None
+            elif self._breaker.cooldown_remaining() > 0:
+                return
+            elif not self._breaker.allow_request():
+                return
+            else:
+                item, dropped = self._lanes.pop(max_records=self.batch_size)
+                self._stats["records_dropped"] += dropped
+                if item is None:
+                    # Nothing due (rate cap): give the probe slot back for later
+                    self._breaker.cancel_probe()
+                    return
+                probe = item[1]
+
+        if probe is None or self._post_records(probe, max_attempts=1):
+            self._drain_parked()
+
+    def _drain_parked(self) -> None:
+        """
+        Resend held records while the breaker stays closed: live lane newest-first,
+        then backlog/backfill as the rate cap allows (remaining backlog waits for the
+        next pass of the sender loop).
+        """
+        while True:
+            with self._lock:
+                if self._breaker is not None and self._breaker.state != CLOSED:
+                    return
+                item, dropped = self._lanes.pop(max_records=self.batch_size)
+                self._stats["records_dropped"] += dropped
+            if item is None:
+                return
+            self._post_records(item[1])
 
     # ---------------- Networking ----------------
 
@@ -213,23 +617,82 @@ class Shipper:
             "utf-8"
         )
 
-    def _post_records(self, records: List[Dict[str, Any]]) -> None:
-        """POST the records to the server with retries/backoff."""
-        if not records:
+    @staticmethod
+    def _is_timeout(e: BaseException) -> bool:
+        if isinstance(e, TimeoutError):
+            return True
+        return isinstance(e, error.URLError) and isinstance(
+            getattr(e, "reason", None), TimeoutError
+        )
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for key, n in deltas.items():
+                self._stats[key] += n
+
+    def _on_post_ok(self, n_records: int, latency_s: float) -> None:
+        self._hist_latency.observe(latency_s)
+        with self._lock:
+            self._stats["posts_ok"] += 1
+            self._stats["records_sent"] += n_records
+            self._stats["last_latency_ms"] = round(latency_s * 1000.0, 1)
+            if self._breaker is not None:
+                self._breaker.record_success()
+        if self._tuner is not None:
+            self._tuner.on_success(latency_s)
+            self._apply_tuner()
+
+    def _apply_tuner(self) -> None:
+        if self._tuner is None:
             return
+        if (self.batch_size, self.flush_ms) != (
+            self._tuner.batch_size,
+            self._tuner.flush_ms,
+        ):
+            self._log.info(
+                "Adaptive batching: batch_size %d -> %d, flush_ms %d -> %d",
+                self.batch_size,
+                self._tuner.batch_size,
+                self.flush_ms,
+                self._tuner.flush_ms,
+            )
+            self.batch_size = self._tuner.batch_size
+            self.flush_ms = self._tuner.flush_ms
+
+    def _post_records(
+        self, records: List[Dict[str, Any]], max_attempts: Optional[int] = None
+    ) -> bool:
+        """
+        POST the records to the server with retries/backoff.
+        Returns True if the server accepted them; False if they were dropped or parked.
+        """
+        if not records:
+            return True
+        max_attempts = max_attempts or self.max_retries
 
         body_bytes = self._payload_bytes(records)
         headers = dict(self._base_headers)
+        if self.max_batch_bytes:
+            per_record = len(body_bytes) / len(records)
+            prev = self._record_bytes
+            self._record_bytes = (
+                per_record if prev is None else 0.8 * prev + 0.2 * per_record
+            )
 
         if self.use_gzip:
             body_bytes = gzip.compress(body_bytes)
             headers["Content-Encoding"] = "gzip"
 
+        self._hist_bytes.observe(len(body_bytes))
+        self._hist_records.observe(len(records))
+
         backoff = 0.5
         attempt = 0
 
         while True:
             attempt += 1
+            started = time.monotonic()
+            self._count(bytes_on_wire=len(body_bytes))
             try:
                 req = request.Request(
                     self.server_url, data=body_bytes, headers=headers, method="POST"
@@ -241,7 +704,8 @@ class Shipper:
                             self._log.debug(
                                 "POST ok: sent=%d status=%s", len(records), status
                             )
-                        return
+                        self._on_post_ok(len(records), time.monotonic() - started)
+                        return True
                     # Non-2xx: try to read server’s message to help debugging
                     msg = ""
                     try:
@@ -252,12 +716,20 @@ class Shipper:
                         self.server_url,
                         status,
                         msg or f"HTTP {status}",
-                        hdrs=None,
+                        hdrs=getattr(resp, "headers", None),
                         fp=None,
                     )
 
-            except (error.URLError, error.HTTPError, TimeoutError) as e:
+            except (
+                error.URLError,
+                error.HTTPError,
+                TimeoutError,
+                ConnectionError,  # e.g. reset while reading the response
+                HTTPException,
+            ) as e:
+                self._hist_latency.observe(time.monotonic() - started)
                 status = getattr(e, "code", None)
+                self._count(posts_failed=1)
 
                 # Try to capture the server response body for diagnostics on 4xx/5xx
                 server_msg = ""
@@ -267,22 +739,67 @@ class Shipper:
                     except Exception:
                         pass
 
+                # Congestion signals shrink the adaptive batch size
+                if self._tuner is not None and (
+                    status in (413, 429) or self._is_timeout(e)
+                ):
+                    self._tuner.on_backpressure()
+                    self._apply_tuner()
+
+                # Payload too large: split in half and retry each half (down to one record)
+                if status == 413 and len(records) > 1:
+                    mid = len(records) // 2
+                    self._count(splits_413=1)
+                    self._log.warning(
+                        "413 for %d records (%d bytes); splitting into %d + %d",
+                        len(records),
+                        len(body_bytes),
+                        mid,
+                        len(records) - mid,
+                    )
+                    first = self._post_records(records[:mid], max_attempts)
+                    second = self._post_records(records[mid:], max_attempts)
+                    return first and second
+
                 retriable = True
                 # Treat most 4xx (except 408/409/429) as non-retriable (schema/auth issues)
                 if isinstance(e, error.HTTPError) and status is not None:
                     if 400 <= status < 500 and status not in (408, 409, 429):
                         retriable = False
 
+                # Server-requested pause (429/503 Retry-After)
+                retry_after = None
+                if status in (429, 503) and getattr(e, "headers", None) is not None:
+                    retry_after = parse_retry_after(e.headers.get("Retry-After"))
+                    if retry_after is not None:
+                        retry_after = min(retry_after, self.max_retry_after_s)
+                        if self._tuner is not None:
+                            self._tuner.hold(retry_after)
+
                 self._log.warning(
                     "POST failed (attempt %d/%d, status=%s, retriable=%s). Server said: %r",
                     attempt,
-                    self.max_retries,
+                    max_attempts,
                     status,
                     retriable,
                     (server_msg[:1000] if server_msg else str(e)),
                 )
 
-                if not retriable or attempt >= self.max_retries:
+                # Server/network failures feed the breaker; once it opens, stop
+                # retrying and park the batch instead of burning the remaining attempts.
+                # A non-retriable 4xx still proves the server is reachable.
+                if self._breaker is not None:
+                    with self._lock:
+                        if retriable:
+                            self._breaker.record_failure()
+                        else:
+                            self._breaker.record_success()
+                        tripped = self._breaker.state != CLOSED
+                    if tripped:
+                        self._park(records)
+                        return False
+
+                if not retriable or attempt >= max_attempts:
                     # Drop this batch to avoid blocking forever
                     self._log.error(
                         "Dropping batch of %d after %d attempts (status=%s).",
@@ -290,9 +807,11 @@ class Shipper:
                         attempt,
                         status,
                     )
-                    return
+                    self._count(batches_dropped=1, records_dropped=len(records))
+                    return False
 
-                time.sleep(backoff)
+                self._count(retries=1)
+                time.sleep(max(backoff, retry_after or 0.0))
                 backoff = min(backoff * 2, 8.0)
 
     # ---------------- Context management ----------------
@@ -0,0 +1,185 @@
+"""
+snapshot.py
+Latest-RSSI snapshot mode: keep one RSSI per MAC in memory and push only the entries
+that changed, at a fixed interval, instead of shipping every packet.
+
+The heatmap query (/api/query/heatmap-data) only reads the latest RSSI per
+(mac, endpoint_id) from the last 5 minutes, so per-packet uplink records mostly end up
+as rows nothing reads. A snapshot carries at most one record per MAC per interval,
+and nothing for devices whose reading has not moved.
+
+Usage pattern:
+    from snapshot import RssiSnapshot
+
+    snap = RssiSnapshot(emit=ship.add, mode="median", min_delta_db=2, refresh_s=60)
+    snap.add(rec)              # instead of ship.add(rec)
+    loop.every(5.0, snap.push) # every interval: emit changed entries
+    snap.push()                # on shutdown
+
+Snapshot record (server-compatible, one per changed MAC):
+{
+  "mac": "<mac>",
+  "rssi": -63,                 # latest, or median of the samples since the last push
+  "timestamp": <float>,        # capture ts of the MAC's latest sample
+  "snapshot": true,
+  "samples": 14                # records folded into this entry since the last push
+}
+
+Rules:
+    - an entry is pushed when it received samples since the last push and its RSSI
+      moved by at least min_delta_db from the pushed value, or the pushed value is
+      refresh_s old (keep it under the heatmap's 5-minute window)
+    - MACs not heard for stale_s of capture time are forgotten
+    - median mode keeps at most max_samples readings per MAC between pushes
+"""
+
+from __future__ import annotations
+
+from statistics import median
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+SNAPSHOT_MODES = ("off", "latest", "median")
+
+Record = Dict[str, Any]
+
+
+class RssiSnapshot:
+    """
+    Per-MAC latest / median RSSI table pushed as deltas.
+
+    - emit: receives snapshot records
+    - mode: "latest" or "median"
+    - min_delta_db: smallest RSSI change worth pushing again
+    - refresh_s: re-push an unchanged entry after this long (capture seconds)
+    - stale_s: forget MACs not heard for this long (capture seconds)
+    - max_samples: median mode, readings kept per MAC between pushes
+    """
+
+    def __init__(
+        self,
+        emit: Callable[[Record], None],
+        mode: str = "latest",
+        min_delta_db: int = 2,
+        refresh_s: float = 60.0,
+        stale_s: float = 300.0,
+        max_samples: int = 64,
+    ):
+        if mode not in ("latest", "median"):
+            raise ValueError(f"mode must be latest or median, got {mode!r}")
+        if min_delta_db < 0 or refresh_s <= 0 or stale_s <= 0 or max_samples < 1:
+            raise ValueError(
+                "need min_delta_db >= 0, refresh_s > 0, stale_s > 0, max_samples >= 1"
+            )
+        self.emit = emit
+        self.mode = mode
+        self.min_delta_db = int(min_delta_db)
+        self.refresh_s = float(refresh_s)
+        self.stale_s = float(stale_s)
+        self.max_samples = int(max_samples)
+        # mac -> [latest rssi, latest ts, samples since push, pushed rssi, pushed ts, n]
+        self._table: Dict[str, List[Any]] = {}
+        self._changed: Set[str] = set()
+        self._latest_ts = 0.0
+        self.absorbed = 0
+        self.pushes = 0
+        self.pushed = 0
+
+    def add(self, rec: Optional[Record]) -> None:
+        """Fold a record into the table."""
+        if rec is None:
+            return
+        mac = rec["mac"]
+        rssi = int(rec["rssi"])
+        ts = float(rec["timestamp"])
+        e = self._table.get(mac)
+        if e is None:
+            e = self._table[mac] = [rssi, ts, [], None, 0.0, 0]
+        elif ts < e[1]:
+            ts = e[1]  # late record: keep the newest timestamp
+        else:
+            e[0] = rssi
+        e[1] = ts
+        e[5] += 1
+        if self.mode == "median":
+            samples = e[2]
+            samples.append(rssi)
+            if len(samples) > self.max_samples:
+                del samples[0]
+        if ts > self._latest_ts:
+            self._latest_ts = ts
+        self._changed.add(mac)
+        self.absorbed += 1
+
+    def push(self, now: Optional[float] = None) -> int:
+        """Emit changed entries; returns how many were pushed."""
+        if now is None:
+            now = self._latest_ts
+        out: List[Record] = []
+        for mac in self._changed:
+            e = self._table.get(mac)
+            if e is None:
+                continue
+            rssi = int(round(median(e[2]))) if e[2] else e[0]
+            n = e[5]
+            e[2] = []
+            e[5] = 0
+            pushed = e[3]
+            if (
+                pushed is not None
+                and abs(rssi - pushed) < self.min_delta_db
+                and e[1] - e[4] < self.refresh_s
+            ):
+                continue
+            e[3] = rssi
+            e[4] = e[1]
+            out.append(
+                {
+                    "mac": mac,
+                    "rssi": rssi,
+                    "timestamp": e[1],
+                    "snapshot": True,
+                    "samples": n,
+                }
+            )
+        self._changed.clear()
+        for mac in [m for m, e in self._table.items() if now - e[1] > self.stale_s]:
+            del self._table[mac]
+        self.pushes += 1
+        self.pushed += len(out)
+        for rec in out:
+            self.emit(rec)
+        return len(out)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "tracked": len(self._table),
+            "absorbed": self.absorbed,
+            "pushes": self.pushes,
+            "pushed": self.pushed,
+        }
+
+    def summary(self) -> str:
+        return (
+            f"tracked={len(self._table)} absorbed={self.absorbed} "
+            f"pushed={self.pushed} in {self.pushes} snapshots ({self.mode})"
+        )
+
+    def samples(self) -> List[Tuple[str, str, str, float]]:
+        """Metrics collector: table size, records absorbed and entries pushed."""
+        return [
+            ("snapshot_macs", "gauge", "MACs in the snapshot table", len(self._table)),
+            (
+                "snapshot_records_absorbed_total",
+                "counter",
+                "Records folded into the snapshot table instead of shipped",
+                self.absorbed,
+            ),
+            (
+                "snapshot_entries_pushed_total",
+                "counter",
+                "Changed snapshot entries shipped",
+                self.pushed,
+            ),
+            ("snapshot_pushes_total", "counter", "Snapshot pushes", self.pushes),
+        ]
@@ -1,16 +1,30 @@
 #!/usr/bin/env python3
+import os
 import sys
 import time
-import json
 import signal
 import logging
 import argparse
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from urllib.parse import urljoin
 
+from capture import TcpdumpCapture, build_bpf_filter
 from config import load_config
-from parser_scan import parse_line
+from dedupe import RetryDedupe
+from event_loop import CaptureClock, TimerLoop
+from infra_registry import InfraRegistry
+from load_shed import LoadShedder
+from metrics import JsonSnapshotWriter, MetricsRegistry, Sample, start_http_server
+from parser_scan import FrameFilter, parse_frame_types, parse_line
+from pipeline import ProcessPipeline
+from profiler import StageProfiler
+from random_mac import RandomMacCollapser
+from raw_archive import RawArchiver
+from replay import ReplaySource
+from sanitize import RecordSanitizer, parse_mac_list
 from shipper import Shipper
+from snapshot import RssiSnapshot
+from tee_writer import TeeWriter
 
 _RUNNING = True
 
@@ -20,17 +34,124 @@ def _signal_handler(signum, frame):
     _RUNNING = False
 
 
-def _iter_lines(source_path: Optional[str]):
-    """Yield text lines either from a file (testing) or stdin (production)."""
+def _iter_raw_lines(source_path: Optional[str], loop: Optional[TimerLoop] = None):
+    """Yield raw byte lines either from a file (testing) or stdin (production)."""
     if source_path:
-        with open(source_path, "r", encoding="utf-8") as f:
-            for line in f:
-                yield line
+        with open(source_path, "rb") as f:
+            yield from loop.lines(f, stop=lambda: not _RUNNING) if loop else f
+    elif loop:
+        yield from loop.lines(sys.stdin.buffer, stop=lambda: not _RUNNING)
     else:
-        for line in sys.stdin:
+        for line in sys.stdin.buffer:
             yield line
 
 
+def _pipeline_samples(stats: Dict[str, Any]) -> List[Sample]:
+    """Scrape-time export of the stream loop counters (no hot-path cost)."""
+    return [
+        ("stream_lines_seen_total", "counter", "tcpdump lines read", stats["seen"]),
+        (
+            "stream_lines_parsed_total",
+            "counter",
+            "Lines parsed into records",
+            stats["parsed"],
+        ),
+        (
+            "stream_lines_skipped_total",
+            "counter",
+            "Lines without mac/rssi/ts",
+            stats["skipped"],
+        ),
+        (
+            "stream_records_enqueued_total",
+            "counter",
+            "Records handed to the shipper",
+            stats["sent_enqueued"],
+        ),
+        (
+            "stream_parse_rate",
+            "gauge",
+            "Parsed lines/s over the last progress interval",
+            stats["parse_rate"],
+        ),
+        (
+            "stream_skip_rate",
+            "gauge",
+            "Skipped lines/s over the last progress interval",
+            stats["skip_rate"],
+        ),
+    ]
+
+
+def _log_progress(
+    log,
+    cfg,
+    stats: Dict[str, Any],
+    ship,
+    frames=None,
+    sanitizer=None,
+    infra=None,
+    rand=None,
+    dedupe=None,
+    shed=None,
+    snap=None,
+) -> None:
+    """Periodic INFO line with loop counters and the shipper's effective settings."""
+    ship_stats = ship.stats()
+    log.info(
+        "seen=%d parsed=%d enqueued=%d rate=%.0f/s (batch_max=%d, flush=%dms%s)",
+        stats["seen"],
+        stats["parsed"],
+        stats["sent_enqueued"],
+        stats["parse_rate"],
+        ship_stats["batch_size"],
+        ship_stats["flush_ms"],
+        ", adaptive" if ship_stats["adaptive"] else "",
+    )
+    if ship_stats.get("breaker_state", "closed") != "closed":
+        log.warning(
+            "circuit breaker %s: parked=%d records",
+            ship_stats["breaker_state"],
+            ship_stats["parked_records"],
+        )
+    if frames is not None:
+        log.info("frames: %s", frames.summary())
+    if shed is not None and (shed.level or shed.transitions):
+        log.info("load: %s", shed.summary())
+    if dedupe is not None and dedupe.dropped:
+        log.info("retransmissions: %s", dedupe.summary())
+    if sanitizer is not None and (sanitizer.rejected or sanitizer.clamped):
+        log.info("invalid: %s", sanitizer.summary())
+    if infra is not None:
+        log.info("infra: %s", infra.summary())
+    if rand is not None:
+        log.info("random macs: %s", rand.summary())
+    if snap is not None:
+        log.info("snapshot: %s", snap.summary())
+    if "coalesce_ratio" in ship_stats:
+        log.info(
+            "coalesce=%s in=%d out=%d reduction=%.1f%%",
+            cfg.coalesce,
+            ship_stats["coalesce_in"],
+            ship_stats["coalesce_out"],
+            ship_stats["coalesce_ratio"] * 100.0,
+        )
+
+
+def _log_replay(log, replay: ReplaySource) -> None:
+    """Replay pacing: achieved vs target line rate and how far behind schedule we are."""
+    r = replay.stats()
+    log.info(
+        "replay speed=%s loops=%d lines=%d achieved=%.0f/s target=%s lag=%.2fs",
+        "max" if r["speed"] is None else f"{r['speed']:g}x",
+        r["loops_done"],
+        r["lines"],
+        r["achieved_rate"],
+        "-" if r["target_rate"] is None else f"{r['target_rate']:.0f}/s",
+        r["lag_s"],
+    )
+
+
 def main():
     # CLI args (handy for local testing)
     parser = argparse.ArgumentParser(
@@ -42,13 +163,170 @@ def main():
         default=None,
         help="Optional path to a file containing tcpdump output (otherwise read from stdin).",
     )
+    parser.add_argument(
+        "--capture",
+        action="store_true",
+        help="Run and supervise tcpdump on WLAN_IFACE instead of reading stdin; "
+        "FRAME_INCLUDE / FRAME_EXCLUDE / CAPTURE_EXCLUDE_MACS become a kernel BPF filter.",
+    )
+    parser.add_argument(
+        "--capture-sudo",
+        action="store_true",
+        help="With --capture: start tcpdump through `sudo -n`.",
+    )
+    parser.add_argument(
+        "--capture-bpf",
+        default=None,
+        help="With --capture: use this BPF expression instead of the derived one "
+        "('' = no filter).",
+    )
+    parser.add_argument(
+        "--replay-speed",
+        default=None,
+        help="Replay --from FILE paced by capture timestamps: a speed factor "
+        "(1 = real time, 10 = ten times faster) or 'max'.",
+    )
+    parser.add_argument(
+        "--replay-loop",
+        type=int,
+        default=1,
+        help="With --replay-speed: play the file N times with shifted timestamps "
+        "(0 = forever, default: 1).",
+    )
+    parser.add_argument(
+        "--replay-rebase",
+        action="store_true",
+        help="With --replay-speed: shift timestamps so the replay starts 'now'.",
+    )
     parser.add_argument(
         "--tee-jsonl",
         dest="tee_path",
         default=None,
         help="Optional path to also write parsed JSONL records locally for debugging.",
     )
+    parser.add_argument(
+        "--tee-rotate-mb",
+        type=float,
+        default=None,
+        help="Rotate the tee file when it reaches this many MiB.",
+    )
+    parser.add_argument(
+        "--tee-rotate-sec",
+        type=float,
+        default=None,
+        help="Rotate the tee file after this many seconds.",
+    )
+    parser.add_argument(
+        "--tee-gzip",
+        action="store_true",
+        help="Gzip rotated tee segments in the background.",
+    )
+    parser.add_argument(
+        "--tee-max-total-mb",
+        type=float,
+        default=None,
+        help="Delete the oldest rotated tee segments beyond this total size (MiB).",
+    )
+    parser.add_argument(
+        "--raw-archive",
+        dest="raw_path",
+        default=None,
+        help="Archive the raw tcpdump lines to this file (replaces `tee` in the shell).",
+    )
+    parser.add_argument(
+        "--raw-sample",
+        type=int,
+        default=1,
+        help="Keep 1 in N raw lines in the archive (default: 1 = all).",
+    )
+    parser.add_argument(
+        "--raw-failed-only",
+        action="store_true",
+        help="Archive only raw lines that failed to parse.",
+    )
+    parser.add_argument(
+        "--raw-no-gzip",
+        action="store_true",
+        help="Write the raw archive uncompressed.",
+    )
+    parser.add_argument(
+        "--raw-rotate-mb",
+        type=float,
+        default=None,
+        help="Rotate the raw archive when it reaches this many MiB on disk.",
+    )
+    parser.add_argument(
+        "--raw-max-total-mb",
+        type=float,
+        default=None,
+        help="Delete the oldest raw archive segments beyond this total size (MiB).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Parse in N worker processes fed by a reader process through a "
+        "shared-memory ring (default: 0 = single process).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time each pipeline stage (sampled) and print a report on exit / SIGUSR1.",
+    )
+    parser.add_argument(
+        "--profile-sample",
+        type=int,
+        default=100,
+        help="Time 1 in N lines in --profile mode (default: 100).",
+    )
+    parser.add_argument(
+        "--profile-cprofile-sec",
+        type=float,
+        default=0.0,
+        help="Also run cProfile for the first N seconds in --profile mode.",
+    )
+    parser.add_argument(
+        "--profile-out",
+        default=None,
+        help="Append profile reports to this file (default: stderr).",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve Prometheus metrics on 127.0.0.1:PORT (/metrics, /metrics.json).",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        dest="metrics_json",
+        default=None,
+        help="Optional path for a periodic JSON metrics snapshot.",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=10.0,
+        help="Seconds between JSON metrics snapshots (default: 10).",
+    )
     args = parser.parse_args()
+    if args.workers and (args.raw_path or args.profile or args.replay_speed):
+        parser.error(
+            "--raw-archive, --profile and --replay-speed need the single-process mode"
+        )
+    if args.capture and (args.source or args.workers):
+        parser.error("--capture reads tcpdump itself: drop --from / --workers")
+    replay_speed = None
+    if args.replay_speed is not None:
+        if not args.source:
+            parser.error("--replay-speed needs --from FILE")
+        try:
+            replay_speed = (
+                None if args.replay_speed == "max" else float(args.replay_speed)
+            )
+        except ValueError:
+            parser.error("--replay-speed must be a number or 'max'")
+        if replay_speed is not None and replay_speed <= 0:
+            parser.error("--replay-speed must be > 0")
 
     # Load config
     cfg = load_config()
@@ -72,6 +350,187 @@ def main():
         ingest_url,
     )
 
+    # Loop counters (also exported through the metrics registry)
+    stats: Dict[str, Any] = {
+        "seen": 0,
+        "parsed": 0,
+        "skipped": 0,
+        "sent_enqueued": 0,
+        "parse_rate": 0.0,
+        "skip_rate": 0.0,
+    }
+
+    # Frame-type policy, applied before field extraction (FRAME_INCLUDE / FRAME_EXCLUDE)
+    frames = FrameFilter(
+        include=parse_frame_types(cfg.frame_include),
+        exclude=parse_frame_types(cfg.frame_exclude),
+        parse=parse_line,
+    )
+    if frames.active:
+        log.info(
+            "Frame filter: include=%s exclude=%s",
+            ",".join(sorted(frames.include)) if frames.include else "all",
+            ",".join(sorted(frames.exclude)) or "none",
+        )
+
+    # Parser processes are forked: start them while this process is still
+    # single-threaded (before the Shipper, metrics, tee and capture threads), so no
+    # child inherits a lock some other thread held at fork time
+    pipe = None
+    if args.workers:
+        pipe = ProcessPipeline(
+            args.source, args.workers, parse=frames.parse, counters=frames
+        )
+        pipe.start()
+
+    # Timers run between reads and while the input is idle (quiet channel)
+    loop = TimerLoop()
+    clock = CaptureClock()
+
+    # Retransmission dedupe needs every line of a MAC in one process
+    dedupe = None
+    if cfg.dedupe:
+        if args.workers:
+            log.warning("DEDUPE needs the single-process mode; disabled with --workers")
+        else:
+            dedupe = RetryDedupe(retry_gap_s=cfg.dedupe_gap_ms / 1000.0)
+
+    # Edge-side validation against the server's schema (SANITIZE)
+    sanitizer = None if cfg.sanitize == "off" else RecordSanitizer(cfg.sanitize)
+
+    # Learned infrastructure (AP) registry: suppress / downsample static transmitters
+    infra = None
+    if cfg.infra_mode != "off":
+        infra = InfraRegistry(
+            cfg.infra_registry_path or None,
+            mode=cfg.infra_mode,
+            keep_every_s=cfg.infra_keep_sec,
+            allow=filter(None, cfg.infra_allow.split(",")),
+            deny=filter(None, cfg.infra_deny.split(",")),
+            stable_s=cfg.infra_stable_sec,
+            stable_stddev=cfg.infra_stable_db,
+        )
+        log.info("Infrastructure registry (%s): %s", cfg.infra_mode, infra.summary())
+
+    # Records emitted by later stages (summaries, aggregates) take the same exit
+    def _ship_emitted(rec: Dict[str, Any]) -> None:
+        if tee_file:
+            tee_file.write_record(rec)
+        ship.add(rec)
+        stats["sent_enqueued"] += 1
+
+    # Randomized MACs never reach the shipper; window summaries are crowd statistics,
+    # exported through the metrics registry (rand.samples) and the progress log
+    rand = None
+    if cfg.random_mac_mode != "off":
+        rand = RandomMacCollapser(cfg.random_mac_mode, cfg.random_mac_window_sec)
+
+    # Snapshot mode: ship changed per-MAC RSSI entries every interval, not every record
+    snap = None
+    if cfg.snapshot_mode != "off":
+        snap = RssiSnapshot(
+            emit=_ship_emitted,
+            mode=cfg.snapshot_mode,
+            min_delta_db=cfg.snapshot_min_delta_db,
+            refresh_s=cfg.snapshot_refresh_sec,
+        )
+        log.info(
+            "Snapshot mode (%s): pushing changed entries every %ds",
+            cfg.snapshot_mode,
+            cfg.snapshot_interval_sec,
+        )
+
+    # Optional supervised tcpdump with the frame policy pushed into the kernel
+    capture = None
+    if args.capture:
+        bpf = args.capture_bpf
+        if bpf is None:
+            bpf = build_bpf_filter(
+                include=frames.include,
+                exclude=frames.exclude,
+                exclude_macs=parse_mac_list(cfg.capture_exclude_macs),
+            )
+        capture = TcpdumpCapture(
+            cfg.wlan_iface, bpf=bpf, sudo=args.capture_sudo, loop=loop
+        )
+        log.info("Capture BPF filter: %s", bpf or "(none)")
+
+    # Live input: stdin, --capture or a rebased replay. Capture timestamps of anything
+    # else (--from) are not comparable with the wall clock
+    live = not args.source or (args.replay_speed is not None and args.replay_rebase)
+
+    # Load shedding: only meaningful for live input
+    shed = None
+    if cfg.load_shed:
+        if args.workers or not live:
+            log.warning(
+                "LOAD_SHED needs live single-process input (stdin, --capture or "
+                "--replay-rebase); disabled"
+            )
+        else:
+            lag_s = cfg.load_shed_lag_ms / 1000.0
+            backlog = cfg.load_shed_backlog_kb * 1024
+            shed = LoadShedder(
+                fd=capture.fileno if capture else (None if args.source else lambda: 0),
+                emit=snap.add if snap else _ship_emitted,
+                lag_high_s=lag_s,
+                lag_low_s=lag_s / 4,
+                backlog_high=backlog,
+                backlog_low=backlog // 4,
+            )
+
+    # Optional metrics surface (Prometheus text on localhost and/or JSON snapshots)
+    registry = None
+    metrics_server = None
+    metrics_writer = None
+    if args.metrics_port is not None or args.metrics_json:
+        registry = MetricsRegistry()
+        registry.register_collector(lambda: _pipeline_samples(stats))
+        registry.register_collector(frames.samples)
+        if capture:
+            registry.register_collector(capture.samples)
+        if dedupe:
+            registry.register_collector(dedupe.samples)
+        if sanitizer:
+            registry.register_collector(sanitizer.samples)
+        if infra:
+            registry.register_collector(infra.samples)
+        if rand:
+            registry.register_collector(rand.samples)
+        if shed:
+            registry.register_collector(shed.samples)
+        if snap:
+            registry.register_collector(snap.samples)
+
+    # Optional per-stage profiler (--profile)
+    prof = None
+    prof_out = None
+    if args.profile:
+        prof = StageProfiler(
+            sample_every=args.profile_sample, cprofile_s=args.profile_cprofile_sec
+        )
+        prof_out = (
+            open(args.profile_out, "a", encoding="utf-8")
+            if args.profile_out
+            else sys.stderr
+        )
+        prof.install_sigusr1(prof_out)
+        log.info(
+            "Profiling 1 in %d lines (kill -USR1 %d for a report)",
+            args.profile_sample,
+            os.getpid(),
+        )
+
+    # Freshness lanes and the TTL judge record age by the wall clock: live input only
+    fresh_s = cfg.fresh_window or None
+    ttl_s = cfg.record_ttl or None
+    if (fresh_s or ttl_s) and not live:
+        log.info(
+            "FRESH_WINDOW_SEC / RECORD_TTL_SEC apply to live input only; "
+            "ignored for --from"
+        )
+        fresh_s = ttl_s = None
+
     # Shipper wiring
     ship = Shipper(
         server_url=ingest_url,  # full route
@@ -83,57 +542,274 @@ def main():
         use_gzip=False,  # set True only if server handles gzip
         auth_style="x-api-key",
         endpoint_id=cfg.endpoint_id,
+        adaptive=cfg.batch_adaptive,
+        min_batch_size=cfg.batch_min,
+        max_batch_size=cfg.batch_ceiling,
+        target_latency_ms=cfg.batch_target_latency_ms,
+        max_data_age_ms=cfg.batch_max_age * 1000,
+        coalesce=None if cfg.coalesce == "off" else cfg.coalesce,
+        coalesce_bucket_s=cfg.coalesce_bucket_ms / 1000.0,
+        breaker_threshold=cfg.breaker_threshold,
+        breaker_cooldown_s=cfg.breaker_cooldown,
+        park_max_records=cfg.park_max_records,
+        fresh_s=fresh_s,
+        ttl_s=ttl_s,
+        ttl_action=cfg.ttl_action,
+        backlog_rate=cfg.backlog_rate,
+        max_batch_bytes=cfg.batch_max_bytes or None,
+        metrics=registry,
+        profiler=prof,
     )
 
-    # Optional local JSONL tee file for debugging
+    if args.metrics_port is not None:
+        metrics_server = start_http_server(registry, args.metrics_port)
+        log.info("Serving metrics on http://127.0.0.1:%d/metrics", args.metrics_port)
+    if args.metrics_json:
+        metrics_writer = JsonSnapshotWriter(
+            registry, args.metrics_json, args.metrics_interval
+        )
+        log.info("Writing metrics snapshots to %s", args.metrics_json)
+
+    # Optional local JSONL tee file for debugging (buffered, rotating)
     tee_file = None
     if args.tee_path:
-        tee_file = open(args.tee_path, "a", encoding="utf-8")
+        tee_file = TeeWriter(
+            args.tee_path,
+            rotate_bytes=(
+                int(args.tee_rotate_mb * (1 << 20)) if args.tee_rotate_mb else None
+            ),
+            rotate_interval_s=args.tee_rotate_sec,
+            compress=args.tee_gzip,
+            max_total_bytes=(
+                int(args.tee_max_total_mb * (1 << 20))
+                if args.tee_max_total_mb
+                else None
+            ),
+        )
         log.info("Teeing parsed JSONL to %s", args.tee_path)
 
-    # Graceful shutdown on SIGINT/SIGTERM
-    signal.signal(signal.SIGINT, _signal_handler)
-    signal.signal(signal.SIGTERM, _signal_handler)
+    # Optional raw capture archive (sampled, compressed, rotating)
+    raw_archive = None
+    if args.raw_path:
+        raw_archive = RawArchiver(
+            args.raw_path,
+            sample_every=args.raw_sample,
+            failed_only=args.raw_failed_only,
+            compress=not args.raw_no_gzip,
+            rotate_bytes=(
+                int(args.raw_rotate_mb * (1 << 20)) if args.raw_rotate_mb else None
+            ),
+            max_total_bytes=(
+                int(args.raw_max_total_mb * (1 << 20))
+                if args.raw_max_total_mb
+                else None
+            ),
+        )
+        log.info("Archiving raw capture to %s", args.raw_path)
+
+    # Graceful shutdown on SIGINT/SIGTERM (also ends a supervised tcpdump)
+    def _on_signal(signum, frame):
+        _signal_handler(signum, frame)
+        if capture:
+            capture.stop()
+
+    signal.signal(signal.SIGINT, _on_signal)
+    signal.signal(signal.SIGTERM, _on_signal)
 
     last_log = time.time()
-    stats = {"seen": 0, "parsed": 0, "sent_enqueued": 0}
+    last_counts = (0, 0)
+
+    def _periodic() -> None:
+        """Every 5 s: refresh rates, log progress and flush quiet-period buffers."""
+        nonlocal last_log, last_counts
+        now = time.time()
+        elapsed = max(now - last_log, 1e-6)
+        stats["parse_rate"] = (stats["parsed"] - last_counts[0]) / elapsed
+        stats["skip_rate"] = (stats["skipped"] - last_counts[1]) / elapsed
+        last_counts = (stats["parsed"], stats["skipped"])
+        _log_progress(
+            log, cfg, stats, ship, frames, sanitizer, infra, rand, dedupe, shed, snap
+        )
+        if infra:
+            infra.maybe_save()
+        if capture:
+            log.info("capture: %s", capture.summary())
+            capture.request_stats()  # counters arrive on tcpdump's stderr
+        if replay:
+            _log_replay(log, replay)
+        if tee_file:
+            tee_file.tick()
+        if raw_archive:
+            raw_archive.tick()
+        last_log = now
 
+    def _flush_windows() -> None:
+        """Close random-MAC / load-shed windows whose end the capture clock passed."""
+        now = clock.now()
+        if rand:
+            rand.flush_expired(now)
+        if shed and now is not None:
+            shed.flush_expired(now)
+
+    # Shipper batches are time-flushed by the Shipper's own thread (flush_ms)
+    loop.every(5.0, _periodic)
+    if rand or shed:
+        loop.every(0.5, _flush_windows)
+    if snap:
+        loop.every(cfg.snapshot_interval_sec, lambda: snap.push(clock.now()))
+
+    replay = None
+    cap_lines = None
     try:
-        for raw_line in _iter_lines(args.source):
-            if not _RUNNING:
-                break
-
-            stats["seen"] += 1
-            rec = parse_line(raw_line)
-            if rec is None:
-                if log.isEnabledFor(logging.DEBUG):
-                    log.debug("Skipped line: %r", raw_line.strip())
-                continue
-
-            stats["parsed"] += 1
-
-            # Optional local tee for quick validation while developing
-            if tee_file:
-                tee_file.write(json.dumps(rec) + "\n")
-                tee_file.flush()
-
-            # Hand off to shipper (batching handled inside Shipper)
-            ship.add(rec)
-            stats["sent_enqueued"] += 1
-
-            # Periodic progress log
-            now = time.time()
-            if now - last_log >= 5:
-                log.info(
-                    "seen=%d parsed=%d enqueued=%d (batch_max=%d, flush=%ds)",
-                    stats["seen"],
-                    stats["parsed"],
-                    stats["sent_enqueued"],
-                    cfg.batch_max,
-                    cfg.batch_interval,
+        if args.workers:
+            # Workers filter in their own processes; the parent counts parsed records
+            for records in pipe.results():
+                if not _RUNNING:
+                    # Reader stops; records already in the ring are still delivered
+                    pipe.stop()
+                if records:
+                    clock.ts = records[-1]["timestamp"]
+                if sanitizer:
+                    records = [r for r in map(sanitizer.apply, records) if r]
+                if infra:
+                    records = [r for r in map(infra.filter, records) if r]
+                if rand:
+                    records = [r for r in map(rand.route, records) if r]
+                if snap:
+                    for rec in records:
+                        snap.add(rec)
+                    records = []
+                for rec in records:
+                    if tee_file:
+                        tee_file.write_record(rec)
+                    ship.add(rec)
+                stats["seen"] = pipe.lines
+                stats["skipped"] = pipe.skipped
+                stats["parsed"] = pipe.lines - pipe.skipped
+                stats["sent_enqueued"] += len(records)
+                loop.run_due()
+            log.info("Pipeline finished: %s", pipe.stats())
+        else:
+            if args.replay_speed is not None:
+                replay = ReplaySource(
+                    args.source,
+                    speed=replay_speed,
+                    loops=args.replay_loop,
+                    rebase=args.replay_rebase,
+                    stop=lambda: not _RUNNING,
                 )
-                last_log = now
+                lines = iter(replay)
+            elif capture:
+                lines = cap_lines = iter(capture)
+            else:
+                lines = _iter_raw_lines(args.source, loop)
+            if prof:
+                lines = prof.iterate("read", lines)
+            for raw_bytes in lines:
+                if not _RUNNING:
+                    break
+                # ReplaySource paces itself; other sources run timers inside the loop.
+                # Run them per input line so dropped stretches do not starve them.
+                if replay:
+                    loop.run_due()
+
+                stats["seen"] += 1
+                t = prof.start() if prof else None
+                raw_line = raw_bytes.decode("utf-8", errors="replace")
+                ftype = None
+                if shed:
+                    shed.tick(raw_line)
+                    keep, ftype = shed.admit_line(raw_line)
+                    if not keep:
+                        # Shed lines are still seen and archived: the archive stays a
+                        # full copy of the capture under load
+                        frames.count(ftype)
+                        if raw_archive:
+                            raw_archive.write(raw_bytes, parsed=False)
+                        continue
+                rec = frames.parse(raw_line, ftype or None)
+                if t:
+                    t = prof.lap("parse", t)
+                if raw_archive:
+                    raw_archive.write(raw_bytes, parsed=rec is not None)
+                    if t:
+                        t = prof.lap("archive", t)
+                if rec is None:
+                    stats["skipped"] += 1
+                    if log.isEnabledFor(logging.DEBUG):
+                        log.debug("Skipped line: %r", raw_line.strip())
+                    continue
+
+                stats["parsed"] += 1
+                clock.ts = rec["timestamp"]
+                if dedupe:
+                    dup = dedupe.is_duplicate(rec, raw_line)
+                    if t:
+                        t = prof.lap("dedupe", t)
+                    if dup:
+                        continue
+                if sanitizer:
+                    rec = sanitizer.apply(rec)
+                    if t:
+                        t = prof.lap("sanitize", t)
+                    if rec is None:
+                        continue
+                if infra:
+                    rec = infra.filter(rec)
+                    if t:
+                        t = prof.lap("infra", t)
+                    if rec is None:
+                        continue
+                if rand:
+                    rec = rand.route(rec)
+                    if t:
+                        t = prof.lap("random_mac", t)
+                    if rec is None:
+                        continue
+                if shed:
+                    rec = shed.admit(rec)
+                    if rec is None:
+                        continue
+                if snap:
+                    snap.add(rec)
+                    continue
+
+                # Optional local tee for quick validation while developing
+                if tee_file:
+                    tee_file.write_record(rec)
+                    if t:
+                        t = prof.lap("tee", t)
+
+                # Hand off to shipper (batching handled inside Shipper)
+                ship.add(rec)
+                stats["sent_enqueued"] += 1
+                if t:
+                    prof.lap("ship_add", t)
 
+        if replay:
+            _log_replay(log, replay)
+        if capture:
+            # Stop tcpdump and wait for its exit counters
+            capture.stop()
+            cap_lines.close()
+            log.info("Capture: %s", capture.summary())
+        log.info("Frame types: %s", frames.summary())
+        if dedupe:
+            log.info("Retransmissions: %s", dedupe.summary())
+        if sanitizer:
+            log.info("Invalid records: %s", sanitizer.summary())
+        if infra:
+            infra.save()
+            log.info("Infrastructure: %s", infra.summary())
+        if rand:
+            rand.flush()
+            log.info("Randomized MACs: %s", rand.summary())
+        if shed:
+            shed.close()
+            log.info("Load shedding: %s (%s)", shed.summary(), shed.transitions or "-")
+        if snap:
+            snap.push()
+            log.info("Snapshot: %s", snap.summary())
         log.info("Stopping stream: flushing remaining records...")
         ship.flush()
 
@@ -145,8 +821,23 @@ def main():
             pass
         raise
     finally:
+        if capture:
+            capture.stop()
+        if pipe:
+            pipe.close()
         if tee_file:
             tee_file.close()
+        if raw_archive:
+            raw_archive.close()
+        if metrics_writer:
+            metrics_writer.close()
+        if metrics_server:
+            metrics_server.shutdown()
+        if prof:
+            prof.stop_cprofile()
+            prof.write_report(prof_out)
+            if prof_out is not sys.stderr:
+                prof_out.close()
         log.info("Stream stopped cleanly.")
 
 
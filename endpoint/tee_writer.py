@@ -0,0 +1,202 @@
+"""
+tee_writer.py
+Buffered, rotating JSONL writer for stream.py --tee-jsonl.
+
+Usage pattern:
+    from tee_writer import TeeWriter
+
+    tee = TeeWriter("/home/pi/logs/parsed.jsonl", rotate_bytes=50 << 20, compress=True,
+                    max_total_bytes=500 << 20)
+    tee.write_record({"mac": "...", "rssi": -42, "timestamp": 123.456})
+    tee.tick()    # optional: flush a due buffer during quiet periods
+    tee.close()   # flush, stop the compressor
+
+Behaviour:
+    - records are buffered in memory and written with one write() per flush, either when
+      flush_bytes have accumulated or flush_interval_s has passed (checked on write/tick)
+    - the active file is always `path`; when it reaches rotate_bytes or rotate_interval_s
+      it is renamed to `path.YYYYmmdd-HHMMSS` and a fresh file is opened
+    - with compress=True closed segments are gzipped by a background thread
+    - with max_total_bytes the oldest closed segments are deleted to cap disk use
+"""
+
+from __future__ import annotations
+
+import glob
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+log = logging.getLogger("tee_writer")
+
+
+class TeeWriter:
+    """Size/time-buffered JSONL writer with rotation, background gzip and a disk cap."""
+
+    def __init__(
+        self,
+        path: str,
+        flush_bytes: int = 64 * 1024,
+        flush_interval_s: float = 1.0,
+        rotate_bytes: Optional[int] = None,
+        rotate_interval_s: Optional[float] = None,
+        compress: bool = False,
+        max_total_bytes: Optional[int] = None,
+    ):
+        self.path = path
+        self.flush_bytes = int(flush_bytes)
+        self.flush_interval_s = float(flush_interval_s)
+        self.rotate_bytes = int(rotate_bytes) if rotate_bytes else None
+        self.rotate_interval_s = float(rotate_interval_s) if rotate_interval_s else None
+        self.compress = bool(compress)
+        self.max_total_bytes = int(max_total_bytes) if max_total_bytes else None
+
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+
+        self._buf: List[str] = []
+        self._buf_bytes = 0
+        self._last_flush = time.monotonic()
+        self._file = open(path, "a", encoding="utf-8")
+        self._file_bytes = self._file.tell()
+        self._opened_at = time.time()
+
+        self.records = 0
+        self.flushes = 0
+        self.rotations = 0
+
+        self._gz_q: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._gz_thread: Optional[threading.Thread] = None
+        if self.compress:
+            self._gz_thread = threading.Thread(
+                target=self._gzip_worker, name="TeeGzip", daemon=True
+            )
+            self._gz_thread.start()
+
+    # ---------------- Public API ----------------
+
+    def write_record(self, record: Dict[str, Any]) -> None:
+        """Buffer one record as a JSONL line; flushes/rotates when due."""
+        line = json.dumps(record) + "\n"
+        self._buf.append(line)
+        self._buf_bytes += len(line)
+        self.records += 1
+        if (
+            self._buf_bytes >= self.flush_bytes
+            or time.monotonic() - self._last_flush >= self.flush_interval_s
+        ):
+            self.flush()
+
+    def tick(self) -> None:
+        """Flush the buffer if flush_interval_s has passed (call periodically)."""
+        if self._buf and time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered lines with a single write() and rotate if due."""
+        self._write_buffer()
+        if self._rotation_due():
+            self.rotate()
+
+    def rotate(self) -> Optional[str]:
+        """Close the active file, rename it with a timestamp and open a fresh one."""
+        self._write_buffer()
+        if not self._file_bytes:
+            return None
+        self._file.close()
+        segment = self._segment_name()
+        os.replace(self.path, segment)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._file_bytes = 0
+        self._opened_at = time.time()
+        self.rotations += 1
+        if self.compress:
+            self._gz_q.put(segment)
+        else:
+            self._enforce_cap()
+        return segment
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+        if self._gz_thread is not None:
+            self._gz_q.put(None)
+            self._gz_thread.join(timeout=30.0)
+
+    # ---------------- Helpers ----------------
+
+    def _write_buffer(self) -> None:
+        if self._buf:
+            data = "".join(self._buf)
+            self._buf.clear()
+            self._buf_bytes = 0
+            self._file.write(data)
+            self._file.flush()
+            self._file_bytes += len(data)
+            self.flushes += 1
+        self._last_flush = time.monotonic()
+
+    def _rotation_due(self) -> bool:
+        if not self._file_bytes:
+            return False
+        if self.rotate_bytes and self._file_bytes >= self.rotate_bytes:
+            return True
+        return bool(
+            self.rotate_interval_s
+            and time.time() - self._opened_at >= self.rotate_interval_s
+        )
+
+    def _segment_name(self) -> str:
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime())
+        name = f"{self.path}.{stamp}"
+        n = 1
+        while os.path.exists(name) or os.path.exists(name + ".gz"):
+            name = f"{self.path}.{stamp}.{n}"
+            n += 1
+        return name
+
+    def _segments(self) -> List[str]:
+        """Closed segments, oldest first."""
+        paths = [
+            p
+            for p in glob.glob(glob.escape(self.path) + ".*")
+            if not p.endswith(".tmp")
+        ]
+        return sorted(paths, key=lambda p: os.path.getmtime(p))
+
+    def _enforce_cap(self) -> None:
+        if not self.max_total_bytes:
+            return
+        segments = self._segments()
+        total = self._file_bytes + sum(os.path.getsize(p) for p in segments)
+        for seg in segments:
+            if total <= self.max_total_bytes:
+                break
+            size = os.path.getsize(seg)
+            try:
+                os.remove(seg)
+                total -= size
+                log.info("Removed old tee segment %s to cap disk use", seg)
+            except OSError:
+                pass
+
+    def _gzip_worker(self) -> None:
+        while True:
+            segment = self._gz_q.get()
+            if segment is None:
+                return
+            tmp = segment + ".gz.tmp"
+            try:
+                with open(segment, "rb") as src, gzip.open(tmp, "wb") as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+                os.replace(tmp, segment + ".gz")
+                os.remove(segment)
+            except OSError as e:
+                log.warning("Failed to compress %s: %s", segment, e)
+            self._enforce_cap()
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+traffic_gen.py
+Synthetic tcpdump `-e -tt -n -vvv` radiotap output for scale testing the endpoint pipeline.
+
+Usage pattern:
+    # 5,000 devices, 20k frames/s in real time, straight into the pipeline
+    python traffic_gen.py --devices 5000 --rate 20000 --duration 60 --realtime \
+        | python stream.py
+
+    # 1M lines as fast as possible into a file (capture timestamps still spaced at --rate)
+    python traffic_gen.py --count 1000000 --rate 5000 --out /tmp/synthetic.txt
+
+    from traffic_gen import TrafficGenerator
+    gen = TrafficGenerator(devices=500, aps=8, seed=1)
+    for line in gen.lines(rate=2000, count=10):
+        ...
+
+Model:
+    - a population of access points and client devices in a square room (area_m) around
+      the sensor; clients either stand still or walk (bounded random walk, <= 1.4 m/s)
+    - RSSI follows a log-distance path-loss model with Gaussian noise (noise_db)
+    - a fraction of clients use randomized (locally administered) MACs: their probe
+      requests rotate to a fresh random MAC every mac_rotate_s, their data frames use a
+      stable per-network random MAC
+    - frame mix defaults to the proportions seen in sample_captures (beacons, RTS, data,
+      ACK, CTS, probe requests, block-acks, probe responses); data frames are retried
+      (same IV, "Retry" flag) with retry_prob
+    - lines are formatted like the real captures, so parser_scan.parse_line extracts the
+      same fields (TA for RTS, SA for beacons / probes / data; ACK/CTS/BA carry only RA)
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import signal
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, TextIO
+
+# Frame mix observed in sample_captures/third_scan_raw.txt
+DEFAULT_MIX: Dict[str, float] = {
+    "beacon": 2518,
+    "rts": 1246,
+    "data": 584,
+    "ack": 389,
+    "cts": 261,
+    "probe_request": 163,
+    "ba": 146,
+    "probe_response": 96,
+}
+
+_RATES = "[1.0* 2.0* 5.5* 11.0* 6.0* 9.0 12.0* 18.0 Mbit]"
+_PROBE_RATES = "[1.0 2.0 5.5 11.0 Mbit]"
+_SSIDS = ["ZOPAC-Lab", "eduroam", "Campus-Guest", "RAG XT", "HP-Print-3F", "IoT-Net"]
+_OUIS = ["3c:28:6d", "b8:27:eb", "a4:97:33", "78:28:ca", "b4:b7:42", "54:07:7d"]
+
+
+def _mac(rnd: random.Random, oui: Optional[str] = None, local: bool = False) -> str:
+    if oui is None:
+        first = rnd.randrange(256)
+        first = (first | 0x02) & 0xFE if local else first & 0xFC
+        head = [first, rnd.randrange(256), rnd.randrange(256)]
+        prefix = ":".join(f"{b:02x}" for b in head)
+    else:
+        prefix = oui
+    return prefix + "".join(f":{rnd.randrange(256):02x}" for _ in range(3))
+
+
+@dataclass
+class Device:
+    mac: str
+    is_ap: bool
+    x: float
+    y: float
+    vx: float = 0.0
+    vy: float = 0.0
+    randomized: bool = False
+    probe_mac: str = ""
+    probe_mac_until: float = 0.0
+    ap: Optional["Device"] = None  # associated AP (clients)
+    ssid: str = ""
+    iv: int = 0
+    last_move: float = 0.0
+
+
+class TrafficGenerator:
+    """Generates tcpdump-style lines from a simulated device population."""
+
+    def __init__(
+        self,
+        devices: int = 200,
+        aps: int = 5,
+        randomized_frac: float = 0.3,
+        mobile_frac: float = 0.5,
+        associated_frac: float = 0.6,
+        area_m: float = 40.0,
+        channel: int = 6,
+        noise_db: float = 4.0,
+        path_loss_exp: float = 2.7,
+        mac_rotate_s: float = 60.0,
+        retry_prob: float = 0.05,
+        mix: Optional[Dict[str, float]] = None,
+        seed: Optional[int] = None,
+        start_ts: Optional[float] = None,
+    ):
+        if devices < 1 or aps < 1:
+            raise ValueError("need at least one device and one AP")
+        self.rnd = random.Random(seed)
+        self.area_m = float(area_m)
+        self.channel = int(channel)
+        self.freq = 2407 + 5 * self.channel if self.channel <= 13 else 2484
+        self.noise_db = float(noise_db)
+        self.path_loss_exp = float(path_loss_exp)
+        self.mac_rotate_s = float(mac_rotate_s)
+        self.retry_prob = float(retry_prob)
+        self.ts = time.time() if start_ts is None else float(start_ts)
+        self._t0 = self.ts
+
+        mix = dict(DEFAULT_MIX if mix is None else mix)
+        unknown = set(mix) - set(DEFAULT_MIX)
+        if unknown:
+            raise ValueError(f"unknown frame types in mix: {sorted(unknown)}")
+        self._kinds = [k for k, w in mix.items() if w > 0]
+        self._weights = [mix[k] for k in self._kinds]
+
+        rnd = self.rnd
+        self.aps: List[Device] = [
+            Device(
+                mac=_mac(rnd, rnd.choice(_OUIS)),
+                is_ap=True,
+                x=rnd.uniform(-area_m / 2, area_m / 2),
+                y=rnd.uniform(-area_m / 2, area_m / 2),
+                ssid=_SSIDS[i % len(_SSIDS)],
+            )
+            for i in range(aps)
+        ]
+        self.clients: List[Device] = []
+        for _ in range(devices):
+            randomized = rnd.random() < randomized_frac
+            dev = Device(
+                mac=(
+                    _mac(rnd, local=True)
+                    if randomized
+                    else _mac(rnd, rnd.choice(_OUIS))
+                ),
+                is_ap=False,
+                x=rnd.uniform(-area_m / 2, area_m / 2),
+                y=rnd.uniform(-area_m / 2, area_m / 2),
+                randomized=randomized,
+                iv=rnd.randrange(0x10000),
+                last_move=self.ts,
+            )
+            if rnd.random() < mobile_frac:
+                speed = rnd.uniform(0.3, 1.4)
+                angle = rnd.uniform(0, 2 * math.pi)
+                dev.vx, dev.vy = speed * math.cos(angle), speed * math.sin(angle)
+            if rnd.random() < associated_frac:
+                dev.ap = rnd.choice(self.aps)
+            self.clients.append(dev)
+        self._associated = [c for c in self.clients if c.ap is not None] or self.clients
+
+    # ---------------- Physics ----------------
+
+    def _move(self, dev: Device) -> None:
+        dt = self.ts - dev.last_move
+        dev.last_move = self.ts
+        if not (dev.vx or dev.vy) or dt <= 0:
+            return
+        half = self.area_m / 2
+        dev.x += dev.vx * dt
+        dev.y += dev.vy * dt
+        if abs(dev.x) > half:
+            dev.vx = -dev.vx
+            dev.x = math.copysign(half, dev.x)
+        if abs(dev.y) > half:
+            dev.vy = -dev.vy
+            dev.y = math.copysign(half, dev.y)
+        if self.rnd.random() < 0.01:  # occasional change of direction
+            speed = math.hypot(dev.vx, dev.vy)
+            angle = self.rnd.uniform(0, 2 * math.pi)
+            dev.vx, dev.vy = speed * math.cos(angle), speed * math.sin(angle)
+
+    def _rssi(self, dev: Device) -> int:
+        """Log-distance path loss from dev to the sensor at the origin, plus noise."""
+        self._move(dev)
+        d = max(1.0, math.hypot(dev.x, dev.y))
+        tx = -30.0 if dev.is_ap else -35.0  # RSSI at 1 m
+        rssi = tx - 10.0 * self.path_loss_exp * math.log10(d)
+        rssi += self.rnd.gauss(0.0, self.noise_db)
+        return int(round(min(-10.0, max(-110.0, rssi))))
+
+    def _probe_mac(self, dev: Device) -> str:
+        if not dev.randomized:
+            return dev.mac
+        if self.ts >= dev.probe_mac_until:
+            dev.probe_mac = _mac(self.rnd, local=True)
+            dev.probe_mac_until = self.ts + self.mac_rotate_s
+        return dev.probe_mac
+
+    # ---------------- Formatting ----------------
+
+    def _radiotap(self, rssi: int, ofdm: bool = False) -> str:
+        tsft = int((self.ts - self._t0) * 1e6) + 3_750_674
+        if ofdm:
+            return (
+                f"{self.ts:.6f} {tsft}us tsft 6.0 Mb/s {self.freq} MHz 11g "
+                f"{rssi}dBm signal {rssi}dBm signal antenna 0 {rssi - 3}dBm signal antenna 1"
+            )
+        return (
+            f"{self.ts:.6f} {tsft}us tsft 1.0 Mb/s {self.freq} MHz 11b "
+            f"{rssi}dBm signal {rssi}dBm signal antenna 0 0dBm signal antenna 1"
+        )
+
+    def frame(self, kind: str) -> str:
+        """Format one frame of the given kind at the current capture timestamp."""
+        rnd = self.rnd
+        if kind == "beacon":
+            ap = rnd.choice(self.aps)
+            return (
+                f"{self._radiotap(self._rssi(ap))} 0us BSSID:{ap.mac} "
+                f"DA:ff:ff:ff:ff:ff:ff SA:{ap.mac} Beacon ({ap.ssid}) {_RATES} "
+                f"ESS CH: {self.channel}, PRIVACY"
+            )
+        if kind == "probe_request":
+            dev = rnd.choice(self.clients)
+            ssid = rnd.choice(_SSIDS) if rnd.random() < 0.5 else ""
+            return (
+                f"{self._radiotap(self._rssi(dev))} 0us BSSID:ff:ff:ff:ff:ff:ff "
+                f"DA:ff:ff:ff:ff:ff:ff SA:{self._probe_mac(dev)} Probe Request "
+                f"({ssid}) {_PROBE_RATES}"
+            )
+        if kind == "probe_response":
+            ap = rnd.choice(self.aps)
+            dev = rnd.choice(self.clients)
+            return (
+                f"{self._radiotap(self._rssi(ap))} 314us BSSID:{ap.mac} "
+                f"DA:{self._probe_mac(dev)} SA:{ap.mac} Probe Response ({ap.ssid}) "
+                f"{_RATES} CH: {self.channel}, PRIVACY"
+            )
+        if kind == "data":
+            dev = rnd.choice(self._associated)
+            ap = dev.ap or rnd.choice(self.aps)
+            retry = rnd.random() < self.retry_prob
+            if not retry:
+                dev.iv = (dev.iv + 1) & 0xFFFF
+            if rnd.random() < 0.7:  # uplink: client -> AP
+                sa, da, src = dev.mac, ap.mac, dev
+            else:  # downlink as heard from the AP
+                sa, da, src = ap.mac, dev.mac, ap
+            return (
+                f"{self._radiotap(self._rssi(src))} {'Retry ' if retry else ''}"
+                f"Protected 314us DA:{da} BSSID:{ap.mac} SA:{sa} "
+                f"Data IV:{dev.iv:04x} Pad 20 KeyID 0"
+            )
+        if kind == "rts":
+            dev = rnd.choice(self._associated)
+            ap = dev.ap or rnd.choice(self.aps)
+            return (
+                f"{self._radiotap(self._rssi(dev))} 3284us RA:{ap.mac} TA:{dev.mac} "
+                "Request-To-Send"
+            )
+        if kind == "cts":
+            dev = rnd.choice(self._associated)
+            return (
+                f"{self._radiotap(self._rssi(dev.ap or dev), ofdm=True)} 0us "
+                f"RA:{dev.mac} Clear-To-Send"
+            )
+        if kind == "ack":
+            dev = rnd.choice(self._associated)
+            return f"{self._radiotap(self._rssi(dev))} 0us RA:{dev.mac} Acknowledgment"
+        if kind == "ba":
+            dev = rnd.choice(self._associated)
+            return (
+                f"{self._radiotap(self._rssi(dev.ap or dev), ofdm=True)} "
+                f"BA RA:{dev.mac} (oui Unknown) "
+            )
+        raise ValueError(f"unknown frame kind {kind!r}")
+
+    # ---------------- Streams ----------------
+
+    def lines(
+        self,
+        rate: float,
+        count: Optional[int] = None,
+        duration: Optional[float] = None,
+    ) -> Iterator[str]:
+        """
+        Yield lines (with trailing newline) whose capture timestamps are Poisson-spaced
+        at `rate` frames/s, for `count` frames and/or `duration` capture seconds.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        end_ts = self.ts + duration if duration else None
+        n = 0
+        kinds, weights = self._kinds, self._weights
+        batch = 256
+        while True:
+            for kind in self.rnd.choices(kinds, weights, k=batch):
+                if count is not None and n >= count:
+                    return
+                self.ts += self.rnd.expovariate(rate)
+                if end_ts is not None and self.ts > end_ts:
+                    return
+                n += 1
+                yield self.frame(kind) + "\n"
+
+
+def write_stream(
+    gen: TrafficGenerator,
+    out: TextIO,
+    rate: float,
+    count: Optional[int] = None,
+    duration: Optional[float] = None,
+    realtime: bool = False,
+) -> int:
+    """Write lines to out; with realtime, pace them against the wall clock."""
+    written = 0
+    start_wall = time.monotonic()
+    start_ts = gen.ts
+    chunk: List[str] = []
+
+    def _flush() -> None:
+        nonlocal written
+        out.write("".join(chunk))
+        out.flush()
+        written += len(chunk)
+        chunk.clear()
+
+    for line in gen.lines(rate, count=count, duration=duration):
+        chunk.append(line)
+        if realtime:
+            # Write in ~10 ms slices and sleep while ahead of the wall clock
+            ahead = (gen.ts - start_ts) - (time.monotonic() - start_wall)
+            if ahead > 0.01:
+                _flush()
+                time.sleep(ahead)
+            elif len(chunk) >= 512:
+                _flush()
+        elif len(chunk) >= 256:
+            _flush()
+    if chunk:
+        _flush()
+    return written
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic tcpdump -e -tt -vvv radiotap lines."
+    )
+    parser.add_argument("--devices", type=int, default=200, help="Client devices")
+    parser.add_argument("--aps", type=int, default=5, help="Access points")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Frames per second")
+    parser.add_argument("--count", type=int, default=None, help="Stop after N frames")
+    parser.add_argument(
+        "--duration", type=float, default=None, help="Stop after N capture seconds"
+    )
+    parser.add_argument(
+        "--realtime",
+        action="store_true",
+        help="Pace output against the wall clock (default: as fast as possible)",
+    )
+    parser.add_argument(
+        "--randomized-frac",
+        type=float,
+        default=0.3,
+        help="Fraction of clients using randomized MACs (default: 0.3)",
+    )
+    parser.add_argument(
+        "--mobile-frac",
+        type=float,
+        default=0.5,
+        help="Fraction of clients that walk around (default: 0.5)",
+    )
+    parser.add_argument(
+        "--area", type=float, default=40.0, help="Room side length in metres"
+    )
+    parser.add_argument(
+        "--noise-db", type=float, default=4.0, help="RSSI noise (std dev, dB)"
+    )
+    parser.add_argument("--channel", type=int, default=6, help="Wi-Fi channel")
+    parser.add_argument(
+        "--retry-prob", type=float, default=0.05, help="Data frame retry probability"
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    parser.add_argument(
+        "--start-ts", type=float, default=None, help="First capture timestamp"
+    )
+    parser.add_argument("--out", default="-", help="Output file (default: stdout, '-')")
+    args = parser.parse_args()
+    if args.count is None and args.duration is None and not args.realtime:
+        parser.error("give --count or --duration (or --realtime to run until killed)")
+
+    gen = TrafficGenerator(
+        devices=args.devices,
+        aps=args.aps,
+        randomized_frac=args.randomized_frac,
+        mobile_frac=args.mobile_frac,
+        area_m=args.area,
+        channel=args.channel,
+        noise_db=args.noise_db,
+        retry_prob=args.retry_prob,
+        seed=args.seed,
+        start_ts=args.start_ts,
+    )
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    try:
+        write_stream(
+            gen,
+            out,
+            args.rate,
+            count=args.count,
+            duration=args.duration,
+            realtime=args.realtime,
+        )
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())